@@ -1,12 +1,22 @@
 import os
+import uuid
+from functools import partial
 import streamlit as st
 from src.storage import (
-    create_request, get_request, get_all_requests, update_request_response,
-    update_request_files, create_user, get_user, get_all_users, verify_user,
-    update_user_status, delete_user, get_user_requests,
-    create_tutorial_request, get_tutorial_request, get_all_tutorial_requests, update_tutorial_request_response
+    create_request, get_request,
+    create_user, get_user, verify_user,
+    update_user_status, delete_user, get_users_page, get_conflict_stats, get_write_stats, VersionConflictError,
+    get_hashing_stats,
+    get_requests_page, count_requests, search_requests, get_stats,
+    claim_next_request, renew_lease, release_request, complete_claimed_request, LeaseLostError,
+    create_tutorial_request, get_tutorial_request, get_all_tutorial_requests, update_tutorial_request_response,
+    attach_request_files, get_media_url, read_media, download_media, resume_derivative_jobs,
+    get_media_quota_left, get_media_stats, start_media_collector, get_symptom_stats,
 )
+from src.ids import format_timestamp
+from src.symptoms import SYMPTOMS
 from src.validation import validate_input, validate_signup, validate_tutorial_request
+from src.vehicles import get_catalog
 
 
 def _fmt_symptoms(d):
@@ -32,6 +42,265 @@ SYMPTOM_CATEGORIES = [
     ('fuel', '⛽'), ('visual', '👁️'), ('temperature', '🌡️'),
 ]
 
+# Symptom checklist of the Submit Issue page. Each category lists its
+# checkboxes column by column as (field, label); fields appear in the
+# submitted symptoms dict in this order, followed by "other". Widget keys
+# are "<prefix>_<field>", plus "<prefix>_other" / "<prefix>_other_text".
+SYMPTOM_CHECKLIST = [
+    {
+        "category": "power", "prefix": "power", "heading": "**⚡ Power Symptoms**",
+        "columns": [
+            [("loss_of_power", "Loss of power"), ("intermittent_power_loss", "Intermittent power loss")],
+            [("power_surges", "Power surges"), ("increased_power", "Increased power")],
+            [("hesitation_lag", "Hesitation/lag"), ("no_change", "No change")],
+        ],
+        "other_label": "Describe other power symptoms",
+        "other_placeholder": "Enter any other power symptoms not listed above...",
+    },
+    {
+        "category": "tactile", "prefix": "tactile", "heading": "**👋 Tactile Symptoms**",
+        "columns": [
+            [("vibration", "Vibration"), ("rough_engine", "Rough engine performance")],
+            [("pulling_to_side", "Pulling to one side"), ("shaking", "Shaking/trembling")],
+            [("jerking", "Jerking motion"), ("hunting", "Hunting"),
+             ("stiff_controls", "Stiff steering/pedals"), ("no_change", "No change")],
+        ],
+        "other_label": "Describe other tactile symptoms",
+        "other_placeholder": "Enter any other tactile/physical symptoms not listed above...",
+    },
+    {
+        "category": "audible", "prefix": "audible", "heading": "**🔊 Audible Symptoms**",
+        "columns": [
+            [("rattling", "Rattling"), ("knocking", "Knocking")],
+            [("grinding", "Grinding"), ("squealing", "Squealing/squeaking")],
+            [("humming", "Humming/buzzing"), ("clicking", "Clicking"), ("no_change", "No change")],
+        ],
+        "other_label": "Describe other audible symptoms",
+        "other_placeholder": "Enter any other sounds or noises not listed above...",
+    },
+    {
+        "category": "fuel", "prefix": "fuel", "heading": "**⛽ Fuel/Consumption Symptoms**",
+        "columns": [
+            [("increased_consumption", "Increased fuel consumption"), ("fuel_smell", "Fuel smell")],
+            [("decreased_mileage", "Decreased mileage/efficiency"), ("fuel_leak", "Fuel leak")],
+            [("difficulty_starting", "Difficulty starting"), ("stalling", "Engine stalling"),
+             ("no_change", "No change")],
+        ],
+        "other_label": "Describe other fuel/consumption symptoms",
+        "other_placeholder": "Enter any other fuel or consumption issues not listed above...",
+    },
+    {
+        "category": "visual", "prefix": "visual", "heading": "**👁️ Visual Symptoms**",
+        "columns": [
+            [("white_smoke", "White smoke"), ("black_smoke", "Black smoke")],
+            [("blue_smoke", "Blue smoke"), ("warning_lights", "Warning lights on")],
+            [("fluid_leak", "Fluid leaks"), ("corrosion", "Corrosion/rust"), ("no_change", "No change")],
+        ],
+        "other_label": "Describe other visual symptoms",
+        "other_placeholder": "Enter any other visual or observable symptoms not listed above...",
+    },
+    {
+        "category": "temperature", "prefix": "temp", "heading": "**🌡️ Temperature Symptoms**",
+        "columns": [
+            [("overheating", "Engine overheating"), ("running_hot", "Running hotter than normal")],
+            [("running_cold", "Running colder than normal"), ("ac_issues", "A/C not working properly")],
+            [("heater_issues", "Heater not working properly"), ("no_change", "No change")],
+        ],
+        "other_label": "Describe other temperature symptoms",
+        "other_placeholder": "Enter any other temperature-related symptoms not listed above...",
+    },
+]
+
+# Make/model catalog, loaded once per process (src/data/vehicle_catalog.json)
+VEHICLE_CATALOG = get_catalog()
+
+YEARS = ["Select Year"] + [str(year) for year in range(2025, 1979, -1)]
+
+# Default number of requests rendered per page in the admin request list
+REQUESTS_PAGE_SIZE = 25
+
+# Page sizes offered by the admin request and member lists
+PAGE_SIZE_OPTIONS = [10, 25, 50, 100]
+
+# Latest requests listed in each member's expander in the admin area
+MEMBER_HISTORY_LIMIT = 5
+
+# Groupings offered by the admin symptom analytics: label -> request fields
+SYMPTOM_GROUPINGS = {
+    "Overall": (),
+    "Make": ("make",),
+    "Make & model": ("make", "model"),
+    "Make, model & year": ("make", "model", "year"),
+}
+# Vehicle groups listed by the symptom analytics, most requests first
+SYMPTOM_GROUPS_SHOWN = 20
+
+
+def _page_offset(total, key, page_size=REQUESTS_PAGE_SIZE):
+    """Renders a jump-to-page selector for `total` items and returns the offset of the chosen page."""
+    pages = max((int(total) + page_size - 1) // page_size, 1)
+    if pages == 1:
+        return 0
+    # Keep the remembered page in range after a filter or page size shrank the list
+    if st.session_state.get(key, 1) > pages:
+        st.session_state[key] = pages
+    page = st.number_input(f"Jump to page (of {pages})", min_value=1, max_value=pages, key=key)
+    return (int(page) - 1) * page_size
+
+
+def _load_page(fetch, key, page_size):
+    """
+    Loads the page of a paged list chosen in its jump-to-page selector.
+
+    fetch(offset, limit) returns (total, items); a search counts its matches
+    in the same scan that collects the page, so one call usually does. Only
+    when the remembered page is past the end (the list shrank) is the last
+    page fetched again.
+
+    Returns:
+        tuple: (total, offset of the page shown, items on it)
+    """
+    requested = (int(st.session_state.get(key, 1)) - 1) * page_size
+    total, items = fetch(requested, page_size)
+    offset = _page_offset(total, key, page_size)
+    if offset != requested:
+        _, items = fetch(offset, page_size)
+    return total, offset, items
+
+
+def _reset_page(key):
+    """on_change callback that sends a paged list back to its first page."""
+    st.session_state[key] = 1
+
+
+def _seen_version(store, key, record):
+    """
+    Returns the version of a record shown on the previous run, and remembers
+    the version shown on this one.
+
+    A click reruns the script, which reads the record again, so buttons and
+    forms act on the version rendered before the click: an action taken
+    after someone else changed the record fails with VersionConflictError
+    instead of overwriting their change, while a view that has since been
+    re-rendered with the new data acts on the new version.
+    """
+    state_key = f"shown_version_{store}_{key}"
+    shown = record.get('version', 0)
+    seen = st.session_state.get(state_key, shown)
+    st.session_state[state_key] = shown
+    return seen
+
+
+def _symptom_label(code):
+    category, field = SYMPTOMS[code]
+    return f"{category.title()}: {field.replace('_', ' ').title()}"
+
+
+def _show_symptom_analytics():
+    """Shows how often each symptom is reported, overall or per vehicle."""
+    grouping = st.selectbox("Group by", list(SYMPTOM_GROUPINGS), key="admin_symptom_grouping")
+    by = SYMPTOM_GROUPINGS[grouping]
+    table = get_symptom_stats(by)
+    if not table:
+        st.info("No requests to analyse yet.")
+        return
+    if not by:
+        total, counts = table[()]
+        st.dataframe(
+            [
+                {"Symptom": _symptom_label(code), "Requests": counts[code], "Share": f"{counts[code] / total:.0%}"}
+                for code in sorted(range(len(counts)), key=lambda code: -counts[code]) if counts[code]
+            ],
+            hide_index=True, use_container_width=True,
+        )
+        return
+    groups = sorted(table.items(), key=lambda item: -item[1][0])[:SYMPTOM_GROUPS_SHOWN]
+    rows = []
+    for group, (total, counts) in groups:
+        top = [code for code in sorted(range(len(counts)), key=lambda code: -counts[code])[:3] if counts[code]]
+        rows.append({
+            grouping: " ".join(str(value) for value in group if value not in (None, "")) or "Unknown",
+            "Requests": total,
+            "Most reported": ", ".join(
+                f"{_symptom_label(code)} ({counts[code] / total:.0%})" for code in top
+            ),
+        })
+    st.dataframe(rows, hide_index=True, use_container_width=True)
+    if len(table) > SYMPTOM_GROUPS_SHOWN:
+        st.caption(f"Showing the {SYMPTOM_GROUPS_SHOWN} vehicles with the most requests of {len(table)}.")
+
+
+def _show_request_files(req_id, data):
+    """
+    Lists the photos, videos and audio a member attached to a request.
+
+    Each file is opened with its own toggle and nothing is read from disk
+    until then, so a request with many large attachments renders in
+    constant memory. Images show their thumbnail once it has been made and
+    open as a screen-sized preview instead of the original.
+    """
+    files = data.get('files') or []
+    removed = data.get('files_removed')
+    if removed:
+        reason = "the account was deleted" if removed['reason'] == "account deleted" else "of the retention policy"
+        st.info(f"📎 {removed['count']} attached file(s) were removed on {removed['timestamp']} because {reason}.")
+    elif data.get('files_error'):
+        st.error(f"📎 The uploaded files could not be stored: {data['files_error']}")
+    elif not files:
+        st.info("📎 The uploads are still being stored – check back shortly.")
+    for i, entry in enumerate(files):
+        if not isinstance(entry, dict):
+            # Recorded by name only, before uploads were stored
+            st.write(f"📎 {entry}")
+            continue
+        label = f"📎 {entry['name']} ({entry['size'] / 1024:,.0f} KB)"
+        derived = entry.get('derivatives') or {}
+        if derived.get('status') == 'ready':
+            st.image(get_media_url(derived['thumb']) or read_media(derived['thumb']))
+            # Same name, preview bytes
+            entry = {**entry, **derived['preview']}
+        elif derived.get('status') == 'pending':
+            st.caption(f"🖼️ Preview of {entry['name']} is being generated…")
+        elif derived.get('status') == 'failed':
+            st.caption(f"🖼️ No preview of {entry['name']}: {derived.get('error')}")
+        if st.toggle(label, key=f"media_{req_id}_{i}"):
+            _show_media(req_id, entry)
+
+
+def _show_media(req_id, entry):
+    """Shows one attachment, streamed by the media server when it runs."""
+    # The browser fetches URLs itself, seeking with range requests; bytes
+    # are sent through Streamlit only when there is no media server.
+    source = get_media_url(entry)
+    if source is None:
+        source = read_media(entry)
+        if source is None:
+            st.caption(
+                f"{entry['name']} ({entry['size'] / (1024 * 1024):,.1f} MB) is too large to open here. "
+                "Download it, or set DIAGNOSTICS_MEDIA_PORT to stream large files."
+            )
+            # Read only when clicked; clicking does not rerun the page
+            st.download_button(
+                "Download", partial(download_media, entry), file_name=entry['name'],
+                mime=entry.get('type'), key=f"download_{req_id}_{entry['sha256']}", on_click="ignore",
+            )
+            return
+    kind = (entry.get('type') or "").split('/')[0]
+    if kind == "image":
+        st.image(source)
+    elif kind == "video":
+        st.video(source)
+    elif kind == "audio":
+        st.audio(source)
+    elif isinstance(source, str):
+        st.markdown(f"[Download {entry['name']}]({source})")
+    else:
+        st.download_button(
+            "Download", source, file_name=entry['name'], mime=entry.get('type'),
+            key=f"download_{req_id}_{entry['sha256']}",
+        )
+
+
 # ---------------------------------------------------------------------------
 # Global CSS – automotive diagnostics database / workshop desk theme
 # ---------------------------------------------------------------------------
@@ -55,28 +324,6 @@ p, label, span, div {
     font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
 }
 
-/* ── Streamlit tabs ─────────────────────────────────────────────────────── */
-.stTabs [data-baseweb="tab-list"] {
-    background: #111318;
-    border-bottom: 2px solid #e8820c;
-    gap: 2px;
-}
-.stTabs [data-baseweb="tab"] {
-    color: #888;
-    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-    letter-spacing: 0.3px;
-    font-size: 0.85rem;
-    background: #1a1a22;
-    border: 1px solid #2a2a35;
-    border-bottom: none;
-    padding: 8px 20px;
-}
-.stTabs [aria-selected="true"] {
-    background: #1f1a0e !important;
-    color: #e8820c !important;
-    border-color: #e8820c !important;
-}
-
 /* ── Inputs ─────────────────────────────────────────────────────────────── */
 input, textarea, select {
     background: rgba(255,255,255,0.05) !important;
@@ -265,42 +512,78 @@ if current_page == "admin":
         st.markdown("---")
 
         # ── Stats ──────────────────────────────────────────────────────────
-        all_requests = get_all_requests()
-        all_users = get_all_users()
-
-        total_req = len(all_requests)
-        pending_cnt = sum(1 for r in all_requests.values() if r.get('status') == 'pending')
-        completed_cnt = sum(1 for r in all_requests.values() if r.get('status') == 'completed')
-        total_users = len(all_users)
-        active_users = sum(1 for u in all_users.values() if u.get('status') == 'active')
-        paused_users = sum(1 for u in all_users.values() if u.get('status') == 'paused')
+        stats = get_stats()
 
         st.subheader("📊 Key Metrics")
         m1, m2, m3, m4, m5, m6 = st.columns(6)
-        m1.metric("Total Requests", total_req)
-        m2.metric("Pending", pending_cnt)
-        m3.metric("Completed", completed_cnt)
-        m4.metric("Total Members", total_users)
-        m5.metric("Active", active_users)
-        m6.metric("Paused", paused_users)
+        m1.metric("Total Requests", stats['total_requests'])
+        m2.metric("Pending", stats['pending_requests'])
+        m3.metric("Completed", stats['completed_requests'])
+        m4.metric("Total Members", stats['total_users'])
+        m5.metric("Active", stats['active_users'])
+        m6.metric("Paused", stats['paused_users'])
+        conflicts = get_conflict_stats()
+        st.caption(
+            "Stale writes rejected since startup: "
+            + ", ".join(f"{store} {count}" for store, count in conflicts.items())
+        )
+        hashes = get_hashing_stats()
+        st.caption(
+            f"Password hashing: {hashes['running']} of {hashes['workers']} workers busy, "
+            f"{hashes['queued']} queued (peak {hashes['peak_queued']} of {hashes['max_queued']}) "
+            f"— {hashes['rejected']} turned away as busy, {hashes['timed_out']} timed out"
+        )
+        media_stats = get_media_stats()
+        quota = media_stats['quota_bytes']
+        st.caption(
+            f"Media: {media_stats['bytes'] / (1024 * 1024):,.1f} MB"
+            + (f" of {quota / (1024 * 1024):,.0f} MB" if quota else "")
+            + f" — cleanup removed {media_stats['removed']} files "
+            f"({media_stats['freed_bytes'] / (1024 * 1024):,.1f} MB) in {media_stats['cycles']} runs"
+        )
+        writes = get_write_stats()
+        if writes['submitted']:
+            st.caption(
+                f"Group commit: {writes['submitted']} changes written in "
+                f"{writes['flushes']} file rewrites ({writes['pending']} pending)"
+            )
 
         st.markdown("---")
 
         # ── Member management ──────────────────────────────────────────────
+        # Only the selected page of members is loaded and rendered.
         st.subheader("👥 Member Management")
 
-        # Performance optimization: pre-fetch requests to avoid N+1 query inside loop
-        requests_by_user = {}
-        if all_requests:
-            for r_id, r_data in all_requests.items():
-                u_email = r_data.get('user_email', '').strip().lower()
-                if u_email:
-                    if u_email not in requests_by_user:
-                        requests_by_user[u_email] = {}
-                    requests_by_user[u_email][r_id] = r_data
-
-        if all_users:
-            for email, user in all_users.items():
+        if stats['total_users']:
+            mf1, mf2, mf3 = st.columns([3, 1, 1])
+            with mf1:
+                member_search = st.text_input(
+                    "Search members", placeholder="Name, email or occupation",
+                    key="admin_member_search",
+                    on_change=_reset_page, args=("admin_members_page",),
+                )
+            with mf2:
+                member_status = st.selectbox(
+                    "Account status", ["All", "Active", "Paused"], key="admin_member_status",
+                    on_change=_reset_page, args=("admin_members_page",),
+                )
+            with mf3:
+                member_page_size = st.selectbox(
+                    "Members per page", PAGE_SIZE_OPTIONS, key="admin_members_page_size",
+                    on_change=_reset_page, args=("admin_members_page",),
+                )
+
+            member_status_arg = None if member_status == "All" else member_status.lower()
+            member_total, member_offset, members = _load_page(
+                lambda offset, limit: get_users_page(member_status_arg, member_search, offset, limit),
+                "admin_members_page", member_page_size,
+            )
+            st.markdown(
+                f"**Showing {member_offset + 1 if members else 0}–{member_offset + len(members)} "
+                f"of {member_total} members**"
+            )
+
+            for email, user in members:
                 status_icon = "🟢" if user.get('status') == 'active' else "🔴"
                 with st.expander(
                     f"{status_icon} {user.get('name', 'Unknown')}  —  {email}"
@@ -315,14 +598,12 @@ if current_page == "admin":
                         st.write(f"**Status:** {user.get('status', 'N/A').upper()}")
                         st.write(f"**Registered:** {user.get('created_at', 'N/A')}")
 
-                    # Request history for this user
-                    user_reqs = requests_by_user.get(email.lower().strip(), {})
-                    st.markdown(f"**Diagnostic Requests:** {len(user_reqs)}")
-                    if user_reqs:
-                        for rid, rdata in sorted(
-                            user_reqs.items(),
-                            key=lambda x: x[1].get('timestamp', ''),
-                            reverse=True,
+                    # Latest requests for this user, newest first from the user index
+                    user_req_total = count_requests(user_email=email)
+                    st.markdown(f"**Diagnostic Requests:** {user_req_total}")
+                    if user_req_total:
+                        for rid, rdata in get_requests_page(
+                            order='newest', limit=MEMBER_HISTORY_LIMIT, user_email=email,
                         ):
                             rstatus = rdata.get('status', 'unknown')
                             ricon = "✅" if rstatus == 'completed' else "⏳"
@@ -332,29 +613,41 @@ if current_page == "admin":
                                 f"{rdata.get('model', '')} — "
                                 f"{rdata.get('timestamp', '')} — **{rstatus.upper()}**"
                             )
+                        if user_req_total > MEMBER_HISTORY_LIMIT:
+                            st.caption(
+                                f"Showing the latest {MEMBER_HISTORY_LIMIT}. "
+                                "Search All Requests by this email to see the rest."
+                            )
 
                     # Account actions
                     st.markdown("**Account Actions:**")
+                    seen = _seen_version("users", email, user)
                     act_col1, act_col2 = st.columns(2)
-                    with act_col1:
-                        if user.get('status') == 'active':
-                            if st.button("⏸ Pause Account", key=f"pause_{email}"):
-                                update_user_status(email, 'paused')
-                                st.success(f"Account paused for {email}.")
+                    try:
+                        with act_col1:
+                            if user.get('status') == 'active':
+                                if st.button("⏸ Pause Account", key=f"pause_{email}"):
+                                    update_user_status(email, 'paused', expected_version=seen)
+                                    st.success(f"Account paused for {email}.")
+                                    st.rerun()
+                            else:
+                                if st.button("▶ Reactivate Account", key=f"activate_{email}"):
+                                    update_user_status(email, 'active', expected_version=seen)
+                                    st.success(f"Account reactivated for {email}.")
+                                    st.rerun()
+                        with act_col2:
+                            if st.button(
+                                "🗑 Delete Account", key=f"delete_{email}",
+                                help="This permanently removes the account.",
+                            ):
+                                delete_user(email, expected_version=seen)
+                                st.warning(f"Account deleted for {email}.")
                                 st.rerun()
-                        else:
-                            if st.button("▶ Reactivate Account", key=f"activate_{email}"):
-                                update_user_status(email, 'active')
-                                st.success(f"Account reactivated for {email}.")
-                                st.rerun()
-                    with act_col2:
-                        if st.button(
-                            "🗑 Delete Account", key=f"delete_{email}",
-                            help="This permanently removes the account.",
-                        ):
-                            delete_user(email)
-                            st.warning(f"Account deleted for {email}.")
-                            st.rerun()
+                    except VersionConflictError:
+                        st.error(
+                            "This account was changed by someone else since it was shown. "
+                            "Review it again before retrying."
+                        )
         else:
             st.info("No registered members yet.")
 
@@ -362,14 +655,9 @@ if current_page == "admin":
 
         # ── Recent Activity ────────────────────────────────────────────────
         st.subheader("📈 Recent Activity")
-        if all_requests:
-            sorted_requests = sorted(
-                all_requests.items(),
-                key=lambda x: x[1].get('timestamp', ''),
-                reverse=True,
-            )
+        if stats['total_requests']:
             st.markdown("**Latest 10 Requests:**")
-            for req_id, data in sorted_requests[:10]:
+            for req_id, data in get_requests_page(order='newest', limit=10):
                 sicon = "✅" if data.get('status') == 'completed' else "⏳"
                 st.markdown(
                     f"{sicon} **{data.get('year', 'N/A')} {data.get('make', '?')} "
@@ -382,31 +670,52 @@ if current_page == "admin":
 
         st.markdown("---")
 
+        # ── Symptom Analytics ──────────────────────────────────────────────
+        # Reads every request, so it is only computed while switched on.
+        st.subheader("🔬 Symptom Analytics")
+        if st.toggle("Show symptom frequencies", key="admin_symptom_analytics"):
+            _show_symptom_analytics()
+
+        st.markdown("---")
+
         # ── All Requests ───────────────────────────────────────────────────
         st.subheader("🗂️ All Requests")
-        if all_requests:
-            filter_col1, filter_col2 = st.columns(2)
+        if stats['total_requests']:
+            # Only the selected page of requests is loaded and rendered.
+            request_search = st.text_input(
+                "Search requests", placeholder="Request ID, member email, make, model, year, VIN or OBD code",
+                key="admin_request_search",
+                on_change=_reset_page, args=("admin_requests_page",),
+            )
+            filter_col1, filter_col2, filter_col3 = st.columns(3)
             with filter_col1:
                 status_filter = st.selectbox(
-                    "Filter by Status", ["All", "Pending", "Completed"]
+                    "Filter by Status", ["All", "Pending", "Completed"],
+                    key="admin_request_status",
+                    on_change=_reset_page, args=("admin_requests_page",),
                 )
             with filter_col2:
                 sort_order = st.selectbox("Sort by", ["Newest First", "Oldest First"])
+            with filter_col3:
+                request_page_size = st.selectbox(
+                    "Requests per page", PAGE_SIZE_OPTIONS,
+                    index=PAGE_SIZE_OPTIONS.index(REQUESTS_PAGE_SIZE),
+                    key="admin_requests_page_size",
+                    on_change=_reset_page, args=("admin_requests_page",),
+                )
 
-            filtered = all_requests
-            if status_filter != "All":
-                filtered = {
-                    k: v for k, v in all_requests.items()
-                    if v.get('status') == status_filter.lower()
-                }
-            sorted_filtered = sorted(
-                filtered.items(),
-                key=lambda x: x[1].get('timestamp', ''),
-                reverse=(sort_order == "Newest First"),
+            status_arg = None if status_filter == "All" else status_filter.lower()
+            order_arg = 'newest' if sort_order == "Newest First" else 'oldest'
+            filtered_total, offset, page = _load_page(
+                lambda offset, limit: search_requests(request_search, status_arg, order_arg, offset, limit),
+                "admin_requests_page", request_page_size,
             )
 
-            st.markdown(f"**Showing {len(sorted_filtered)} requests**")
-            for req_id, data in sorted_filtered:
+            st.markdown(
+                f"**Showing {offset + 1 if page else 0}–{offset + len(page)} "
+                f"of {filtered_total} requests**"
+            )
+            for req_id, data in page:
                 sc = "🟢" if data.get('status') == 'completed' else "🟡"
                 with st.expander(
                     f"{sc} {data.get('year', 'N/A')} {data.get('make', '?')} "
@@ -453,6 +762,9 @@ if current_page == "admin":
                         if symptoms.get('additional_details'):
                             st.markdown(f"**📝 Notes:** {symptoms['additional_details']}")
 
+                    if data.get('has_files'):
+                        _show_request_files(req_id, data)
+
                     if data.get('status') == 'completed' and data.get('response'):
                         st.markdown("**✅ Expert Diagnosis:**")
                         st.info(data['response'])
@@ -464,7 +776,7 @@ if current_page == "admin":
 
 
 # ===========================================================================
-# MAIN APP  (member login / signup then main tabs)
+# MAIN APP  (member login / signup then main pages)
 # ===========================================================================
 
 st.title("🚗 Automotive Fault Diagnostics")
@@ -591,12 +903,12 @@ DATABASE: ONLINE  |  EXPERTS: AVAILABLE
                     else:
                         st.error(msg)
 
-    # Don't render the main app tabs while not logged in
+    # Don't render the main app pages while not logged in
     st.stop()
 
 
 # ===========================================================================
-# AUTHENTICATED – Main application tabs
+# AUTHENTICATED – Main application pages
 # ===========================================================================
 
 current_user = st.session_state['logged_in_user']
@@ -617,260 +929,159 @@ with top_col2:
 
 st.markdown("---")
 
-tab1, tab2, tab3, tab4 = st.tabs([
-    "🚗 Submit Issue",
-    "🔧 Expert Dashboard",
-    "🔍 Check Status",
-    "🎥 Custom Tutorial",
-])
-
 # ---------------------------------------------------------------------------
-# TAB 1: CAR OWNER – Submit Issue
+# PAGE 1: CAR OWNER – Submit Issue
 # ---------------------------------------------------------------------------
-with tab1:
-    st.header("Describe Your Car Issue")
-    st.markdown("Get professional diagnostic advice from certified experts.")
+# The vehicle selector and the symptom checklist are fragments: clicking one
+# of their widgets reruns only that fragment instead of the whole script.
+# Their values are read back from st.session_state when the form is submitted.
+def _choose_vehicle(make, model):
+    """Typeahead callback: fills the make (and model) dropdowns with a search match."""
+    st.session_state["vehicle_make"] = make
+    if model is not None:
+        st.session_state[f"vehicle_model_{make}"] = model
+    st.session_state["vehicle_search"] = ""
+
+
+@st.fragment
+def vehicle_selector():
+    query = st.text_input(
+        "Quick vehicle search", key="vehicle_search", placeholder="e.g. hilux, golf, x5",
+    )
+    if query:
+        matches = VEHICLE_CATALOG.search(query, limit=6)
+        if not matches:
+            st.caption("No matching vehicles – pick the make and model below.")
+        for i, (match_make, match_model) in enumerate(matches):
+            st.button(
+                f"{match_make} {match_model or ''}".strip(), key=f"vehicle_match_{i}",
+                on_click=_choose_vehicle, args=(match_make, match_model),
+            )
+    make = st.selectbox("Car Make", VEHICLE_CATALOG.make_options(), key="vehicle_make")
+    # Keyed per make so switching makes starts the model list from the top
+    st.selectbox("Car Model", VEHICLE_CATALOG.model_options(make), key=f"vehicle_model_{make}")
+    st.selectbox("Year", YEARS, key="vehicle_year")
+
+
+def _selected_vehicle():
+    """Returns (make, model, year) chosen in the vehicle selector; year is 0 when unset."""
+    make = st.session_state.get("vehicle_make", "Select Make")
+    model = st.session_state.get(f"vehicle_model_{make}", "Select Model")
+    year_str = st.session_state.get("vehicle_year", "Select Year")
+    year = int(year_str) if year_str != "Select Year" else 0
+    return make, model, year
+
+
+@st.fragment
+def symptom_checklist():
+    for section in SYMPTOM_CHECKLIST:
+        prefix = section["prefix"]
+        st.markdown(section["heading"])
+        for column, fields in zip(st.columns(3), section["columns"]):
+            with column:
+                for field, label in fields:
+                    st.checkbox(label, key=f"{prefix}_{field}")
+        if st.checkbox("Other", key=f"{prefix}_other"):
+            st.text_input(
+                section["other_label"], key=f"{prefix}_other_text",
+                placeholder=section["other_placeholder"],
+            )
+
 
-    # Australian Market Vehicle Data
-    AUSTRALIAN_MAKES = [
-        "Select Make", "Abarth", "Alfa Romeo", "Aston Martin", "Audi", "Bentley", "BMW", "BYD", "Chery",
-        "Chevrolet", "Chrysler", "Citroen", "Cupra", "Dacia", "Daewoo", "Daihatsu", "Dodge", "Ferrari",
-        "Fiat", "Ford", "Genesis", "GWM", "Holden", "Honda", "Hyundai", "Infiniti", "Isuzu", "Jaguar",
-        "Jeep", "Kia", "Lamborghini", "Land Rover", "LDV", "Lexus", "Mahindra", "Maserati", "Mazda",
-        "McLaren", "Mercedes-Benz", "MG", "Mini", "Mitsubishi", "Nissan", "Opel", "Peugeot", "Porsche",
-        "RAM", "Renault", "Rolls-Royce", "Skoda", "SsangYong", "Subaru", "Suzuki", "Tesla", "Toyota",
-        "Volkswagen", "Volvo", "Other",
+def _collect_symptoms(additional_details):
+    """Builds the symptoms dict stored on a request from the checklist widgets."""
+    symptoms = {}
+    for section in SYMPTOM_CHECKLIST:
+        prefix = section["prefix"]
+        values = {
+            field: bool(st.session_state.get(f"{prefix}_{field}", False))
+            for fields in section["columns"] for field, _ in fields
+        }
+        other = st.session_state.get(f"{prefix}_other", False)
+        values["other"] = st.session_state.get(f"{prefix}_other_text", "") if other else ""
+        symptoms[section["category"]] = values
+    symptoms["additional_details"] = additional_details
+    return symptoms
+
+
+# Streamlit drops the state of widgets that are not rendered in a run, so
+# a visit to another page would clear the Submit Issue form. Writing the
+# values back to st.session_state on every run keeps them until the page
+# is shown again. File uploads cannot be set this way and are not kept.
+SUBMIT_FORM_KEYS = (
+    ["vehicle_search", "vehicle_make", "vehicle_year"]
+    + [f"submit_{name}" for name in (
+        "mileage", "vin", "engine_type", "engine_capacity", "engine_code", "transmission_type",
+        "fuel_type", "last_service_date", "additional_details", "obd_codes",
+    )]
+    + [
+        f"{section['prefix']}_{field}"
+        for section in SYMPTOM_CHECKLIST
+        for fields in section["columns"] for field, _ in fields
     ]
+    + [f"{section['prefix']}_{suffix}" for section in SYMPTOM_CHECKLIST for suffix in ("other", "other_text")]
+)
+
 
-    MODELS_BY_MAKE = {
-        "Abarth": ["Select Model", "500", "595", "695", "124 Spider", "Punto", "Other"],
-        "Alfa Romeo": ["Select Model", "147", "156", "159", "Brera", "Giulia", "Giulietta", "GTV", "MiTo", "Spider", "Stelvio", "Tonale", "Other"],
-        "Aston Martin": ["Select Model", "DB7", "DB9", "DB11", "DBS", "DBX", "Rapide", "Vantage", "Virage", "Vanquish", "Other"],
-        "Audi": ["Select Model", "A1", "A2", "A3", "A4", "A5", "A6", "A7", "A8", "e-tron", "e-tron GT", "Q2", "Q3", "Q4 e-tron", "Q5", "Q7", "Q8", "Q8 e-tron", "R8", "RS3", "RS4", "RS5", "RS6", "RS7", "S3", "S4", "S5", "S6", "S7", "S8", "TT", "Other"],
-        "Bentley": ["Select Model", "Arnage", "Azure", "Bentayga", "Continental GT", "Continental GTC", "Flying Spur", "Mulsanne", "Other"],
-        "BMW": ["Select Model", "1 Series", "2 Series", "3 Series", "4 Series", "5 Series", "6 Series", "7 Series", "8 Series", "i3", "i4", "i5", "i7", "iX", "iX1", "iX3", "M2", "M3", "M4", "M5", "M8", "X1", "X2", "X3", "X3 M", "X4", "X4 M", "X5", "X5 M", "X6", "X6 M", "X7", "Z3", "Z4", "Other"],
-        "BYD": ["Select Model", "Atto 3", "Dolphin", "Han", "Seal", "Sea Lion 6", "Song", "Song Plus", "Tang", "Other"],
-        "Chery": ["Select Model", "Omoda 5", "Tiggo 4", "Tiggo 7", "Tiggo 7 Pro", "Tiggo 8", "Tiggo 8 Pro", "Other"],
-        "Chevrolet": ["Select Model", "Camaro", "Colorado", "Corvette", "Equinox", "Express", "Silverado", "Suburban", "Tahoe", "Trailblazer", "Traverse", "Other"],
-        "Chrysler": ["Select Model", "300", "300C", "Grand Voyager", "Neon", "PT Cruiser", "Sebring", "Voyager", "Other"],
-        "Citroen": ["Select Model", "Berlingo", "Boxer", "C1", "C2", "C3", "C3 Aircross", "C4", "C4 Cactus", "C5", "C5 Aircross", "C5 X", "C6", "Dispatch", "DS3", "DS4", "DS5", "Jumper", "Jumpy", "Relay", "SpaceTourer", "Xsara", "Other"],
-        "Cupra": ["Select Model", "Ateca", "Born", "Formentor", "Leon", "Terramar", "Tavascan", "Other"],
-        "Dacia": ["Select Model", "Duster", "Logan", "Sandero", "Spring", "Jogger", "Other"],
-        "Daewoo": ["Select Model", "Kalos", "Lacetti", "Lanos", "Leganza", "Nubira", "Tacuma", "Other"],
-        "Daihatsu": ["Select Model", "Charade", "Cuore", "Feroza", "Rocky", "Sirion", "Terios", "YRV", "Other"],
-        "Dodge": ["Select Model", "Challenger", "Charger", "Durango", "Journey", "Neon", "Nitro", "Viper", "Other"],
-        "Ferrari": ["Select Model", "296 GTB", "296 GTS", "458", "488 GTB", "488 Spider", "812 Competizione", "812 GTS", "812 Superfast", "California", "California T", "F12berlinetta", "F8 Spider", "F8 Tributo", "FF", "GTC4Lusso", "Portofino", "Portofino M", "Purosangue", "Roma", "SF90 Spider", "SF90 Stradale", "Other"],
-        "Fiat": ["Select Model", "124 Spider", "500", "500C", "500L", "500X", "Bravo", "Doblo", "Ducato", "Freemont", "Grande Punto", "Linea", "Panda", "Punto", "Scudo", "Tipo", "Other"],
-        "Ford": ["Select Model", "Bronco", "Bronco Sport", "Edge", "Escape", "Everest", "Explorer", "F-150", "Fiesta", "Focus", "Fusion", "Galaxy", "Kuga", "Maverick", "Mondeo", "Mustang", "Puma", "Ranger", "S-Max", "Territory", "Transit", "Transit Custom", "Other"],
-        "Genesis": ["Select Model", "G70", "G80", "G90", "GV60", "GV70", "GV80", "Other"],
-        "GWM": ["Select Model", "Haval H2", "Haval H6", "Haval H9", "Haval Jolion", "Tank 300", "Tank 500", "Ute", "Other"],
-        "Holden": ["Select Model", "Astra", "Barina", "Calais", "Captiva", "Colorado", "Commodore", "Cruze", "Insignia", "Malibu", "Monaro", "Spark", "Statesman", "Trailblazer", "Trax", "Ute", "Other"],
-        "Honda": ["Select Model", "Accord", "Accord Euro", "BR-V", "City", "Civic", "CR-V", "CR-Z", "e:NS1", "e:NP1", "e:NY1", "HR-V", "Integra", "Jazz", "Legend", "Odyssey", "Passport", "Pilot", "Ridgeline", "S2000", "WR-V", "ZR-V", "Other"],
-        "Hyundai": ["Select Model", "Accent", "Elantra", "Getz", "i20", "i20 N", "i30", "i30 N", "i40", "IONIQ", "IONIQ 5", "IONIQ 6", "IONIQ 9", "Kona", "Kona Electric", "Palisade", "Santa Cruz", "Santa Fe", "Sonata", "Staria", "Tucson", "Venue", "Veloster", "Other"],
-        "Infiniti": ["Select Model", "EX", "FX", "G", "M", "Q30", "Q50", "Q60", "Q70", "QX30", "QX50", "QX55", "QX60", "QX70", "QX80", "Other"],
-        "Isuzu": ["Select Model", "D-Max", "MU-X", "Other"],
-        "Jaguar": ["Select Model", "E-Pace", "F-Pace", "F-Type", "I-Pace", "S-Type", "XE", "XF", "XJ", "XJR", "XK", "Other"],
-        "Jeep": ["Select Model", "Cherokee", "Commander", "Compass", "Gladiator", "Grand Cherokee", "Grand Cherokee L", "Patriot", "Renegade", "Wrangler", "Other"],
-        "Kia": ["Select Model", "Carnival", "Ceed", "Cerato", "EV6", "EV9", "Mohave", "Niro", "Niro EV", "Picanto", "Pro Ceed", "Rio", "Seltos", "Sorento", "Soul", "Sportage", "Stinger", "Stonic", "Telluride", "Other"],
-        "Lamborghini": ["Select Model", "Aventador", "Gallardo", "Huracan", "Revuelto", "Urus", "Other"],
-        "Land Rover": ["Select Model", "Defender", "Discovery", "Discovery Sport", "Evoque", "Freelander", "Range Rover", "Range Rover Sport", "Range Rover Velar", "Other"],
-        "LDV": ["Select Model", "D90", "Deliver 9", "G10", "Mifa 6", "Mifa 9", "T60", "T60 Max", "Other"],
-        "Lexus": ["Select Model", "CT", "ES", "GS", "GX", "IS", "LC", "LS", "LX", "NX", "RC", "RC F", "RX", "RZ", "UX", "Other"],
-        "Mahindra": ["Select Model", "Bolero", "Pik Up", "Scorpio", "Thar", "XUV300", "XUV400", "XUV700", "Other"],
-        "Maserati": ["Select Model", "Ghibli", "GranCabrio", "GranTurismo", "Grecale", "Levante", "MC20", "Quattroporte", "Other"],
-        "Mazda": ["Select Model", "2", "3", "6", "BT-50", "CX-3", "CX-30", "CX-5", "CX-60", "CX-70", "CX-80", "CX-90", "CX-9", "MX-5", "MX-30", "Other"],
-        "McLaren": ["Select Model", "540C", "570GT", "570S", "600LT", "620R", "650S", "675LT", "720S", "765LT", "Artura", "GT", "MP4-12C", "Other"],
-        "Mercedes-Benz": ["Select Model", "A-Class", "AMG GT", "B-Class", "C-Class", "CLA", "CLS", "E-Class", "EQA", "EQB", "EQC", "EQE", "EQS", "G-Class", "GLA", "GLB", "GLC", "GLE", "GLS", "S-Class", "SL", "SLC", "Sprinter", "V-Class", "Vito", "Other"],
-        "MG": ["Select Model", "3", "4", "5", "6", "Cyberster", "HS", "HS PHEV", "Marvel R", "ZS", "ZS EV", "Other"],
-        "Mini": ["Select Model", "Clubman", "Convertible", "Countryman", "Coupe", "Hatch", "John Cooper Works", "Paceman", "Roadster", "Other"],
-        "Mitsubishi": ["Select Model", "3000GT", "ASX", "Carisma", "Colt", "Eclipse Cross", "Eclipse Cross PHEV", "Galant", "i-MiEV", "Lancer", "Mirage", "Outlander", "Outlander PHEV", "Pajero", "Pajero Sport", "Triton", "Other"],
-        "Nissan": ["Select Model", "350Z", "370Z", "Altima", "Ariya", "Armada", "Frontier", "GT-R", "Juke", "Leaf", "Maxima", "Micra", "Murano", "Navara", "Note", "Pathfinder", "Patrol", "Pulsar", "Qashqai", "Sentra", "Skyline", "Tiida", "Titan", "X-Trail", "Z", "Other"],
-        "Opel": ["Select Model", "Astra", "Corsa", "Grandland", "Insignia", "Mokka", "Zafira", "Other"],
-        "Peugeot": ["Select Model", "108", "208", "308", "408", "508", "2008", "3008", "4008", "5008", "Boxer", "Expert", "Partner", "Rifter", "Traveller", "Other"],
-        "Porsche": ["Select Model", "718 Boxster", "718 Cayman", "911", "Cayenne", "Cayenne E-Hybrid", "Macan", "Macan Electric", "Panamera", "Taycan", "Other"],
-        "RAM": ["Select Model", "1500", "1500 Classic", "2500", "3500", "Other"],
-        "Renault": ["Select Model", "Arkana", "Austral", "Captur", "Clio", "Duster", "Kadjar", "Kangoo", "Koleos", "Laguna", "Master", "Megane", "Scenic", "Trafic", "Zoe", "Other"],
-        "Rolls-Royce": ["Select Model", "Cullinan", "Dawn", "Ghost", "Phantom", "Silver Shadow", "Silver Seraph", "Spectre", "Wraith", "Other"],
-        "Skoda": ["Select Model", "Enyaq", "Fabia", "Kamiq", "Karoq", "Kodiaq", "Octavia", "Scala", "Superb", "Other"],
-        "SsangYong": ["Select Model", "Actyon", "Korando", "Musso", "Rexton", "Tivoli", "Torres", "Other"],
-        "Subaru": ["Select Model", "BRZ", "Crosstrek", "Forester", "Impreza", "Legacy", "Levorg", "Liberty", "Outback", "Solterra", "WRX", "WRX STI", "XV", "Other"],
-        "Suzuki": ["Select Model", "Across", "Baleno", "Grand Vitara", "Ignis", "Jimny", "Kizashi", "S-Cross", "Splash", "Swift", "SX4", "Vitara", "Other"],
-        "Tesla": ["Select Model", "Cybertruck", "Model 3", "Model S", "Model X", "Model Y", "Roadster", "Other"],
-        "Toyota": ["Select Model", "86", "Aurion", "Avalon", "Camry", "C-HR", "Corolla", "Corolla Cross", "Dyna", "Fortuner", "GR86", "GR Corolla", "GR Supra", "HiAce", "Hilux", "Kluger", "LandCruiser", "LandCruiser 200", "LandCruiser 300", "Lite Ace", "Prado", "ProAce", "RAV4", "RAV4 PHEV", "Rukus", "Supra", "Tarago", "Yaris", "Yaris Cross", "Other"],
-        "Volkswagen": ["Select Model", "Amarok", "Arteon", "Caddy", "Caravelle", "Crafter", "Golf", "ID.3", "ID.4", "ID.5", "Multivan", "Passat", "Polo", "T-Cross", "T-Roc", "Tiguan", "Tiguan Allspace", "Touareg", "Touran", "Transporter", "Other"],
-        "Volvo": ["Select Model", "C30", "C40", "C70", "EX30", "EX40", "EX90", "S40", "S60", "S80", "S90", "V40", "V60", "V90", "XC40", "XC60", "XC70", "XC90", "Other"],
-    }
-
-    YEARS = ["Select Year"] + [str(year) for year in range(2025, 1979, -1)]
+def _keep_submit_form_state():
+    """Re-saves the Submit Issue widget values, models picked for every make included."""
+    keys = set(SUBMIT_FORM_KEYS)
+    for key in list(st.session_state):
+        if key in keys or key.startswith("vehicle_model_"):
+            st.session_state[key] = st.session_state[key]
+
+
+def submit_issue_page():
+    st.header("Describe Your Car Issue")
+    st.markdown("Get professional diagnostic advice from certified experts.")
 
     st.subheader("📋 Vehicle Information")
     col1, col2, col3 = st.columns(3)
     with col1:
-        make = st.selectbox("Car Make", AUSTRALIAN_MAKES, index=0)
-        if make in MODELS_BY_MAKE:
-            model_options = MODELS_BY_MAKE[make]
-        else:
-            model_options = ["Select Model", "Other"]
-        model = st.selectbox("Car Model", model_options, index=0)
-        year_str = st.selectbox("Year", YEARS, index=0)
-        year = int(year_str) if year_str != "Select Year" else 0
+        vehicle_selector()
 
     with col2:
-        mileage = st.number_input("Mileage (km/miles)", min_value=0, step=1000)
-        vin = st.text_input("VIN (Optional)", placeholder="17-digit VIN")
-        engine_type = st.selectbox("Engine Type (Cylinders)", ["2", "3", "4", "5", "6", "8", "10", "11", "12", "Rotary"])
-        engine_capacity = st.text_input("Engine Capacity:", placeholder="e.g., 2.0L, 3500cc")
-        engine_code = st.text_input("Engine Code (If known)", placeholder="e.g., 2GR-FE, EJ257")
-
-    with col3:
-        transmission_type = st.selectbox("Transmission", ["Automatic", "Manual", "CVT", "Semi-Automatic", "Unknown"])
-        fuel_type = st.selectbox("Fuel Type", ["Petrol/Unleaded", "Diesel", "Hybrid", "Bio-Diesel", "Alcohol (E85/Methanol)"])
-        last_service_date = st.text_input("Last Service Date (Optional)", placeholder="YYYY-MM-DD or e.g., 3 months ago")
-
-    st.markdown("---")
-    st.subheader("🔍 Symptom Categories")
-    st.markdown("**Select at least one option in each category:**")
-
-    # Power Symptoms
-    st.markdown("**⚡ Power Symptoms**")
-    col_p1, col_p2, col_p3 = st.columns(3)
-    with col_p1:
-        power_loss = st.checkbox("Loss of power")
-        power_intermittent = st.checkbox("Intermittent power loss")
-    with col_p2:
-        power_surge = st.checkbox("Power surges")
-        power_more = st.checkbox("Increased power")
-    with col_p3:
-        power_hesitation = st.checkbox("Hesitation/lag")
-        power_no_change = st.checkbox("No change")
-    power_other = st.checkbox("Other", key="power_other")
-    if power_other:
-        power_other_text = st.text_input(
-            "Describe other power symptoms", key="power_other_text",
-            placeholder="Enter any other power symptoms not listed above...",
+        mileage = st.number_input("Mileage (km/miles)", min_value=0, step=1000, key="submit_mileage")
+        vin = st.text_input("VIN (Optional)", placeholder="17-digit VIN", key="submit_vin")
+        engine_type = st.selectbox(
+            "Engine Type (Cylinders)", ["2", "3", "4", "5", "6", "8", "10", "11", "12", "Rotary"],
+            key="submit_engine_type",
         )
-    else:
-        power_other_text = ""
-
-    # Tactile Symptoms
-    st.markdown("**👋 Tactile Symptoms**")
-    col_t1, col_t2, col_t3 = st.columns(3)
-    with col_t1:
-        tactile_vibration = st.checkbox("Vibration")
-        tactile_rough = st.checkbox("Rough engine performance")
-    with col_t2:
-        tactile_pulling = st.checkbox("Pulling to one side")
-        tactile_shaking = st.checkbox("Shaking/trembling")
-    with col_t3:
-        tactile_jerking = st.checkbox("Jerking motion")
-        tactile_hunting = st.checkbox("Hunting")
-        tactile_stiff = st.checkbox("Stiff steering/pedals")
-        tactile_no_change = st.checkbox("No change", key="tactile_no_change")
-    tactile_other = st.checkbox("Other", key="tactile_other")
-    if tactile_other:
-        tactile_other_text = st.text_input(
-            "Describe other tactile symptoms", key="tactile_other_text",
-            placeholder="Enter any other tactile/physical symptoms not listed above...",
+        engine_capacity = st.text_input(
+            "Engine Capacity:", placeholder="e.g., 2.0L, 3500cc", key="submit_engine_capacity",
         )
-    else:
-        tactile_other_text = ""
-
-    # Audible Symptoms
-    st.markdown("**🔊 Audible Symptoms**")
-    col_a1, col_a2, col_a3 = st.columns(3)
-    with col_a1:
-        audible_rattling = st.checkbox("Rattling")
-        audible_knocking = st.checkbox("Knocking")
-    with col_a2:
-        audible_grinding = st.checkbox("Grinding")
-        audible_squealing = st.checkbox("Squealing/squeaking")
-    with col_a3:
-        audible_humming = st.checkbox("Humming/buzzing")
-        audible_clicking = st.checkbox("Clicking")
-        audible_no_change = st.checkbox("No change", key="audible_no_change")
-    audible_other = st.checkbox("Other", key="audible_other")
-    if audible_other:
-        audible_other_text = st.text_input(
-            "Describe other audible symptoms", key="audible_other_text",
-            placeholder="Enter any other sounds or noises not listed above...",
+        engine_code = st.text_input(
+            "Engine Code (If known)", placeholder="e.g., 2GR-FE, EJ257", key="submit_engine_code",
         )
-    else:
-        audible_other_text = ""
-
-    # Fuel Symptoms
-    st.markdown("**⛽ Fuel/Consumption Symptoms**")
-    col_f1, col_f2, col_f3 = st.columns(3)
-    with col_f1:
-        fuel_increased = st.checkbox("Increased fuel consumption")
-        fuel_smell = st.checkbox("Fuel smell")
-    with col_f2:
-        fuel_decreased_mileage = st.checkbox("Decreased mileage/efficiency")
-        fuel_leak = st.checkbox("Fuel leak")
-    with col_f3:
-        fuel_difficulty_starting = st.checkbox("Difficulty starting")
-        fuel_stalling = st.checkbox("Engine stalling")
-        fuel_no_change = st.checkbox("No change", key="fuel_no_change")
-    fuel_other = st.checkbox("Other", key="fuel_other")
-    if fuel_other:
-        fuel_other_text = st.text_input(
-            "Describe other fuel/consumption symptoms", key="fuel_other_text",
-            placeholder="Enter any other fuel or consumption issues not listed above...",
+
+    with col3:
+        transmission_type = st.selectbox(
+            "Transmission", ["Automatic", "Manual", "CVT", "Semi-Automatic", "Unknown"],
+            key="submit_transmission_type",
         )
-    else:
-        fuel_other_text = ""
-
-    # Visual Symptoms
-    st.markdown("**👁️ Visual Symptoms**")
-    col_v1, col_v2, col_v3 = st.columns(3)
-    with col_v1:
-        visual_smoke_white = st.checkbox("White smoke")
-        visual_smoke_black = st.checkbox("Black smoke")
-    with col_v2:
-        visual_smoke_blue = st.checkbox("Blue smoke")
-        visual_warning_lights = st.checkbox("Warning lights on")
-    with col_v3:
-        visual_fluid_leak = st.checkbox("Fluid leaks")
-        visual_corrosion = st.checkbox("Corrosion/rust")
-        visual_no_change = st.checkbox("No change", key="visual_no_change")
-    visual_other = st.checkbox("Other", key="visual_other")
-    if visual_other:
-        visual_other_text = st.text_input(
-            "Describe other visual symptoms", key="visual_other_text",
-            placeholder="Enter any other visual or observable symptoms not listed above...",
+        fuel_type = st.selectbox(
+            "Fuel Type", ["Petrol/Unleaded", "Diesel", "Hybrid", "Bio-Diesel", "Alcohol (E85/Methanol)"],
+            key="submit_fuel_type",
         )
-    else:
-        visual_other_text = ""
-
-    # Temperature Symptoms
-    st.markdown("**🌡️ Temperature Symptoms**")
-    col_temp1, col_temp2, col_temp3 = st.columns(3)
-    with col_temp1:
-        temp_overheating = st.checkbox("Engine overheating")
-        temp_running_hot = st.checkbox("Running hotter than normal")
-    with col_temp2:
-        temp_running_cold = st.checkbox("Running colder than normal")
-        temp_ac_issues = st.checkbox("A/C not working properly")
-    with col_temp3:
-        temp_heater_issues = st.checkbox("Heater not working properly")
-        temp_no_change = st.checkbox("No change", key="temp_no_change")
-    temp_other = st.checkbox("Other", key="temp_other")
-    if temp_other:
-        temp_other_text = st.text_input(
-            "Describe other temperature symptoms", key="temp_other_text",
-            placeholder="Enter any other temperature-related symptoms not listed above...",
+        last_service_date = st.text_input(
+            "Last Service Date (Optional)", placeholder="YYYY-MM-DD or e.g., 3 months ago",
+            key="submit_last_service_date",
         )
-    else:
-        temp_other_text = ""
+
+    st.markdown("---")
+    st.subheader("🔍 Symptom Categories")
+    st.markdown("**Select at least one option in each category:**")
+    symptom_checklist()
 
     with st.form("diagnostic_request_form"):
         st.markdown("---")
         st.subheader("📝 Additional Details")
         additional_symptoms = st.text_area(
-            "Describe any additional symptoms or context", height=150,
+            "Describe any additional symptoms or context", height=150, key="submit_additional_details",
             placeholder="Example: The rattling noise only happens when accelerating above 40mph. "
                         "The check engine light came on yesterday.",
         )
-        obd_codes = st.text_input("OBD-II Codes (if known)", placeholder="P0300, P0420")
+        obd_codes = st.text_input("OBD-II Codes (if known)", placeholder="P0300, P0420", key="submit_obd_codes")
         uploaded_files = st.file_uploader(
             "Upload Photos/Videos/Audio of the issue", accept_multiple_files=True
         )
@@ -898,51 +1109,19 @@ with tab1:
     )
 
     if submitted:
-        symptoms_data = {
-            "power": {
-                "loss_of_power": power_loss, "intermittent_power_loss": power_intermittent,
-                "power_surges": power_surge, "increased_power": power_more,
-                "hesitation_lag": power_hesitation, "no_change": power_no_change,
-                "other": power_other_text,
-            },
-            "tactile": {
-                "vibration": tactile_vibration, "rough_engine": tactile_rough,
-                "pulling_to_side": tactile_pulling, "shaking": tactile_shaking,
-                "jerking": tactile_jerking, "hunting": tactile_hunting,
-                "stiff_controls": tactile_stiff, "no_change": tactile_no_change,
-                "other": tactile_other_text,
-            },
-            "audible": {
-                "rattling": audible_rattling, "knocking": audible_knocking,
-                "grinding": audible_grinding, "squealing": audible_squealing,
-                "humming": audible_humming, "clicking": audible_clicking,
-                "no_change": audible_no_change, "other": audible_other_text,
-            },
-            "fuel": {
-                "increased_consumption": fuel_increased, "fuel_smell": fuel_smell,
-                "decreased_mileage": fuel_decreased_mileage, "fuel_leak": fuel_leak,
-                "difficulty_starting": fuel_difficulty_starting, "stalling": fuel_stalling,
-                "no_change": fuel_no_change, "other": fuel_other_text,
-            },
-            "visual": {
-                "white_smoke": visual_smoke_white, "black_smoke": visual_smoke_black,
-                "blue_smoke": visual_smoke_blue, "warning_lights": visual_warning_lights,
-                "fluid_leak": visual_fluid_leak, "corrosion": visual_corrosion,
-                "no_change": visual_no_change, "other": visual_other_text,
-            },
-            "temperature": {
-                "overheating": temp_overheating, "running_hot": temp_running_hot,
-                "running_cold": temp_running_cold, "ac_issues": temp_ac_issues,
-                "heater_issues": temp_heater_issues, "no_change": temp_no_change,
-                "other": temp_other_text,
-            },
-            "additional_details": additional_symptoms,
-        }
+        make, model, year = _selected_vehicle()
+        symptoms_data = _collect_symptoms(additional_symptoms)
 
         errors = validate_input(
             make, model, year, mileage, vin, engine_type, transmission_type,
             fuel_type, last_service_date, symptoms_data, obd_codes,
         )
+        quota_left = get_media_quota_left(current_user['email']) if uploaded_files else None
+        if quota_left is not None and sum(f.size for f in uploaded_files) > quota_left:
+            errors.append(
+                f"The uploaded files exceed your remaining storage of {quota_left / (1024 * 1024):,.1f} MB. "
+                "Remove or shrink some of them."
+            )
         if errors:
             for error in errors:
                 st.error(error)
@@ -958,6 +1137,9 @@ with tab1:
                     "user_email": current_user['email'],
                 }
                 req_id = create_request(request_data)
+                if uploaded_files:
+                    # Stored on a worker thread; the expert sees them once linked
+                    attach_request_files(req_id, uploaded_files)
                 st.success("Payment Successful! Your request has been submitted.")
                 st.balloons()
                 st.markdown(f"**Your Request ID is:** `{req_id}`")
@@ -965,98 +1147,148 @@ with tab1:
 
 
 # ---------------------------------------------------------------------------
-# TAB 2: EXPERT DASHBOARD
+# PAGE 2: EXPERT DASHBOARD
 # ---------------------------------------------------------------------------
-with tab2:
+def expert_dashboard_page():
     st.header("Expert Dashboard")
 
     if 'expert_logged_in' not in st.session_state:
         st.session_state['expert_logged_in'] = False
 
     if not st.session_state['expert_logged_in']:
+        expert_name = st.text_input("Your Name", key="expert_name_input")
         password = st.text_input("Enter Expert Password", type="password")
         if st.button("Login"):
-            if password == EXPERT_PASSWORD:
+            if not expert_name.strip():
+                st.error("Please enter your name.")
+            elif password == EXPERT_PASSWORD:
                 st.session_state['expert_logged_in'] = True
+                # Claims belong to this session: the name is only shown, as
+                # two experts may well type the same one
+                st.session_state['expert_id'] = uuid.uuid4().hex
+                st.session_state['expert_name'] = expert_name.strip()
                 st.rerun()
             else:
                 st.error("Incorrect password.")
     else:
-        st.success("Logged in as Expert")
+        expert_id = st.session_state['expert_id']
+        expert_name = st.session_state['expert_name']
+        st.success(f"Logged in as Expert: {expert_name}")
         if st.button("Logout"):
+            claim_id = st.session_state.pop('expert_claim', None)
+            if claim_id:
+                release_request(claim_id, expert_id)
             st.session_state['expert_logged_in'] = False
             st.rerun()
 
+        # Experts pull one request at a time from the work queue, most
+        # urgent SLA deadline first. A claim is a lease that has to be
+        # extended while the expert is still working on the request.
         st.markdown("---")
-        st.subheader("Pending Requests")
-
-        all_requests = get_all_requests()
-        if all_requests:
-            pending_requests = {k: v for k, v in all_requests.items() if v.get('status') == 'pending'}
+        st.subheader("Work Queue")
+
+        claim_id = st.session_state.get('expert_claim')
+        data = get_request(claim_id) if claim_id else None
+        if claim_id and (data is None or data.get('status') != 'pending'
+                         or data.get('claimed_by') != expert_id):
+            st.warning(
+                "Your claim on the previous request expired and it was picked up by "
+                "another expert."
+            )
+            st.session_state['expert_claim'] = None
+            claim_id = data = None
+
+        if claim_id is None:
+            pending_total = count_requests('pending')
+            st.markdown(f"**{pending_total} pending requests**")
+            if st.button("Claim Next Request", type="primary", disabled=not pending_total):
+                claim = claim_next_request(expert_id)
+                if claim is None:
+                    st.info("Every pending request is currently claimed by another expert.")
+                else:
+                    st.session_state['expert_claim'] = claim[0]
+                    st.rerun()
+        else:
+            req_id = claim_id
+            lease_col, renew_col, release_col = st.columns([2, 1, 1])
+            with lease_col:
+                st.markdown(
+                    f"**Claimed until {format_timestamp(data['lease_expires_ms'])}**"
+                    + (f" — due by {format_timestamp(data['sla_deadline_ms'])}"
+                       if data.get('sla_deadline_ms') else "")
+                )
+            with renew_col:
+                if st.button("Extend Claim"):
+                    try:
+                        renew_lease(req_id, expert_id)
+                    except LeaseLostError as e:
+                        st.session_state['expert_claim'] = None
+                        st.error(str(e))
+                    else:
+                        st.rerun()
+            with release_col:
+                if st.button("Release"):
+                    release_request(req_id, expert_id)
+                    st.session_state['expert_claim'] = None
+                    st.rerun()
 
-            if not pending_requests:
-                st.info("No pending requests.")
+            st.write(f"**Request ID:** {req_id}")
+            st.write(f"**Submitted:** {data.get('timestamp')}")
+            st.write(f"**Member:** {data.get('user_email', 'N/A')}")
+
+            st.markdown("### 🚗 Vehicle Details")
+            col1, col2 = st.columns(2)
+            with col1:
+                st.write(f"**Make/Model:** {data.get('make')} {data.get('model')}")
+                st.write(f"**Year:** {data.get('year')}")
+                st.write(f"**Mileage:** {data.get('mileage')}")
+            with col2:
+                st.write(f"**Engine:** {data.get('engine_type')}")
+                if data.get('engine_capacity'):
+                    st.write(f"**Engine Capacity:** {data['engine_capacity']}")
+                if data.get('engine_code'):
+                    st.write(f"**Engine Code:** {data['engine_code']}")
+                st.write(f"**Transmission:** {data.get('transmission_type', 'N/A')}")
+                st.write(f"**Fuel Type:** {data.get('fuel_type', 'N/A')}")
+            if data.get('last_service_date'):
+                st.write(f"**Last Service:** {data['last_service_date']}")
+            if data.get('obd_codes'):
+                st.write(f"**OBD Codes:** {data['obd_codes']}")
+
+            st.markdown("### 🔍 Reported Symptoms")
+            symptoms = data.get('symptoms', {})
+            if isinstance(symptoms, str):
+                st.markdown(f"**General Description:**\n>{symptoms}")
             else:
-                for req_id, data in pending_requests.items():
-                    with st.expander(
-                        f"{data.get('year', 'N/A')} {data.get('make', '?')} "
-                        f"{data.get('model', '?')} - {req_id[:8]}..."
-                    ):
-                        st.write(f"**Request ID:** {req_id}")
-                        st.write(f"**Submitted:** {data.get('timestamp')}")
-                        st.write(f"**Member:** {data.get('user_email', 'N/A')}")
-
-                        st.markdown("### 🚗 Vehicle Details")
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            st.write(f"**Make/Model:** {data.get('make')} {data.get('model')}")
-                            st.write(f"**Year:** {data.get('year')}")
-                            st.write(f"**Mileage:** {data.get('mileage')}")
-                        with col2:
-                            st.write(f"**Engine:** {data.get('engine_type')}")
-                            if data.get('engine_capacity'):
-                                st.write(f"**Engine Capacity:** {data['engine_capacity']}")
-                            if data.get('engine_code'):
-                                st.write(f"**Engine Code:** {data['engine_code']}")
-                            st.write(f"**Transmission:** {data.get('transmission_type', 'N/A')}")
-                            st.write(f"**Fuel Type:** {data.get('fuel_type', 'N/A')}")
-                        if data.get('last_service_date'):
-                            st.write(f"**Last Service:** {data['last_service_date']}")
-                        if data.get('obd_codes'):
-                            st.write(f"**OBD Codes:** {data['obd_codes']}")
-
-                        st.markdown("### 🔍 Reported Symptoms")
-                        symptoms = data.get('symptoms', {})
-                        if isinstance(symptoms, str):
-                            st.markdown(f"**General Description:**\n>{symptoms}")
+                for cat, icon in SYMPTOM_CATEGORIES:
+                    active = _fmt_symptoms(symptoms.get(cat, {}))
+                    if active:
+                        st.markdown(f"**{icon} {cat.title()}:** {', '.join(active)}")
+                if symptoms.get('additional_details'):
+                    st.markdown(f"**📝 Additional Details:**\n>{symptoms['additional_details']}")
+
+            if data.get('has_files'):
+                _show_request_files(req_id, data)
+
+            with st.form(key=f"response_form_{req_id}"):
+                diagnosis = st.text_area(
+                    "Expert Diagnosis & Recommendation", height=200,
+                    placeholder="Enter your detailed diagnosis here...",
+                )
+                submit_diagnosis = st.form_submit_button("Send Diagnosis")
+                if submit_diagnosis:
+                    if diagnosis:
+                        try:
+                            complete_claimed_request(req_id, expert_id, diagnosis, expert_name)
+                        except LeaseLostError as e:
+                            st.session_state['expert_claim'] = None
+                            st.error(str(e))
                         else:
-                            for cat, icon in SYMPTOM_CATEGORIES:
-                                active = _fmt_symptoms(symptoms.get(cat, {}))
-                                if active:
-                                    st.markdown(f"**{icon} {cat.title()}:** {', '.join(active)}")
-                            if symptoms.get('additional_details'):
-                                st.markdown(f"**📝 Additional Details:**\n>{symptoms['additional_details']}")
-
-                        if data.get('has_files'):
-                            st.write("📎 *User uploaded files (placeholder)*")
-
-                        with st.form(key=f"response_form_{req_id}"):
-                            diagnosis = st.text_area(
-                                "Expert Diagnosis & Recommendation", height=200,
-                                placeholder="Enter your detailed diagnosis here...",
-                            )
-                            submit_diagnosis = st.form_submit_button("Send Diagnosis")
-                            if submit_diagnosis:
-                                if diagnosis:
-                                    if update_request_response(req_id, diagnosis):
-                                        st.success(f"Diagnosis sent for request {req_id}!")
-                                        st.rerun()
-                                    else:
-                                        st.error("Failed to update request.")
-                                else:
-                                    st.warning("Please enter a diagnosis.")
-        else:
-            st.info("No requests found.")
+                            st.session_state['expert_claim'] = None
+                            st.success(f"Diagnosis sent for request {req_id}!")
+                            st.rerun()
+                    else:
+                        st.warning("Please enter a diagnosis.")
 
         st.markdown("---")
         st.subheader("Pending Tutorial Requests")
@@ -1081,6 +1313,7 @@ with tab2:
                         st.write(f"**Description:** {data.get('description')}")
                         st.write(f"**Preferred Medium:** {data.get('medium')}")
 
+                        seen = _seen_version("tutorials", tut_id, data)
                         with st.form(key=f"tutorial_response_form_{tut_id}"):
                             tutorial_response = st.text_area(
                                 "Tutorial Content/Link", height=150,
@@ -1089,11 +1322,21 @@ with tab2:
                             submit_tutorial = st.form_submit_button("Send Tutorial")
                             if submit_tutorial:
                                 if tutorial_response:
-                                    if update_tutorial_request_response(tut_id, tutorial_response):
-                                        st.success(f"Tutorial sent for request {tut_id}!")
-                                        st.rerun()
+                                    try:
+                                        updated = update_tutorial_request_response(
+                                            tut_id, tutorial_response, expected_version=seen,
+                                        )
+                                    except VersionConflictError:
+                                        st.error(
+                                            "This tutorial request was changed by someone else "
+                                            "since you opened it. Review it before sending."
+                                        )
                                     else:
-                                        st.error("Failed to update tutorial request.")
+                                        if updated:
+                                            st.success(f"Tutorial sent for request {tut_id}!")
+                                            st.rerun()
+                                        else:
+                                            st.error("Failed to update tutorial request.")
                                 else:
                                     st.warning("Please enter the tutorial content or link.")
         else:
@@ -1101,93 +1344,99 @@ with tab2:
 
 
 # ---------------------------------------------------------------------------
-# TAB 3: CHECK STATUS
+# PAGE 3: CHECK STATUS
 # ---------------------------------------------------------------------------
-with tab3:
+def check_status_page():
     st.header("Check Your Status")
 
     check_id = st.text_input("Enter your Request ID")
 
+    # Remembered so the result stays up while attachments are opened
     if st.button("Check Status"):
-        if check_id:
-            clean_id = check_id.strip()
-            req_data = get_request(clean_id)
-            tut_data = get_tutorial_request(clean_id) if not req_data else None
-
-            if req_data:
-                st.subheader(f"Status: {req_data.get('status', 'Unknown').upper()}")
-
-                st.markdown("### 🚗 Vehicle Details")
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.write(
-                        f"**Vehicle:** {req_data.get('year')} "
-                        f"{req_data.get('make')} {req_data.get('model')}"
-                    )
-                    st.write(f"**Mileage:** {req_data.get('mileage')}")
-                    st.write(f"**Engine:** {req_data.get('engine_type')}")
-                    if req_data.get('engine_capacity'):
-                        st.write(f"**Engine Capacity:** {req_data.get('engine_capacity')}")
-                    if req_data.get('engine_code'):
-                        st.write(f"**Engine Code:** {req_data.get('engine_code')}")
-                with col2:
-                    if req_data.get('transmission_type'):
-                        st.write(f"**Transmission:** {req_data.get('transmission_type')}")
-                    if req_data.get('fuel_type'):
-                        st.write(f"**Fuel Type:** {req_data.get('fuel_type')}")
-                    if req_data.get('last_service_date'):
-                        st.write(f"**Last Service:** {req_data.get('last_service_date')}")
-
-                st.markdown("### 🔍 Reported Symptoms")
-                symptoms = req_data.get('symptoms', {})
-                if isinstance(symptoms, str):
-                    st.markdown(f"**Description:**\n>{symptoms}")
-                else:
-                    for cat, icon in SYMPTOM_CATEGORIES:
-                        active = _fmt_symptoms(symptoms.get(cat, {}))
-                        if active:
-                            st.markdown(f"**{icon} {cat.title()}:** {', '.join(active)}")
-                    if symptoms.get('additional_details'):
-                        st.markdown(f"**📝 Additional Details:**\n>{symptoms['additional_details']}")
-
-                if req_data.get('status') == 'completed':
-                    st.markdown("---")
-                    st.subheader("✅ Expert Diagnosis")
-                    st.info(req_data.get('response'))
-                    st.caption(f"Responded on: {req_data.get('response_timestamp')}")
-                else:
-                    st.info(
-                        "Your request is currently being reviewed by an expert. "
-                        "Please check back later."
-                    )
-            elif tut_data:
-                st.subheader(f"Tutorial Status: {tut_data.get('status', 'Unknown').upper()}")
-
-                st.markdown("### 🚗 Vehicle Details")
-                st.write(f"**Vehicle:** {tut_data.get('year')} {tut_data.get('make')} {tut_data.get('model')}")
-
-                st.markdown("### 🎥 Tutorial Request Details")
-                st.write(f"**Description:** {tut_data.get('description')}")
-                st.write(f"**Preferred Medium:** {tut_data.get('medium')}")
-
-                if tut_data.get('status') == 'completed':
-                    st.markdown("---")
-                    st.subheader("✅ Expert Tutorial Response")
-                    st.info(tut_data.get('response'))
-                    st.caption(f"Responded on: {tut_data.get('response_timestamp')}")
-                else:
-                    st.info(
-                        "Your custom tutorial request is currently being prepared by an expert. "
-                        "Please check back later."
-                    )
+        st.session_state['checked_request_id'] = check_id.strip()
+    clean_id = st.session_state.get('checked_request_id')
+    if clean_id:
+        req_data = get_request(clean_id)
+        tut_data = get_tutorial_request(clean_id) if not req_data else None
+
+        if req_data:
+            st.subheader(f"Status: {req_data.get('status', 'Unknown').upper()}")
+
+            st.markdown("### 🚗 Vehicle Details")
+            col1, col2 = st.columns(2)
+            with col1:
+                st.write(
+                    f"**Vehicle:** {req_data.get('year')} "
+                    f"{req_data.get('make')} {req_data.get('model')}"
+                )
+                st.write(f"**Mileage:** {req_data.get('mileage')}")
+                st.write(f"**Engine:** {req_data.get('engine_type')}")
+                if req_data.get('engine_capacity'):
+                    st.write(f"**Engine Capacity:** {req_data.get('engine_capacity')}")
+                if req_data.get('engine_code'):
+                    st.write(f"**Engine Code:** {req_data.get('engine_code')}")
+            with col2:
+                if req_data.get('transmission_type'):
+                    st.write(f"**Transmission:** {req_data.get('transmission_type')}")
+                if req_data.get('fuel_type'):
+                    st.write(f"**Fuel Type:** {req_data.get('fuel_type')}")
+                if req_data.get('last_service_date'):
+                    st.write(f"**Last Service:** {req_data.get('last_service_date')}")
+
+            st.markdown("### 🔍 Reported Symptoms")
+            symptoms = req_data.get('symptoms', {})
+            if isinstance(symptoms, str):
+                st.markdown(f"**Description:**\n>{symptoms}")
+            else:
+                for cat, icon in SYMPTOM_CATEGORIES:
+                    active = _fmt_symptoms(symptoms.get(cat, {}))
+                    if active:
+                        st.markdown(f"**{icon} {cat.title()}:** {', '.join(active)}")
+                if symptoms.get('additional_details'):
+                    st.markdown(f"**📝 Additional Details:**\n>{symptoms['additional_details']}")
+
+            if req_data.get('has_files'):
+                st.markdown("### 📎 Your Attachments")
+                _show_request_files(clean_id, req_data)
+
+            if req_data.get('status') == 'completed':
+                st.markdown("---")
+                st.subheader("✅ Expert Diagnosis")
+                st.info(req_data.get('response'))
+                st.caption(f"Responded on: {req_data.get('response_timestamp')}")
             else:
-                st.error("Request ID not found. Please check and try again.")
+                st.info(
+                    "Your request is currently being reviewed by an expert. "
+                    "Please check back later."
+                )
+        elif tut_data:
+            st.subheader(f"Tutorial Status: {tut_data.get('status', 'Unknown').upper()}")
+
+            st.markdown("### 🚗 Vehicle Details")
+            st.write(f"**Vehicle:** {tut_data.get('year')} {tut_data.get('make')} {tut_data.get('model')}")
+
+            st.markdown("### 🎥 Tutorial Request Details")
+            st.write(f"**Description:** {tut_data.get('description')}")
+            st.write(f"**Preferred Medium:** {tut_data.get('medium')}")
+
+            if tut_data.get('status') == 'completed':
+                st.markdown("---")
+                st.subheader("✅ Expert Tutorial Response")
+                st.info(tut_data.get('response'))
+                st.caption(f"Responded on: {tut_data.get('response_timestamp')}")
+            else:
+                st.info(
+                    "Your custom tutorial request is currently being prepared by an expert. "
+                    "Please check back later."
+                )
+        else:
+            st.error("Request ID not found. Please check and try again.")
 
 
 # ---------------------------------------------------------------------------
-# TAB 4: CUSTOM TUTORIAL
+# PAGE 4: CUSTOM TUTORIAL
 # ---------------------------------------------------------------------------
-with tab4:
+def custom_tutorial_page():
     st.header("Request a Custom Tutorial")
     st.markdown("Need a specific walkthrough? Request a custom instructional video or guide made just for your vehicle.")
 
@@ -1195,9 +1444,9 @@ with tab4:
         st.subheader("Vehicle Details")
         col1, col2, col3 = st.columns(3)
         with col1:
-            tut_make = st.selectbox("Car Make", AUSTRALIAN_MAKES, key="tut_make")
+            tut_make = st.selectbox("Car Make", VEHICLE_CATALOG.make_options(), key="tut_make")
         with col2:
-            tut_models = MODELS_BY_MAKE.get(tut_make, ["Select Model"])
+            tut_models = VEHICLE_CATALOG.model_options(tut_make)
             tut_model = st.selectbox("Car Model", tut_models, key="tut_model")
         with col3:
             current_year = 2025
@@ -1236,3 +1485,24 @@ with tab4:
                 st.balloons()
                 st.markdown(f"**Your Tutorial Request ID is:** `{req_id}`")
                 st.warning("Please save this ID to check your tutorial status later.")
+
+
+# Picks up thumbnail jobs left over from the last run and starts the media
+# garbage collector (both once per process)
+resume_derivative_jobs()
+start_media_collector()
+
+_keep_submit_form_state()
+
+# Only the selected page's function runs on a rerun; st.tabs would execute
+# the body of every tab each time any widget changes.
+selected_page = st.navigation(
+    [
+        st.Page(submit_issue_page, title="Submit Issue", icon="🚗", url_path="submit", default=True),
+        st.Page(expert_dashboard_page, title="Expert Dashboard", icon="🔧", url_path="expert"),
+        st.Page(check_status_page, title="Check Status", icon="🔍", url_path="status"),
+        st.Page(custom_tutorial_page, title="Custom Tutorial", icon="🎥", url_path="tutorial"),
+    ],
+    position="top",
+)
+selected_page.run()
@@ -0,0 +1,113 @@
+"""
+Data file encoding benchmark.
+
+Writes the synthetic requests store from benchmarks.datagen in every
+encoding of src/codec.py and times saving (serialise and atomic write) and
+loading (read and parse), along with the file size. "json-stdlib" is the
+minified encoding without orjson, to show what the optional codec adds:
+
+    python -m benchmarks.bench_codec
+    python -m benchmarks.bench_codec --sizes 1000 100000 --repeat 10
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+
+from benchmarks import datagen
+from benchmarks.bench_storage import RESULTS_DIR, _meta, _summary, _time
+from src import codec, fileio
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+
+@contextmanager
+def _without_orjson():
+    saved, codec.orjson = codec.orjson, None
+    try:
+        yield
+    finally:
+        codec.orjson = saved
+
+
+def variants():
+    """
+    Returns the encodings that can be benchmarked here.
+
+    Returns:
+        list: (label, encoding, uses_stdlib) tuples.
+    """
+    found = [("pretty", "pretty", True), ("json-stdlib", "json", True)]
+    if codec.orjson is not None:
+        found.append(("json", "json", False))
+    if codec.msgpack is not None:
+        found.append(("msgpack", "msgpack", False))
+    return found
+
+
+def bench_encoding(data, encoding, repeat, directory):
+    """
+    Times saving and loading `data` in one encoding.
+
+    Returns:
+        dict: {"save": summary, "load": summary}, and the file size in bytes.
+    """
+    path = os.path.join(directory, f"data-{encoding}.bin")
+    save = _time(fileio.atomic_write_json, [(path, data, "none", encoding)] * repeat)
+    load = _time(fileio.read_json, [(path,)] * repeat)
+    assert fileio.read_json(path) == data
+    return {"save": _summary(save), "load": _summary(load)}, os.path.getsize(path)
+
+
+def run(sizes=DEFAULT_SIZES, repeat=5, seed=0):
+    """
+    Runs every encoding at every size.
+
+    Returns:
+        dict: {"meta": {...}, "results": [{"mode", "size", "op", "bytes", ...summary}]},
+            with the encoding as "mode" so runs compare like storage benchmarks.
+    """
+    results = []
+    labels = [label for label, _, _ in variants()]
+    for size in sizes:
+        data = datagen.generate(size, "hash", "salt", seed=seed)["requests"]
+        with tempfile.TemporaryDirectory(prefix="bench-codec-") as directory:
+            for label, encoding, uses_stdlib in variants():
+                if uses_stdlib:
+                    with _without_orjson():
+                        timings, file_size = bench_encoding(data, encoding, repeat, directory)
+                else:
+                    timings, file_size = bench_encoding(data, encoding, repeat, directory)
+                for op, summary in timings.items():
+                    results.append({"mode": label, "size": size, "op": op, "bytes": file_size, **summary})
+                print(
+                    f"{label:12} {size:>9,} {file_size:>14,} bytes  "
+                    f"save median {timings['save']['median_ms']:9.2f} ms  "
+                    f"load median {timings['load']['median_ms']:9.2f} ms",
+                    flush=True,
+                )
+    return {"meta": _meta(sizes, labels, repeat, seed, []), "results": results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/codec-<time>.json)")
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.repeat, args.seed)
+    output = args.output or os.path.join(RESULTS_DIR, f"codec-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
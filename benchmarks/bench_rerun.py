@@ -0,0 +1,124 @@
+"""
+Streamlit rerun benchmark.
+
+Runs app.py headlessly with streamlit.testing.v1.AppTest for a logged-in
+member and times the script execution of the initial run and of reruns
+triggered by ticking a symptom checkbox on the Submit Issue page, against
+a store seeded with synthetic requests. Pass --ref to time an earlier
+version of app.py side by side:
+
+    python -m benchmarks.bench_rerun
+    python -m benchmarks.bench_rerun --ref HEAD~1 --size 10000
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import datagen
+from src import fileio
+
+APP_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+MEMBER = {"email": "member0@example.com", "name": "Member 0", "status": "active"}
+
+
+def _seed(directory, size):
+    """Writes a synthetic store and points the storage module at it."""
+    data = datagen.generate(size, "unused", "unused")
+    paths = {
+        "DIAGNOSTICS_DATA_FILE": ("requests", os.path.join(directory, "diagnostics_data.json")),
+        "DIAGNOSTICS_USERS_FILE": ("users", os.path.join(directory, "users_data.json")),
+        "DIAGNOSTICS_TUTORIALS_FILE": ("tutorials", os.path.join(directory, "tutorials_data.json")),
+    }
+    for env, (store, path) in paths.items():
+        fileio.atomic_write_json(path, data[store])
+        os.environ[env] = path
+
+    import src.storage as storage
+    storage.DATA_FILE = os.environ["DIAGNOSTICS_DATA_FILE"]
+    storage.USERS_FILE = os.environ["DIAGNOSTICS_USERS_FILE"]
+    storage.TUTORIALS_FILE = os.environ["DIAGNOSTICS_TUTORIALS_FILE"]
+
+
+def time_reruns(app_file, reruns):
+    """
+    Times the initial run and `reruns` checkbox-triggered reruns of an app.
+
+    Returns:
+        dict: initial_ms and the rerun mean/median/max in milliseconds.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(app_file, default_timeout=120)
+    at.session_state["logged_in_user"] = MEMBER
+    start = time.perf_counter()
+    at.run()
+    initial = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(f"{app_file} raised: {at.exception[0].message}")
+
+    samples = []
+    for i in range(reruns):
+        checkbox = at.checkbox[0]
+        if i % 2:
+            checkbox.uncheck()
+        else:
+            checkbox.check()
+        start = time.perf_counter()
+        checkbox.run()
+        samples.append(time.perf_counter() - start)
+    return {
+        "initial_ms": initial * 1000,
+        "rerun_mean_ms": statistics.fmean(samples) * 1000,
+        "rerun_median_ms": statistics.median(samples) * 1000,
+        "rerun_max_ms": max(samples) * 1000,
+    }
+
+
+def _app_at(ref, directory):
+    """Writes app.py as of a git ref into `directory` and returns its path."""
+    source = subprocess.run(
+        ["git", "show", f"{ref}:app.py"], capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(APP_FILE),
+    ).stdout
+    path = os.path.join(directory, f"app_{ref.replace('/', '_').replace('~', '_')}.py")
+    with open(path, "w") as f:
+        f.write(source)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Times Streamlit reruns of app.py.")
+    parser.add_argument("--size", type=int, default=1000, help="Requests in the seeded store")
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--ref", help="Also time app.py as of this git ref")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="bench-rerun-") as directory:
+        _seed(directory, args.size)
+        apps = {"current": APP_FILE}
+        if args.ref:
+            apps[args.ref] = _app_at(args.ref, directory)
+        results = {}
+        for label, app_file in apps.items():
+            results[label] = time_reruns(app_file, args.reruns)
+            print(
+                f"{label:>12}: initial {results[label]['initial_ms']:8.1f} ms, "
+                f"rerun median {results[label]['rerun_median_ms']:8.1f} ms "
+                f"(max {results[label]['rerun_max_ms']:.1f} ms)"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"size": args.size, "reruns": args.reruns, "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,272 @@
+"""
+Storage micro-benchmarks at increasing dataset sizes.
+
+Seeds each storage mode with synthetic data from benchmarks.datagen, times
+the public storage API and writes the results as JSON, so runs from
+different versions can be compared:
+
+    python -m benchmarks.bench_storage
+    python -m benchmarks.bench_storage --sizes 1000 10000 100000 1000000
+    python -m benchmarks.bench_storage --baseline benchmarks/results/old.json
+
+Write latency is also measured under every durability mode (operations
+named e.g. "create_request@fsync"), with --durability to pick the modes.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import src.storage as storage
+from benchmarks import datagen
+from src import fileio
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+DEFAULT_MODES = ["json", "journal", "sqlite", "files"]
+DEFAULT_DURABILITY = list(fileio.DURABILITY_MODES)
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# Regressions beyond this factor are flagged when comparing with a baseline
+REGRESSION_FACTOR = 1.25
+
+
+def _summary(samples):
+    """Summarises per-call durations in seconds as milliseconds."""
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "median_ms": statistics.median(ordered) * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+        "min_ms": ordered[0] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def _time(fn, args_list):
+    """Calls fn(*args) for every args tuple and returns the durations."""
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _drop_caches():
+    """Forgets every in-memory copy so the next read goes to disk."""
+    for cache in (storage._REQUESTS_CACHE, storage._USERS_CACHE, storage._TUTORIALS_CACHE):
+        cache.bind(None)
+    storage._INDEXES.clear()
+    storage._SQLITE_STORES.clear()
+    storage._FILE_STORES.clear()
+
+
+def _configure(directory, mode):
+    """Points the storage module at fresh files in `directory`."""
+    storage.STORAGE_MODE = mode
+    storage.DATA_FILE = os.path.join(directory, "diagnostics_data.json")
+    storage.USERS_FILE = os.path.join(directory, "users_data.json")
+    storage.TUTORIALS_FILE = os.path.join(directory, "tutorials_data.json")
+    storage.SQLITE_FILE = os.path.join(directory, "diagnostics.db")
+    storage.FILES_DIR = os.path.join(directory, "records")
+    _drop_caches()
+
+
+def _seed(mode, data):
+    """Writes a generated dataset to the backing files of a storage mode."""
+    if mode in ("sqlite", "files"):
+        store = storage._document_store()
+        for table, records in data.items():
+            store.put_many(table, records)
+        return
+    fileio.atomic_write_json(storage.DATA_FILE, data["requests"])
+    fileio.atomic_write_json(storage.USERS_FILE, data["users"])
+    fileio.atomic_write_json(storage.TUTORIALS_FILE, data["tutorials"])
+
+
+def bench_mode(data, repeat, rng):
+    """
+    Times the storage API against the currently configured, seeded storage mode.
+
+    Returns:
+        dict: Operation name -> summary of its per-call durations.
+    """
+    request_ids = list(data["requests"])
+    emails = list(data["users"])
+    results = {}
+
+    _drop_caches()
+    results["get_all_requests_cold"] = _summary(_time(storage.get_all_requests, [()]))
+    results["get_all_requests_warm"] = _summary(
+        _time(storage.get_all_requests, [()] * repeat)
+    )
+    lookups = [(rng.choice(request_ids),) for _ in range(max(repeat, 1000))]
+    results["get_request"] = _summary(_time(storage.get_request, lookups))
+    results["get_user_requests"] = _summary(
+        _time(storage.get_user_requests, [(rng.choice(emails),) for _ in range(repeat)])
+    )
+    results["update_request_response"] = _summary(_time(
+        storage.update_request_response,
+        [(rng.choice(request_ids), datagen.RESPONSE) for _ in range(repeat)],
+    ))
+    new_requests = []
+    for _ in range(repeat):
+        _, record = datagen.make_request(rng, rng.choice(emails), 0)
+        for field in ("request_id", "timestamp", "timestamp_ms", "status", "response"):
+            record.pop(field, None)
+        new_requests.append((record,))
+    results["create_request"] = _summary(_time(storage.create_request, new_requests))
+    results["verify_user"] = _summary(_time(
+        storage.verify_user,
+        [(rng.choice(emails), datagen.PASSWORD) for _ in range(min(repeat, 5))],
+    ))
+    return results
+
+
+def bench_durability(data, repeat, rng, durabilities):
+    """
+    Times the writes of the currently configured, seeded storage mode with
+    every store set to each durability mode in turn.
+
+    Returns:
+        dict: "<operation>@<durability>" -> summary of its per-call durations.
+    """
+    request_ids = list(data["requests"])
+    emails = list(data["users"])
+    saved = dict(storage.DURABILITY)
+    results = {}
+    try:
+        for durability in durabilities:
+            for store in storage.DURABILITY:
+                storage.DURABILITY[store] = durability
+            results[f"update_request_response@{durability}"] = _summary(_time(
+                storage.update_request_response,
+                [(rng.choice(request_ids), datagen.RESPONSE) for _ in range(repeat)],
+            ))
+            results[f"update_user_status@{durability}"] = _summary(_time(
+                storage.update_user_status,
+                [(rng.choice(emails), rng.choice(["active", "paused"])) for _ in range(repeat)],
+            ))
+    finally:
+        storage.DURABILITY.update(saved)
+    return results
+
+
+def run(sizes=DEFAULT_SIZES, modes=DEFAULT_MODES, repeat=20, seed=0, durabilities=DEFAULT_DURABILITY):
+    """
+    Runs the benchmark matrix.
+
+    Args:
+        sizes (list): Numbers of diagnostic requests to seed.
+        modes (list): Storage modes to benchmark.
+        repeat (int): Calls per timed operation (writes included).
+        seed (int): Seed for data generation and key selection.
+        durabilities (list): Durability modes to time the writes under.
+
+    Returns:
+        dict: {"meta": {...}, "results": [{"mode", "size", "op", ...summary}]}
+    """
+    password_hash, salt = storage._hash_password(datagen.PASSWORD)
+    results = []
+    for size in sizes:
+        data = datagen.generate(size, password_hash, salt, seed=seed)
+        for mode in modes:
+            with tempfile.TemporaryDirectory(prefix="bench-storage-") as directory:
+                _configure(directory, mode)
+                _seed(mode, data)
+                timings = bench_mode(data, repeat, random.Random(seed))
+                timings.update(bench_durability(data, repeat, random.Random(seed), durabilities))
+                _drop_caches()
+            for op, summary in timings.items():
+                results.append({"mode": mode, "size": size, "op": op, **summary})
+                print(
+                    f"{mode:8} {size:>9,} {op:34} "
+                    f"median {summary['median_ms']:10.3f} ms  p95 {summary['p95_ms']:10.3f} ms",
+                    flush=True,
+                )
+    return {"meta": _meta(sizes, modes, repeat, seed, durabilities), "results": results}
+
+
+def _meta(sizes, modes, repeat, seed, durabilities):
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sizes": list(sizes),
+        "modes": list(modes),
+        "repeat": repeat,
+        "seed": seed,
+        "durability": dict(storage.DURABILITY),
+        "durability_modes": list(durabilities),
+    }
+
+
+def compare(current, baseline):
+    """
+    Compares the median of every (mode, size, op) with a baseline run.
+
+    Returns:
+        list: (mode, size, op, baseline_ms, current_ms, ratio) tuples for
+            operations slower than REGRESSION_FACTOR times the baseline.
+    """
+    before = {(r["mode"], r["size"], r["op"]): r["median_ms"] for r in baseline["results"]}
+    regressions = []
+    for r in current["results"]:
+        old = before.get((r["mode"], r["size"], r["op"]))
+        if old and r["median_ms"] > old * REGRESSION_FACTOR:
+            regressions.append(
+                (r["mode"], r["size"], r["op"], old, r["median_ms"], r["median_ms"] / old)
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--modes", nargs="+", default=DEFAULT_MODES, choices=DEFAULT_MODES)
+    parser.add_argument(
+        "--durability", nargs="*", default=DEFAULT_DURABILITY, choices=DEFAULT_DURABILITY,
+        help="Durability modes to time the writes under (none to skip)",
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/storage-<time>.json)")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.modes, args.repeat, args.seed, args.durability)
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"storage-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f))
+        for mode, size, op, old, new, ratio in regressions:
+            print(f"REGRESSION {mode} {size:,} {op}: {old:.3f} ms -> {new:.3f} ms ({ratio:.2f}x)")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+Synthetic request, user and tutorial records shaped like the ones app.py
+stores, for benchmarking the storage layer at realistic record sizes.
+"""
+import random
+
+from src import ids
+from src.vehicles import get_catalog
+
+# Vehicles are drawn from the same catalog the submission form offers
+_CATALOG = get_catalog()
+VEHICLES = {make: _CATALOG.models(make) for make in _CATALOG.makes()}
+MAKES = sorted(VEHICLES)
+
+# Boolean flags of every symptom category, in the order app.py collects them
+SYMPTOM_FLAGS = {
+    "power": [
+        "loss_of_power", "intermittent_power_loss", "power_surges",
+        "increased_power", "hesitation_lag", "no_change",
+    ],
+    "tactile": [
+        "vibration", "rough_engine", "pulling_to_side", "shaking",
+        "jerking", "hunting", "stiff_controls", "no_change",
+    ],
+    "audible": [
+        "rattling", "knocking", "grinding", "squealing",
+        "humming", "clicking", "no_change",
+    ],
+    "fuel": [
+        "increased_consumption", "fuel_smell", "decreased_mileage",
+        "fuel_leak", "difficulty_starting", "stalling", "no_change",
+    ],
+    "visual": [
+        "white_smoke", "black_smoke", "blue_smoke", "warning_lights",
+        "fluid_leak", "corrosion", "no_change",
+    ],
+    "temperature": [
+        "overheating", "running_hot", "running_cold", "ac_issues",
+        "heater_issues", "no_change",
+    ],
+}
+
+ENGINE_TYPES = ["2", "3", "4", "5", "6", "8", "10", "11", "12", "Rotary"]
+TRANSMISSIONS = ["Automatic", "Manual", "CVT", "Semi-Automatic", "Unknown"]
+FUEL_TYPES = ["Petrol/Unleaded", "Diesel", "Hybrid", "Bio-Diesel", "Alcohol (E85/Methanol)"]
+OCCUPATIONS = ["Mechanic", "Teacher", "Nurse", "Engineer", "Student", "Retired"]
+MEDIUMS = ["Video", "Images", "Text/Instructions", "Whatever is most useful"]
+OBD_CODES = ["P0300", "P0420", "P0171", "P0128", "P0442", "P0101", "P0700"]
+
+DETAILS = (
+    "The noise only happens when accelerating above 60km/h and gets worse "
+    "once the engine is warm. The check engine light came on last week."
+)
+RESPONSE = (
+    "Step 1: Check the ignition coils for cracks.\n"
+    "Step 2: Swap coil packs between cylinders and re-read the misfire counters.\n"
+    "Step 3: If the misfire follows the coil, replace it."
+)
+
+# Every synthetic user shares this password so verify_user can be timed
+PASSWORD = "Benchmark1"
+
+# Records are spread over this many days before `now_ms`
+SPAN_DAYS = 365
+
+
+def _symptoms(rng):
+    symptoms = {}
+    for category, flags in SYMPTOM_FLAGS.items():
+        values = {flag: rng.random() < 0.15 for flag in flags}
+        if not any(values.values()):
+            values["no_change"] = True
+        values["other"] = "Intermittent, hard to reproduce" if rng.random() < 0.05 else ""
+        symptoms[category] = values
+    if all(not v or k == "no_change" for c in SYMPTOM_FLAGS for k, v in symptoms[c].items()):
+        # The form rejects 'No change' everywhere; report at least one symptom
+        category = rng.choice(list(SYMPTOM_FLAGS))
+        symptoms[category]["no_change"] = False
+        symptoms[category][SYMPTOM_FLAGS[category][0]] = True
+    symptoms["additional_details"] = DETAILS if rng.random() < 0.7 else ""
+    return symptoms
+
+
+def make_user(index, password_hash, salt, created_ms):
+    """Returns (email, record) for a synthetic member account."""
+    email = f"member{index}@example.com"
+    return email, {
+        "email": email,
+        "name": f"Member {index}",
+        "dob": "1985-06-15",
+        "occupation": OCCUPATIONS[index % len(OCCUPATIONS)],
+        "password_hash": password_hash,
+        "salt": salt,
+        "status": "paused" if index % 25 == 0 else "active",
+        "created_at": ids.format_timestamp(created_ms),
+    }
+
+
+def make_request(rng, user_email, created_ms):
+    """Returns (request_id, record) for a synthetic diagnostic request."""
+    make = rng.choice(MAKES)
+    request_id = ids.uuid7(created_ms)
+    record = {
+        "make": make,
+        "model": rng.choice(VEHICLES[make]),
+        "year": rng.randint(1995, 2025),
+        "mileage": rng.randrange(0, 300000, 1000),
+        "vin": "",
+        "engine_type": rng.choice(ENGINE_TYPES),
+        "engine_capacity": f"{rng.choice([1.5, 2.0, 2.4, 3.0, 3.5])}L",
+        "engine_code": "",
+        "transmission_type": rng.choice(TRANSMISSIONS),
+        "fuel_type": rng.choice(FUEL_TYPES),
+        "last_service_date": "",
+        "symptoms": _symptoms(rng),
+        "obd_codes": rng.choice(OBD_CODES) if rng.random() < 0.4 else "",
+        "has_files": False,
+        "user_email": user_email,
+        "request_id": request_id,
+        "timestamp": ids.format_timestamp(created_ms),
+        "timestamp_ms": created_ms,
+        "status": "pending",
+        "response": None,
+    }
+    if rng.random() < 0.6:
+        record["status"] = "completed"
+        record["response"] = RESPONSE
+        record["response_timestamp"] = ids.format_timestamp(created_ms + 86_400_000)
+    return request_id, record
+
+
+def make_tutorial(rng, user_email, created_ms):
+    """Returns (request_id, record) for a synthetic tutorial request."""
+    make = rng.choice(MAKES)
+    request_id = ids.uuid7(created_ms)
+    return request_id, {
+        "make": make,
+        "model": rng.choice(VEHICLES[make]),
+        "year": rng.randint(1995, 2025),
+        "description": "How to replace the cabin air filter",
+        "medium": rng.choice(MEDIUMS),
+        "user_email": user_email,
+        "request_id": request_id,
+        "timestamp": ids.format_timestamp(created_ms),
+        "timestamp_ms": created_ms,
+        "status": "pending",
+        "response": None,
+    }
+
+
+def generate(size, password_hash, salt, seed=0, now_ms=None):
+    """
+    Generates a dataset of `size` diagnostic requests, one member per 20
+    requests (at least 10) and one tutorial request per 10.
+
+    Records are created in timestamp order over the SPAN_DAYS before
+    `now_ms`, so their UUIDv7 IDs are time-ordered as in production.
+
+    Args:
+        size (int): Number of diagnostic requests.
+        password_hash (str): PBKDF2 hash of PASSWORD shared by every member.
+        salt (str): Salt used to produce `password_hash`.
+        seed (int): Seed for the random generator.
+        now_ms (int): End of the time span (defaults to now).
+
+    Returns:
+        dict: {"requests": {...}, "users": {...}, "tutorials": {...}}
+    """
+    rng = random.Random(seed)
+    now_ms = ids.now_ms() if now_ms is None else now_ms
+    start_ms = now_ms - SPAN_DAYS * 86_400_000
+
+    def times(count):
+        return sorted(rng.randrange(start_ms, now_ms) for _ in range(count))
+
+    user_count = max(10, size // 20)
+    users = dict(
+        make_user(i, password_hash, salt, ms) for i, ms in enumerate(times(user_count))
+    )
+    emails = list(users)
+    # One timeline for both request kinds keeps the IDs in creation order
+    timeline = sorted(
+        [(ms, "requests") for ms in times(size)]
+        + [(ms, "tutorials") for ms in times(max(1, size // 10))]
+    )
+    data = {"requests": {}, "users": users, "tutorials": {}}
+    for ms, store in timeline:
+        factory = make_request if store == "requests" else make_tutorial
+        key, record = factory(rng, rng.choice(emails), ms)
+        data[store][key] = record
+    return data
@@ -0,0 +1,98 @@
+"""
+On-disk encodings of the data files.
+
+    pretty   indented JSON, as the files were originally written
+    json     minified JSON (the default), encoded and parsed with orjson
+             when it is installed
+    msgpack  MessagePack, when the msgpack package is installed; without it
+             files are written as "json"
+
+Decoding recognises the encoding from the first byte, so every file can be
+read whatever ENCODING is set to and switching encodings needs no
+migration: each file changes format the next time it is written (or at
+once with `python -m src.convert`).
+"""
+import json
+import os
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the json module
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional: "msgpack" falls back to "json"
+    msgpack = None
+
+ENCODINGS = ("pretty", "json", "msgpack")
+
+ENCODING = os.getenv("DIAGNOSTICS_DATA_ENCODING", "json")
+
+# First bytes of a MessagePack map; JSON documents start with '{' or whitespace.
+_MSGPACK_MAP = frozenset(range(0x80, 0x90)) | {0xde, 0xdf}
+
+
+def resolve(encoding=None):
+    """
+    Returns the encoding files are actually written in for `encoding`
+    (default: ENCODING), i.e. "json" for "msgpack" when msgpack is missing.
+
+    Raises:
+        ValueError: If `encoding` is not one of ENCODINGS.
+    """
+    encoding = encoding or ENCODING
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown encoding {encoding!r}; expected one of {', '.join(ENCODINGS)}")
+    if encoding == "msgpack" and msgpack is None:
+        return "json"
+    return encoding
+
+
+def dumps(obj):
+    """Serialises `obj` as minified JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def loads(payload):
+    """Parses JSON from bytes or str."""
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+def encode(data, encoding=None):
+    """Serialises `data` in `encoding` (default: ENCODING). Returns bytes."""
+    encoding = resolve(encoding)
+    if encoding == "msgpack":
+        return msgpack.packb(data, use_bin_type=True)
+    if encoding == "pretty":
+        return json.dumps(data, indent=4).encode("utf-8")
+    return dumps(data)
+
+
+def decode(payload):
+    """
+    Parses a file's contents in whichever encoding it was written.
+
+    Raises:
+        json.JSONDecodeError: If the payload cannot be parsed, whatever its
+            encoding, so callers handle every parse error alike.
+    """
+    if payload[:1] and payload[0] in _MSGPACK_MAP:
+        if msgpack is None:
+            raise json.JSONDecodeError("MessagePack data needs the msgpack package", "", 0)
+        try:
+            return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+        except ValueError as e:
+            raise json.JSONDecodeError(f"Invalid MessagePack data: {e}", "", 0) from e
+    return loads(payload)
+
+
+def detect(payload):
+    """Returns the encoding a file's contents were written in ("pretty" or "json" by layout)."""
+    if payload[:1] and payload[0] in _MSGPACK_MAP:
+        return "msgpack"
+    return "pretty" if b"\n" in payload[:4096] else "json"
@@ -0,0 +1,66 @@
+"""
+Rewrites data files in another encoding (see src/codec.py).
+
+    python -m src.convert --to json                 # the configured data files
+    python -m src.convert --to pretty diagnostics_data.json
+
+Files are rewritten in place under their writer lock, so the app can keep
+running. Readers accept every encoding, so converting is never required;
+it just avoids waiting for each file's next write. Set
+DIAGNOSTICS_DATA_ENCODING to the same encoding, or the next write switches
+the file back.
+"""
+import argparse
+import json
+import os
+import sys
+
+from src import codec, fileio, storage
+
+
+def convert_file(path, encoding, durability="fsync-dir"):
+    """
+    Rewrites one data file in `encoding`.
+
+    Returns:
+        tuple(str, int, int): The encoding the file was in, and its size in
+            bytes before and after.
+    """
+    with fileio.writer_lock(path):
+        with open(path, "rb") as f:
+            payload = f.read()
+        before = codec.detect(payload)
+        fileio.atomic_write_json(path, codec.decode(payload), durability, encoding)
+    return before, len(payload), os.path.getsize(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rewrites data files in another encoding.")
+    parser.add_argument("--to", dest="encoding", required=True, choices=codec.ENCODINGS)
+    parser.add_argument(
+        "files", nargs="*",
+        help="Files to convert (default: the configured requests, users and tutorials files)",
+    )
+    args = parser.parse_args(argv)
+
+    encoding = codec.resolve(args.encoding)
+    if encoding != args.encoding:
+        print(f"{args.encoding} is not installed; writing {encoding} instead.", file=sys.stderr)
+    paths = args.files or [storage.DATA_FILE, storage.USERS_FILE, storage.TUTORIALS_FILE]
+    failed = False
+    for path in paths:
+        if not os.path.exists(path):
+            print(f"{path}: skipped (does not exist)")
+            continue
+        try:
+            before, old_size, new_size = convert_file(path, encoding)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"{path}: failed ({e})", file=sys.stderr)
+            failed = True
+            continue
+        print(f"{path}: {before} -> {encoding}, {old_size:,} -> {new_size:,} bytes")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
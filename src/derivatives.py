@@ -0,0 +1,204 @@
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src import fileio
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # optional: without Pillow, images are shown as uploaded
+    Image = None
+
+# Derivatives made of every image attachment: name -> longest side in pixels
+SIZES = {"thumb": 320, "preview": 1600}
+JPEG_QUALITY = 85
+# Images rendered concurrently; Pillow releases the GIL while decoding and resizing
+MAX_WORKERS = int(os.getenv("DIAGNOSTICS_DERIVATIVE_WORKERS", "2"))
+# Attempts per job, and the delay before the first retry (doubled after each failure)
+MAX_ATTEMPTS = int(os.getenv("DIAGNOSTICS_DERIVATIVE_ATTEMPTS", "3"))
+RETRY_SECONDS = float(os.getenv("DIAGNOSTICS_DERIVATIVE_RETRY_SECONDS", "5"))
+
+
+def supported(entry):
+    """Returns True if derivatives can be made of a request's file entry."""
+    return Image is not None and (entry.get("type") or "").startswith("image/")
+
+
+def render(path, max_side, quality=JPEG_QUALITY):
+    """
+    Renders an image file as a JPEG whose longest side is at most `max_side`.
+
+    JPEGs are decoded at a reduced scale where possible (draft mode), so a
+    phone photo is never fully decoded to make a thumbnail of it. EXIF
+    orientation is applied, since the output carries no EXIF.
+
+    Returns:
+        bytes: The encoded JPEG.
+
+    Raises:
+        OSError: If the file is not an image Pillow can read.
+    """
+    with Image.open(path) as image:
+        image.draft("RGB", (max_side, max_side))
+        image = ImageOps.exif_transpose(image)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        image.thumbnail((max_side, max_side))
+        out = io.BytesIO()
+        image.save(out, "JPEG", quality=quality, optimize=True)
+        return out.getvalue()
+
+
+class JobQueue:
+    """
+    Derivative jobs waiting to be done, persisted in one small file so jobs
+    queued before a restart are picked up again.
+
+    Jobs are keyed "<request_id>:<sha256>" and hold the request, the digest
+    of the original, the attempts made so far and the last error. A job is
+    removed once it succeeds or runs out of attempts.
+    """
+
+    def __init__(self, path, durability="none"):
+        self.path = path
+        self.durability = durability
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            return fileio.read_json(self.path)
+        except FileNotFoundError:
+            return {}
+
+    def _change(self, apply):
+        with self._lock, fileio.writer_lock(self.path):
+            jobs = self._read()
+            result = apply(jobs)
+            fileio.atomic_write_json(self.path, jobs, self.durability)
+            return result
+
+    def add(self, request_id, digest):
+        """Queues a job. Returns its key."""
+        key = f"{request_id}:{digest}"
+        self._change(lambda jobs: jobs.setdefault(
+            key, {"request_id": request_id, "sha256": digest, "attempts": 0, "error": None},
+        ))
+        return key
+
+    def get(self, key):
+        return self._read().get(key)
+
+    def all(self):
+        """Returns every queued job as {key: job}."""
+        return self._read()
+
+    def failed(self, key, error):
+        """Records a failed attempt. Returns the number of attempts made."""
+        def apply(jobs):
+            job = jobs.get(key)
+            if job is None:
+                return MAX_ATTEMPTS
+            job["attempts"] += 1
+            job["error"] = error
+            return job["attempts"]
+        return self._change(apply)
+
+    def remove(self, key):
+        self._change(lambda jobs: jobs.pop(key, None))
+
+
+class DerivativePipeline:
+    """
+    Worker pool that makes thumbnails and previews of image attachments.
+
+    Each job renders every size in SIZES from the stored original and puts
+    the results in the same MediaStore, so they are content-addressed and
+    served like any other media file. `on_status(request_id, digest, status)`
+    is called with the status to record on the request's file entry:
+    {"status": "pending" | "ready" | "failed", "attempts": n, ...} plus a
+    {sha256, size, type} entry per size once ready, or "error" on failure.
+    Failed jobs are retried after RETRY_SECONDS, doubling each time, up to
+    MAX_ATTEMPTS attempts.
+    """
+
+    def __init__(self, store, jobs, on_status, max_workers=MAX_WORKERS):
+        self.store = store
+        self.jobs = jobs
+        self.on_status = on_status
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="derivatives")
+        self._active = 0
+        self._idle = threading.Condition()
+
+    def enqueue(self, request_id, digest):
+        """Persists a job for one image and schedules it."""
+        self._submit(self.jobs.add(request_id, digest))
+
+    def resume(self):
+        """Schedules every job left in the queue, e.g. by a previous process."""
+        for key in self.jobs.all():
+            self._submit(key)
+
+    def wait(self, timeout=None):
+        """
+        Blocks until no job is running or waiting for a retry.
+
+        Returns:
+            bool: False if the timeout passed first.
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._active == 0, timeout)
+
+    def _submit(self, key, delay=0):
+        with self._idle:
+            self._active += 1
+        if delay:
+            timer = threading.Timer(delay, self._executor.submit, (self._run, key))
+            timer.daemon = True
+            timer.start()
+        else:
+            self._executor.submit(self._run, key)
+
+    def _done(self):
+        with self._idle:
+            self._active -= 1
+            self._idle.notify_all()
+
+    def _run(self, key):
+        try:
+            job = self.jobs.get(key)
+            if job is None:
+                return
+            request_id, digest = job["request_id"], job["sha256"]
+            try:
+                derived = {name: self._derive(digest, side) for name, side in SIZES.items()}
+            except Exception as e:
+                # Pillow raises OSError for unreadable files but other types for
+                # e.g. decompression bombs; every failure is worth a retry.
+                error = str(e) or type(e).__name__
+                attempts = self.jobs.failed(key, error)
+                if attempts < MAX_ATTEMPTS:
+                    self.on_status(request_id, digest, {
+                        "status": "pending", "attempts": attempts, "error": error,
+                    })
+                    self._submit(key, RETRY_SECONDS * 2 ** (attempts - 1))
+                else:
+                    self.on_status(request_id, digest, {
+                        "status": "failed", "attempts": attempts, "error": error,
+                    })
+                    self.jobs.remove(key)
+                return
+            self.on_status(request_id, digest, {
+                "status": "ready", "attempts": job["attempts"] + 1, **derived,
+            })
+            self.jobs.remove(key)
+        finally:
+            self._done()
+
+    def _derive(self, digest, side):
+        payload = render(self.store.path(digest), side)
+        derived, size, _ = self.store.put(io.BytesIO(payload))
+        return {"sha256": derived, "size": size, "type": "image/jpeg"}
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,121 @@
+import json
+
+from src import fileio
+
+
+class UnreadableFileError(Exception):
+    """Raised when saving over a data file that exists but could not be parsed."""
+
+    def __init__(self, path):
+        self.path = path
+        super().__init__(
+            f"{path} could not be read; refusing to overwrite it. Repair or move it aside first."
+        )
+
+
+class CachedJSONFile:
+    """
+    In-memory copy of a JSON file, revalidated against the file signature
+    (inode, mtime, size) on every load so replacements by other processes are
+    always noticed, and dropped whenever the configured path changes.
+
+    Keeps hit/miss counters so the effect of the cache can be observed.
+    """
+
+    def __init__(self):
+        self.path = None
+        self.data = None
+        self.signature = None
+        # Signature of the bound file when it last failed to parse with no
+        # good copy cached; save() will not replace that file
+        self.unreadable = None
+        self.hits = 0
+        self.misses = 0
+
+    def bind(self, path):
+        """
+        Points the cache at `path`, dropping the cached copy if it was bound
+        to a different file.
+
+        Returns:
+            bool: True if the path changed.
+        """
+        if path == self.path:
+            return False
+        self.invalidate()
+        self.path = path
+        return True
+
+    def invalidate(self):
+        """Forgets the cached copy so the next load re-reads the file."""
+        self.data = None
+        self.signature = None
+        self.unreadable = None
+
+    def load(self, path):
+        """
+        Returns the parsed contents of `path`, re-reading it only when its
+        signature changed. A missing file loads as an empty dict.
+
+        A file that fails to parse keeps serving the last good copy rather
+        than an empty store. Without one it loads as an empty dict, but
+        save() refuses to overwrite the file until it parses again, so a
+        damaged file is never replaced by a store that only holds the
+        records written since.
+        """
+        self.bind(path)
+        signature = fileio.file_signature(path)
+        if signature is None:
+            self.replace({}, None)
+            return self.data
+
+        if self.data is not None and self.signature == signature:
+            self.hits += 1
+            return self.data
+
+        try:
+            self.replace(fileio.read_json(path), signature)
+        except (json.JSONDecodeError, OSError):
+            if self.data is not None:
+                return self.data
+            self.unreadable = signature
+            return {}
+        return self.data
+
+    def replace(self, data, signature):
+        """Installs a freshly read copy of the file, counting it as a miss."""
+        self.misses += 1
+        self.data = data
+        self.signature = signature
+        self.unreadable = None
+
+    def save(self, path, data, durability="none"):
+        """
+        Atomically writes `data` to `path` and caches it as the current copy.
+
+        Raises:
+            UnreadableFileError: If `path` is the file that last failed to
+                parse and it has not changed since.
+        """
+        if (self.unreadable is not None and path == self.path
+                and fileio.file_signature(path) == self.unreadable):
+            raise UnreadableFileError(path)
+        fileio.atomic_write_json(path, data, durability)
+        self.bind(path)
+        self.data = data
+        self.signature = fileio.file_signature(path)
+        self.unreadable = None
+
+    def stats(self):
+        """
+        Returns the cache counters.
+
+        Returns:
+            dict: hits, misses and hit_rate (0.0 before the first load).
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
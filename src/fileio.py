@@ -0,0 +1,157 @@
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+from src import codec
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to unlocked writes
+    fcntl = None
+
+# How often a reader re-reads a file that fails to parse before giving up.
+READ_RETRIES = 3
+READ_RETRY_DELAY = 0.01
+
+# How hard a write works to survive a crash, weakest first:
+#   none      - no flush or sync; the data reaches the OS when the file is closed
+#   flush     - flushes the file to the OS before returning, so it survives a
+#               crash of the process but not a power loss
+#   fsync     - also fsyncs the file, so its contents survive a power loss
+#   fsync-dir - also fsyncs the directory after a file is created or renamed
+#               into place, so the new directory entry survives a power loss too
+DURABILITY_MODES = ("none", "flush", "fsync", "fsync-dir")
+
+
+def file_signature(path):
+    """
+    Returns an (inode, mtime_ns, size) tuple identifying the current version of
+    a file, or None if it does not exist. Atomic replacement always changes the
+    inode, so two writes within the same mtime tick are still told apart.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+@contextmanager
+def writer_lock(path, shared=False):
+    """
+    Holds an exclusive advisory lock on `path + '.lock'` for the duration of a
+    read-modify-write. Only writers take the lock; readers rely on atomic
+    replacement and never block.
+
+    With shared=True the lock is taken in shared mode: any number of shared
+    holders proceed together, while an exclusive holder waits for all of
+    them (used by appenders that must not overlap a file rewrite).
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(path + ".lock", "a") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def check_durability(durability):
+    """
+    Raises:
+        ValueError: If `durability` is not one of DURABILITY_MODES.
+    """
+    if durability not in DURABILITY_MODES:
+        raise ValueError(
+            f"Unknown durability mode {durability!r}; expected one of {', '.join(DURABILITY_MODES)}"
+        )
+
+
+def sync_file(f, durability):
+    """Flushes and/or fsyncs an open file as `durability` requires."""
+    check_durability(durability)
+    if durability == "none":
+        return
+    f.flush()
+    if durability != "flush":
+        os.fsync(f.fileno())
+
+
+def sync_directory(directory, durability="fsync-dir"):
+    """Fsyncs a directory, making entries created or renamed in it durable, if `durability` asks for it."""
+    if durability != "fsync-dir" or os.name == "nt":
+        # Windows cannot open a directory to fsync it
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write_bytes(path, payload, durability="none"):
+    """
+    Writes `payload` to a temporary file next to `path` and renames it into place.
+
+    Args:
+        durability (str): One of DURABILITY_MODES. The temporary file is
+            synced before the rename, and with "fsync-dir" the directory
+            after it.
+    """
+    check_durability(durability)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+            sync_file(f, durability)
+        try:
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+        except OSError:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    sync_directory(directory, durability)
+
+
+def atomic_write_json(path, data, durability="none", encoding=None):
+    """
+    Serialises `data` and atomically replaces `path` with it.
+
+    Args:
+        encoding (str): One of codec.ENCODINGS (default: codec.ENCODING).
+    """
+    atomic_write_bytes(path, codec.encode(data, encoding), durability)
+
+
+def read_json(path):
+    """
+    Reads a data file in any of codec.ENCODINGS, retrying briefly if it
+    fails to parse.
+
+    A parse error can only come from a file written in place by an older
+    writer that is still in progress, so a short retry usually succeeds.
+
+    Raises:
+        json.JSONDecodeError: If the file is still unreadable after the retries.
+        OSError: If the file cannot be opened.
+    """
+    for attempt in range(READ_RETRIES):
+        try:
+            with open(path, 'rb') as f:
+                return codec.decode(f.read())
+        except json.JSONDecodeError:
+            if attempt == READ_RETRIES - 1:
+                raise
+            time.sleep(READ_RETRY_DELAY * (attempt + 1))
@@ -0,0 +1,243 @@
+import hashlib
+import os
+import threading
+from urllib.parse import quote
+
+from src import codec, fileio, journal
+from src.ids import record_ms
+from src.versions import VersionConflictError, version_of
+
+# Record fields copied into a store's index: enough to list, count, page and
+# queue records, and to count symptoms per vehicle, without opening their files.
+INDEX_FIELDS = (
+    "status", "user_email", "email", "sla_deadline_ms", "claimed_by", "lease_expires_ms",
+    "symptom_mask", "make", "model", "year",
+)
+
+# The index log is rewritten with one entry per live record once it holds
+# more than this many entries and at least twice as many as there are records.
+INDEX_COMPACT_MIN_ENTRIES = 4096
+
+
+def _stub(record):
+    """Returns the index entry for a record: its INDEX_FIELDS plus timestamp_ms."""
+    stub = {field: record[field] for field in INDEX_FIELDS if record.get(field) is not None}
+    stub["timestamp_ms"] = record_ms(record)
+    return stub
+
+
+class FileStore:
+    """
+    Document store that keeps every record in its own small JSON file.
+
+    Records live at <root>/<table>/<shard>/<key>.json, where the shard is the
+    first two hex digits of the SHA-1 of the key. Hashing spreads records
+    evenly even though UUIDv7 IDs share their time prefix. Writes to one
+    shard are serialised by a lock on that shard only.
+
+    Each table also has an append-only index log, <root>/<table>/index.jsonl,
+    in the journal format. Every write appends the record's compact index
+    entry (see INDEX_FIELDS). A process replays only the entries appended
+    since its last read, so listing, counting and paging never open the
+    record files. Creating or updating a record writes one small file and
+    appends one index line, whatever the size of the store.
+
+    `durability` maps table names to one of fileio.DURABILITY_MODES
+    ("none" for tables it does not list); record files, index appends and
+    new directories are synced accordingly.
+    """
+
+    def __init__(self, root, durability=None):
+        self.root = root
+        self.durability = durability if durability is not None else {}
+        self._lock = threading.Lock()
+        # table -> [stubs dict, byte offset, log inode, entries replayed]
+        self._indexes = {}
+
+    # -- paths --------------------------------------------------------------
+
+    def record_path(self, table, key):
+        """Returns the file that holds the record stored under `key`."""
+        shard = hashlib.sha1(key.encode("utf-8")).hexdigest()[:2]
+        return os.path.join(self.root, table, shard, quote(key, safe="@.-_") + ".json")
+
+    def index_path(self, table):
+        """Returns the index log of a table."""
+        return os.path.join(self.root, table, "index.jsonl")
+
+    # -- reads --------------------------------------------------------------
+
+    def get(self, table, key):
+        """Returns the record stored under `key`, or None."""
+        try:
+            return fileio.read_json(self.record_path(table, key))
+        except FileNotFoundError:
+            return None
+
+    def all(self, table):
+        """Returns every record of the table as an {id: record} dict in insertion order."""
+        stubs, _ = self.sync(table)
+        with self._lock:
+            keys = list(stubs)
+        records = {}
+        for key in keys:
+            record = self.get(table, key)
+            if record is not None:
+                records[key] = record
+        return records
+
+    def sync(self, table, on_change=None):
+        """
+        Applies the index entries appended since the last call.
+
+        A log replaced by a compaction (new inode) is replayed from the start
+        into a fresh dict, so callers can tell by identity that it was rebuilt.
+
+        Args:
+            on_change (callable): Called as on_change(stubs, key) for every
+                key whose index entry changed, while the index is locked.
+
+        Returns:
+            tuple(dict, list): The {key: index entry} dict and the changed keys.
+        """
+        path = self.index_path(table)
+        with self._lock:
+            state = self._indexes.get(table)
+            signature = fileio.file_signature(path)
+            inode = signature[0] if signature else None
+            if state is None or inode != state[2]:
+                state = self._indexes[table] = [{}, 0, inode, 0]
+            stubs = state[0]
+            state[1], applied = journal.replay(path, stubs, state[1])
+            state[3] += len(applied)
+            if on_change is not None:
+                for key in applied:
+                    on_change(stubs, key)
+            return stubs, applied
+
+    # -- writes -------------------------------------------------------------
+
+    def put(self, table, key, record):
+        """Creates or replaces a record, giving it the next version number."""
+        path = self.record_path(table, key)
+        with self._shard_lock(table, path):
+            previous = self.get(table, key)
+            record['version'] = (version_of(previous) if previous is not None else 0) + 1
+            self._write(table, key, path, record)
+
+    def insert(self, table, key, record):
+        """
+        Creates a record at version 1 unless its key is taken. The check and
+        the write run under the shard lock, which every writer of the key
+        holds, so two processes creating the same key cannot both succeed.
+
+        Returns:
+            bool: False if a record already exists under `key`.
+        """
+        path = self.record_path(table, key)
+        with self._shard_lock(table, path):
+            if os.path.exists(path):
+                return False
+            record['version'] = 1
+            self._write(table, key, path, record)
+        return True
+
+    def put_many(self, table, records):
+        """Writes every record of an {id: record} dict as is (used by migrations)."""
+        for key, record in records.items():
+            path = self.record_path(table, key)
+            with self._shard_lock(table, path):
+                self._write(table, key, path, record)
+
+    def update(self, table, key, apply, expected_version=None):
+        """
+        Applies `apply(record)` to an existing record under its shard lock.
+
+        Returns:
+            dict: The updated record, or None if the key does not exist.
+
+        Raises:
+            VersionConflictError: If the record is at another version than
+                `expected_version`.
+        """
+        path = self.record_path(table, key)
+        with self._shard_lock(table, path):
+            record = self.get(table, key)
+            if record is None:
+                return None
+            version = version_of(record)
+            if expected_version is not None and version != expected_version:
+                raise VersionConflictError(table, key, expected_version, version)
+            apply(record)
+            record['version'] = version + 1
+            self._write(table, key, path, record)
+        return record
+
+    def delete(self, table, key, expected_version=None):
+        """
+        Deletes a record. Returns True if it existed.
+
+        Raises:
+            VersionConflictError: If the record is at another version than
+                `expected_version`.
+        """
+        path = self.record_path(table, key)
+        with self._shard_lock(table, path):
+            record = self.get(table, key)
+            if record is None:
+                return False
+            if expected_version is not None and version_of(record) != expected_version:
+                raise VersionConflictError(table, key, expected_version, version_of(record))
+            os.remove(path)
+            fileio.sync_directory(os.path.dirname(path), self._durability(table))
+            self._append(table, key, None)
+        return True
+
+    def compact(self, table):
+        """Rewrites a table's index log with one entry per live record."""
+        path = self.index_path(table)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with fileio.writer_lock(path):
+            stubs, _ = self.sync(table)
+            with self._lock:
+                entries = list(stubs.items())
+            payload = b"".join(
+                codec.dumps({"op": "put", "key": key, "value": stub}) + b"\n" for key, stub in entries
+            )
+            fileio.atomic_write_bytes(path, payload, self._durability(table))
+
+    def _durability(self, table):
+        return self.durability.get(table, "none")
+
+    def _write(self, table, key, path, record):
+        fileio.atomic_write_bytes(path, codec.encode(record), self._durability(table))
+        self._append(table, key, _stub(record))
+
+    def _append(self, table, key, stub):
+        """
+        Appends a record's index entry (None for a deletion) to the index log,
+        compacting the log once it is mostly superseded entries.
+        """
+        index = self.index_path(table)
+        durability = self._durability(table)
+        # Shared, so appenders run concurrently but never while compact()
+        # rewrites the log.
+        with fileio.writer_lock(index, shared=True):
+            if stub is None:
+                journal.append_delete(index, key, durability)
+            else:
+                journal.append_record(index, key, stub, durability)
+        state = self._indexes.get(table)
+        if state is not None and state[3] > max(INDEX_COMPACT_MIN_ENTRIES, 2 * len(state[0])):
+            self.compact(table)
+            self._indexes.pop(table, None)
+
+    def _shard_lock(self, table, path):
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
+            # Make the new shard (and possibly table) directory entries durable
+            durability = self._durability(table)
+            fileio.sync_directory(os.path.dirname(directory), durability)
+            fileio.sync_directory(self.root, durability)
+        return fileio.writer_lock(directory)
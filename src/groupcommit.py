@@ -0,0 +1,123 @@
+import threading
+import time
+from concurrent.futures import Future, wait
+
+
+class GroupCommitWriter:
+    """
+    Background thread that turns many small writes into a few flushes.
+
+    submit(tag) records that the data identified by `tag` (for instance one
+    JSON file) has changed and returns a Future. The thread waits at most
+    `max_delay` seconds after the first submission of a batch, then calls
+    flush(tag) once per distinct tag in the batch and completes the batch's
+    futures with None, or with the exception flush raised. Submissions that
+    arrive while a batch is being written start the next batch.
+    """
+
+    def __init__(self, flush, max_delay, name="group-commit"):
+        self.max_delay = max_delay
+        self._flush = flush
+        self._cond = threading.Condition()
+        # tag -> futures of the batch being collected, and of the one being written
+        self._batch = {}
+        self._in_flight = {}
+        self._batch_started = None
+        self._urgent = False
+        self._closed = False
+        self.submitted = 0
+        self.flushes = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, tag):
+        """
+        Schedules a flush of `tag`.
+
+        Returns:
+            Future: Completes once a flush of `tag` that started after this
+                call has finished.
+
+        Raises:
+            RuntimeError: If the writer was closed.
+        """
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("The group-commit writer is closed.")
+            if not self._batch:
+                self._batch_started = time.monotonic()
+                self._cond.notify_all()
+            self._batch.setdefault(tag, []).append(future)
+            self.submitted += 1
+        return future
+
+    def flush(self, timeout=None):
+        """
+        Writes the pending batch now instead of at the end of its delay.
+
+        Returns:
+            bool: True if everything submitted before the call was flushed
+                within `timeout` seconds.
+        """
+        with self._cond:
+            futures = [f for batch in (self._in_flight, self._batch)
+                       for fs in batch.values() for f in fs]
+            if self._batch:
+                self._urgent = True
+                self._cond.notify_all()
+        _, not_done = wait(futures, timeout)
+        return not not_done
+
+    def close(self, timeout=None):
+        """Flushes what is pending and stops the thread; later submissions fail."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def stats(self):
+        """
+        Returns the writer counters.
+
+        Returns:
+            dict: submitted (writes handed to the writer), flushes (writes
+                actually performed) and pending (writes not flushed yet).
+        """
+        with self._cond:
+            return {
+                "submitted": self.submitted,
+                "flushes": self.flushes,
+                "pending": sum(len(fs) for fs in self._batch.values()),
+            }
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._batch and not self._closed:
+                    self._cond.wait()
+                if not self._batch:
+                    return
+                deadline = self._batch_started + self.max_delay
+                while not (self._urgent or self._closed):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._in_flight = self._batch
+                self._batch = {}
+                self._urgent = False
+
+            for tag, futures in batch.items():
+                try:
+                    self._flush(tag)
+                except Exception as e:
+                    for future in futures:
+                        future.set_exception(e)
+                else:
+                    for future in futures:
+                        future.set_result(None)
+
+            with self._cond:
+                self.flushes += len(batch)
+                self._in_flight = {}
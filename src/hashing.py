@@ -0,0 +1,113 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+# Concurrency cap: PBKDF2 runs in C with the GIL released, so a thread pool
+# keeps this many cores busy hashing while every other session keeps running.
+MAX_WORKERS = int(os.getenv("DIAGNOSTICS_HASH_WORKERS", str(os.cpu_count() or 2)))
+# Hashes allowed to wait for a worker before new ones are turned away
+MAX_QUEUED = int(os.getenv("DIAGNOSTICS_HASH_QUEUE", str(4 * MAX_WORKERS)))
+# Longest a caller waits for its hash before giving up (seconds)
+WAIT_TIMEOUT = float(os.getenv("DIAGNOSTICS_HASH_TIMEOUT", "10"))
+
+
+class HashingBusyError(Exception):
+    """Raised when the hashing pool is saturated and the caller should try again later."""
+
+
+class HashingService:
+    """
+    Bounded pool for PBKDF2-HMAC-SHA256 hashing.
+
+    At most `max_workers` hashes run at once and at most `max_queued` wait
+    behind them; anything beyond that is rejected immediately with
+    HashingBusyError, so a login burst degrades into fast "try again"
+    answers instead of ever-growing latency.
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, max_queued=MAX_QUEUED, timeout=WAIT_TIMEOUT):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="pbkdf2")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queued)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._running = 0
+        self._peak_queued = 0
+        self._completed = 0
+        self._rejected = 0
+        self._timed_out = 0
+
+    def pbkdf2(self, password, salt, iterations):
+        """
+        Returns the hex PBKDF2-HMAC-SHA256 digest of `password`.
+
+        Raises:
+            HashingBusyError: If the pool and its queue are full, or the hash
+                did not finish within the timeout.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise HashingBusyError("Password hashing is at capacity")
+        with self._lock:
+            self._in_flight += 1
+            self._peak_queued = max(self._peak_queued, self._in_flight - self._running)
+        future = self._executor.submit(self._run, password, salt, iterations)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # The hash keeps its slot until it finishes; only the caller gives up.
+            with self._lock:
+                self._timed_out += 1
+            raise HashingBusyError("Password hashing timed out") from None
+
+    def _run(self, password, salt, iterations):
+        with self._lock:
+            self._running += 1
+        try:
+            return hashlib.pbkdf2_hmac(
+                'sha256', password.encode('utf-8'), salt.encode('utf-8'), iterations
+            ).hex()
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._in_flight -= 1
+                self._completed += 1
+            self._slots.release()
+
+    def stats(self):
+        """
+        Returns the pool's load metrics.
+
+        Returns:
+            dict: workers, max_queued, running, queued (current queue depth),
+                peak_queued, completed, rejected and timed_out.
+        """
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_queued": self.max_queued,
+                "running": self._running,
+                "queued": self._in_flight - self._running,
+                "peak_queued": self._peak_queued,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+            }
+
+
+_SERVICE = None
+_SERVICE_LOCK = threading.Lock()
+
+
+def get_service():
+    """Returns the process-wide HashingService, starting it on first use."""
+    global _SERVICE
+    with _SERVICE_LOCK:
+        if _SERVICE is None:
+            _SERVICE = HashingService()
+        return _SERVICE
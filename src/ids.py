@@ -0,0 +1,98 @@
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+# Format of the human-readable 'timestamp' / 'created_at' fields
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_LOCK = threading.Lock()
+_last_ms = 0
+_last_seq = 0
+
+
+def now_ms():
+    """Returns the current Unix time in milliseconds."""
+    return time.time_ns() // 1_000_000
+
+
+def uuid7(timestamp_ms=None):
+    """
+    Returns a time-ordered UUIDv7 string (RFC 9562).
+
+    The first 48 bits are the Unix time in milliseconds, so IDs sort by
+    creation time. The 12-bit rand_a field counts up for IDs created in the
+    same millisecond by this process, which keeps them strictly increasing.
+
+    Args:
+        timestamp_ms (int): Creation time in milliseconds (defaults to now).
+
+    Returns:
+        str: The canonical hyphenated UUID.
+    """
+    global _last_ms, _last_seq
+    if timestamp_ms is None:
+        timestamp_ms = now_ms()
+    with _LOCK:
+        if timestamp_ms <= _last_ms:
+            _last_seq += 1
+            if _last_seq > 0xFFF:
+                # Counter exhausted: borrow the next millisecond
+                _last_ms += 1
+                _last_seq = 0
+            timestamp_ms = _last_ms
+        else:
+            _last_ms = timestamp_ms
+            # Start low in the range so a burst has room to count up
+            _last_seq = int.from_bytes(os.urandom(2), "big") & 0x3FF
+        seq = _last_seq
+    rand_b = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    value = (
+        (timestamp_ms & ((1 << 48) - 1)) << 80
+        | 0x7 << 76
+        | seq << 64
+        | 0b10 << 62
+        | rand_b
+    )
+    return str(uuid.UUID(int=value))
+
+
+def format_timestamp(timestamp_ms):
+    """Formats epoch milliseconds as a local-time TIMESTAMP_FORMAT string."""
+    return datetime.fromtimestamp(timestamp_ms / 1000).strftime(TIMESTAMP_FORMAT)
+
+
+def to_ms(value):
+    """
+    Converts a datetime, a TIMESTAMP_FORMAT string or epoch milliseconds to
+    epoch milliseconds. Naive datetimes and strings are taken as local time.
+
+    Raises:
+        ValueError: If a string is not in TIMESTAMP_FORMAT.
+    """
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1000)
+    if isinstance(value, str):
+        return int(datetime.strptime(value, TIMESTAMP_FORMAT).timestamp() * 1000)
+    return int(value)
+
+
+def record_ms(record):
+    """
+    Returns a record's creation time in epoch milliseconds.
+
+    Uses 'timestamp_ms' when present and otherwise parses the legacy
+    one-second 'timestamp' (or 'created_at') string; unparseable or missing
+    values sort first as 0.
+    """
+    value = record.get('timestamp_ms')
+    if value is not None:
+        return value
+    text = record.get('timestamp') or record.get('created_at')
+    if not text:
+        return 0
+    try:
+        return to_ms(text)
+    except ValueError:
+        return 0
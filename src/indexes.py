@@ -0,0 +1,171 @@
+import threading
+from bisect import bisect_left, insort
+
+from src.ids import record_ms
+
+# Facet holding every record, regardless of status or submitter
+ALL = "all"
+
+
+def _index_fields(record):
+    """Returns the (status, user_email, timestamp_ms) values a record is indexed under."""
+    user_email = record.get('user_email') or record.get('email') or ''
+    return record.get('status'), user_email.strip().lower(), record_ms(record)
+
+
+class RecordIndex:
+    """
+    Secondary indexes over a {key: record} dict: for every facet (all
+    records, each status and, unless by_user is False, each user_email) a
+    list of records sorted by submission time.
+
+    Entries are (timestamp_ms, seq, key) tuples, where seq is the order in
+    which a key was first filed, so records submitted within the same
+    millisecond keep their insertion order. The index remembers how each key was filed, so it
+    can be updated from the new record alone after an in-place change.
+
+    Updates come from the script threads, the background workers and journal
+    replay at once, so every method holds the index's lock, and readers get
+    lists of keys rather than views of the sorted lists.
+    """
+
+    def __init__(self, records=None, by_user=True):
+        self._by_user = by_user
+        self._entries = {}
+        self._orders = {}
+        self._status_counts = {}
+        self._next_seq = 0
+        self._lock = threading.RLock()
+        for key, record in list((records or {}).items()):
+            self.update(key, record)
+
+    def update(self, key, record):
+        """Re-files `key` after its record was created or changed; None removes it."""
+        with self._lock:
+            self._update(key, record)
+
+    def _update(self, key, record):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._count_status(old[0], -1)
+        if record is None:
+            if old is not None:
+                for facet in self._facets(old[0], old[1]):
+                    self._remove(facet, old[2])
+            return
+
+        status, email, timestamp = _index_fields(record)
+        if old is None:
+            sort_key = (timestamp, self._next_seq, key)
+            self._next_seq += 1
+            old_facets = []
+        else:
+            sort_key = (timestamp,) + old[2][1:]
+            if sort_key == old[2]:
+                old_facets = self._facets(old[0], old[1])
+            else:
+                # The record moved in time: re-file it under every facet
+                for facet in self._facets(old[0], old[1]):
+                    self._remove(facet, old[2])
+                old_facets = []
+        self._entries[key] = (status, email, sort_key)
+        self._count_status(status, 1)
+
+        new_facets = self._facets(status, email)
+        # Only touch facets whose value changed, so updating an unrelated
+        # field costs nothing here.
+        for facet in old_facets:
+            if facet not in new_facets:
+                self._remove(facet, sort_key)
+        for facet in new_facets:
+            if facet not in old_facets:
+                insort(self._orders.setdefault(facet, []), sort_key)
+
+    def keys_with_status(self, status):
+        """Returns the keys whose record has the given status, oldest first."""
+        with self._lock:
+            return [entry[2] for entry in self._orders.get(("status", status), ())]
+
+    def keys_for_user(self, email):
+        """Returns the keys of records submitted by the given (normalised) email, oldest first."""
+        with self._lock:
+            return [entry[2] for entry in self._orders.get(("user_email", email), ())]
+
+    def count(self, facet=ALL):
+        """Returns the number of records filed under a facet."""
+        with self._lock:
+            return len(self._orders.get(facet, ()))
+
+    def counters(self):
+        """
+        Returns the number of records overall and per status.
+
+        Returns:
+            dict: {"total": int, "by_status": {status: int}}
+        """
+        with self._lock:
+            return {"total": len(self._entries), "by_status": dict(self._status_counts)}
+
+    def page(self, facet=ALL, newest_first=True, offset=0, limit=20):
+        """
+        Returns the keys of one page of a facet in submission order.
+
+        Slicing the sorted list costs O(limit) regardless of how many records
+        the facet holds.
+        """
+        with self._lock:
+            order = self._orders.get(facet, [])
+            if newest_first:
+                end = max(len(order) - offset, 0)
+                entries = reversed(order[max(end - limit, 0):end])
+            else:
+                entries = order[offset:offset + limit]
+            return [entry[2] for entry in entries]
+
+    def iter_keys(self, facet=ALL, newest_first=True):
+        """
+        Yields the keys of a facet in submission order.
+
+        Iterates over a shallow copy of the facet taken under the lock (a
+        copy of references, far cheaper than the records a caller reads while
+        iterating), so records filed meanwhile never break the iteration.
+        """
+        with self._lock:
+            order = list(self._orders.get(facet, ()))
+        for entry in (reversed(order) if newest_first else order):
+            yield entry[2]
+
+    def between(self, start_ms, end_ms, facet=ALL):
+        """
+        Returns the keys of a facet submitted in [start_ms, end_ms), oldest first.
+
+        Two binary searches find the bounds, so the cost is O(log n + matches).
+        """
+        with self._lock:
+            order = self._orders.get(facet, [])
+            lo = bisect_left(order, (start_ms,))
+            hi = bisect_left(order, (end_ms,))
+            return [entry[2] for entry in order[lo:hi]]
+
+    def _count_status(self, status, delta):
+        count = self._status_counts.get(status, 0) + delta
+        if count:
+            self._status_counts[status] = count
+        else:
+            self._status_counts.pop(status, None)
+
+    def _facets(self, status, email):
+        facets = [ALL, ("status", status)]
+        if email and self._by_user:
+            facets.append(("user_email", email))
+        return facets
+
+    def _remove(self, facet, sort_key):
+        order = self._orders.get(facet)
+        if not order:
+            return
+        pos = bisect_left(order, sort_key)
+        if pos < len(order) and order[pos] == sort_key:
+            del order[pos]
+        if not order:
+            del self._orders[facet]
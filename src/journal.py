@@ -0,0 +1,105 @@
+import json
+import os
+
+from src import codec, fileio
+
+
+def journal_path(data_file):
+    """Returns the path of the append-only journal that sits next to a snapshot file."""
+    return data_file + ".journal"
+
+
+def append_record(path, key, record, durability="none"):
+    """
+    Appends a single 'put' entry to the journal.
+
+    Args:
+        path (str): Journal file path.
+        key (str): Record key (e.g. the request ID).
+        record (dict): Full record to store under the key.
+        durability (str): One of fileio.DURABILITY_MODES.
+
+    Returns:
+        tuple(int, int): Byte offsets where the entry starts and ends.
+    """
+    return _append(path, {"op": "put", "key": key, "value": record}, durability)
+
+
+def append_delete(path, key, durability="none"):
+    """Appends a 'delete' entry to the journal. Returns the entry's byte offsets."""
+    return _append(path, {"op": "delete", "key": key}, durability)
+
+
+def _append(path, entry, durability):
+    encoded = codec.dumps(entry) + b"\n"
+    with open(path, "ab") as f:
+        start = f.tell()
+        f.write(encoded)
+        fileio.sync_file(f, durability)
+    if start == 0:
+        # The append may have created the journal
+        fileio.sync_directory(os.path.dirname(os.path.abspath(path)), durability)
+    return start, start + len(encoded)
+
+
+def replay(path, data, offset=0):
+    """
+    Applies journal entries starting at a byte offset to a data dict in place.
+
+    Only complete lines are applied; a partially written last line is left for
+    the next call, so readers never act on a torn entry.
+
+    Args:
+        path (str): Journal file path.
+        data (dict): Data to apply the entries to.
+        offset (int): Byte offset of the first unapplied entry.
+
+    Returns:
+        tuple(int, list): New offset and the keys that were applied, in order.
+    """
+    if not os.path.exists(path):
+        return 0, []
+    with open(path, "rb") as f:
+        return replay_file(f, data, offset)
+
+
+def replay_file(f, data, offset=0):
+    """Like replay(), for a journal that is already open (binary mode)."""
+    f.seek(offset)
+    chunk = f.read()
+
+    end = chunk.rfind(b"\n") + 1
+    applied = []
+    for line in chunk[:end].splitlines():
+        if not line.strip():
+            continue
+        try:
+            entry = codec.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if entry.get("op") == "put":
+            data[entry["key"]] = entry["value"]
+        elif entry.get("op") == "delete":
+            data.pop(entry["key"], None)
+        else:
+            continue
+        applied.append(entry["key"])
+    return offset + end, applied
+
+
+def drop_prefix(path, offset, durability="none"):
+    """Removes the first `offset` bytes of the journal, keeping any later entries."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        f.seek(offset)
+        tail = f.read()
+    fileio.atomic_write_bytes(path, tail, durability)
+
+
+def size(path):
+    """Returns the journal size in bytes (0 when it does not exist)."""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
@@ -0,0 +1,220 @@
+import hashlib
+import mimetypes
+import mmap
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from src import fileio
+
+# Bytes read, hashed and written per step, so an upload of any size only
+# ever has one chunk in memory.
+CHUNK_SIZE = 1024 * 1024
+# Uploads stored concurrently; hashlib and file writes release the GIL
+MAX_WORKERS = int(os.getenv("DIAGNOSTICS_MEDIA_WORKERS", "2"))
+
+
+class QuotaExceededError(Exception):
+    """Raised when an upload is larger than the storage quota left for it."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        super().__init__(f"The upload exceeds the storage quota ({limit / (1024 * 1024):,.1f} MB left)")
+
+
+class MediaStore:
+    """
+    Content-addressed store for uploaded photos, videos and audio.
+
+    Every file is kept once, at <root>/blobs/<xx>/<sha256>, where xx is the
+    first two hex digits of its SHA-256. Uploading the same content again
+    stores nothing new. Files are streamed in CHUNK_SIZE pieces into a
+    temporary file while they are hashed and then renamed into place, so a
+    partial upload is never visible under a digest.
+
+    Reads go through a read-only memory map, so reading a range of a large
+    video only pages in that range.
+
+    The bytes held are counted on first use of usage() and kept up to date
+    by put() and remove() in this process.
+    """
+
+    def __init__(self, root, durability="none"):
+        self.root = root
+        self.durability = durability
+        self._usage = None
+        self._usage_lock = threading.Lock()
+
+    def path(self, digest):
+        """Returns the file holding the blob with this SHA-256 hex digest."""
+        return os.path.join(self.root, "blobs", digest[:2], digest)
+
+    def exists(self, digest):
+        return os.path.exists(self.path(digest))
+
+    def size(self, digest):
+        """Returns the size of a blob in bytes."""
+        return os.path.getsize(self.path(digest))
+
+    def blobs(self):
+        """Yields an os.DirEntry per stored blob, one shard directory at a time."""
+        try:
+            shards = sorted(os.listdir(os.path.join(self.root, "blobs")))
+        except FileNotFoundError:
+            return
+        for shard in shards:
+            try:
+                with os.scandir(os.path.join(self.root, "blobs", shard)) as entries:
+                    yield from [entry for entry in entries if entry.is_file()]
+            except FileNotFoundError:
+                continue
+
+    def usage(self):
+        """Returns the bytes held by all blobs."""
+        with self._usage_lock:
+            if self._usage is None:
+                self._usage = sum(entry.stat().st_size for entry in self.blobs())
+            return self._usage
+
+    def recount(self, total):
+        """Replaces the usage counter, e.g. with a total from a full walk of the blobs."""
+        with self._usage_lock:
+            self._usage = total
+
+    def _account(self, delta):
+        with self._usage_lock:
+            if self._usage is not None:
+                self._usage = max(self._usage + delta, 0)
+
+    def remove(self, digest):
+        """
+        Deletes a blob.
+
+        Returns:
+            int: The bytes freed (0 if it did not exist).
+        """
+        path = self.path(digest)
+        try:
+            size = os.path.getsize(path)
+            os.unlink(path)
+        except FileNotFoundError:
+            return 0
+        self._account(-size)
+        return size
+
+    @contextmanager
+    def mapped(self, digest):
+        """
+        Memory-maps a blob read-only for the duration of the block.
+
+        Raises:
+            FileNotFoundError: If the blob does not exist.
+        """
+        with open(self.path(digest), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # mmap cannot map an empty file
+                yield b""
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+                yield mapping
+
+    def read_range(self, digest, start=0, end=None):
+        """Returns bytes [start, end) of a blob (to its end when `end` is None)."""
+        with self.mapped(digest) as mapping:
+            return bytes(mapping[start:end])
+
+    def iter_range(self, digest, start=0, end=None, chunk_size=CHUNK_SIZE):
+        """Yields bytes [start, end) of a blob in pieces of at most `chunk_size` bytes."""
+        with self.mapped(digest) as mapping:
+            end = len(mapping) if end is None else min(end, len(mapping))
+            for offset in range(start, end, chunk_size):
+                yield mapping[offset:min(offset + chunk_size, end)]
+
+    def put(self, stream, chunk_size=CHUNK_SIZE, limit=None):
+        """
+        Copies a binary stream into the store.
+
+        Args:
+            limit (int): Largest size accepted, in bytes (None for no limit).
+                Checked as the stream is read, so an oversized upload is
+                abandoned as soon as it passes the limit.
+
+        Returns:
+            tuple(str, int, bool): The SHA-256 hex digest, the size in bytes,
+                and whether the content was new to the store.
+
+        Raises:
+            QuotaExceededError: If the stream is larger than `limit`.
+        """
+        if hasattr(stream, "seekable") and stream.seekable():
+            stream.seek(0)
+        tmp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir, suffix=".part")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in iter(lambda: stream.read(chunk_size), b""):
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+                    if limit is not None and size > limit:
+                        raise QuotaExceededError(limit)
+                fileio.sync_file(f, self.durability)
+            hex_digest = digest.hexdigest()
+            path = self.path(hex_digest)
+            if os.path.exists(path):
+                os.unlink(tmp_path)
+                # Restarts the garbage collector's grace period for content
+                # that may have been unreferenced until now
+                os.utime(path)
+                return hex_digest, size, False
+            directory = os.path.dirname(path)
+            os.makedirs(directory, exist_ok=True)
+            # Two uploads of the same content may race here; either rename wins
+            # with identical bytes.
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        fileio.sync_directory(directory, self.durability)
+        self._account(size)
+        return hex_digest, size, True
+
+    def put_upload(self, upload, limit=None):
+        """
+        Stores an uploaded file (anything with read() and a name, such as a
+        Streamlit UploadedFile), up to `limit` bytes (see put()).
+
+        Returns:
+            dict: The file entry recorded on the request: name, sha256, size
+                and type (the MIME type).
+        """
+        digest, size, _ = self.put(upload, limit=limit)
+        name = getattr(upload, "name", None) or digest
+        content_type = getattr(upload, "type", None) or mimetypes.guess_type(name)[0]
+        return {
+            "name": name,
+            "sha256": digest,
+            "size": size,
+            "type": content_type or "application/octet-stream",
+        }
+
+
+_EXECUTOR = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def submit(fn, *args):
+    """Runs fn(*args) on the media worker threads. Returns its Future."""
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(MAX_WORKERS, thread_name_prefix="media")
+        return _EXECUTOR.submit(fn, *args)
@@ -0,0 +1,160 @@
+import os
+import threading
+import time
+from collections import Counter
+
+# Request records read per step of the scan
+BATCH_SIZE = 50
+
+
+def references(record):
+    """Yields the digest of every media file a request refers to, derivatives included."""
+    for entry in record.get('files') or []:
+        if not isinstance(entry, dict):
+            continue
+        yield entry['sha256']
+        for derived in (entry.get('derivatives') or {}).values():
+            if isinstance(derived, dict) and 'sha256' in derived:
+                yield derived['sha256']
+
+
+class MediaCollector:
+    """
+    Incremental garbage collector for a MediaStore.
+
+    A cycle has two phases. The scan pages through every request, oldest
+    first, counting references to each blob and giving `expire(key, record)`
+    the chance to drop a request's media under the retention policy (a
+    request it returns True for contributes no references). The sweep then
+    walks the blobs one shard at a time and deletes those with no
+    references, along with abandoned partial uploads.
+
+    The work is a generator that yields after every batch of records and
+    every shard, and step() runs it for a bounded slice of time, so a
+    collection of any size never holds up the app for longer than a slice.
+    Blobs and partial uploads younger than `grace_seconds` are kept even
+    without references: they may belong to a request created after the scan
+    went past, or to an upload that is not linked yet (MediaStore.put()
+    touches existing content it is given again for the same reason).
+
+    Args:
+        store (MediaStore): The store to collect.
+        pages (callable): pages(offset, limit) returns the next (key,
+            record) tuples of all requests, oldest first.
+        expire (callable): expire(key, record) applies the retention policy
+            and returns True if the request's media was dropped.
+    """
+
+    def __init__(self, store, pages, expire, grace_seconds):
+        self.store = store
+        self.pages = pages
+        self.expire = expire
+        self.grace_seconds = grace_seconds
+        self._work = None
+        self._lock = threading.Lock()
+        self._stats = {"cycles": 0, "removed": 0, "freed_bytes": 0, "expired": 0, "live_bytes": None}
+
+    def step(self, budget):
+        """
+        Runs the collection for about `budget` seconds (at least one unit of
+        work), starting a new cycle if the previous one finished.
+
+        Returns:
+            bool: True if a cycle finished during this slice.
+        """
+        with self._lock:
+            if self._work is None:
+                self._work = self._cycle()
+            deadline = time.monotonic() + budget
+            for _ in self._work:
+                if time.monotonic() >= deadline:
+                    return False
+            self._work = None
+            return True
+
+    def collect(self):
+        """Runs one full cycle without pausing (for tests and maintenance)."""
+        while not self.step(float("inf")):
+            pass
+
+    def stats(self):
+        """Returns the totals of all finished cycles, and the live bytes after the last one."""
+        with self._lock:
+            return dict(self._stats)
+
+    def _cycle(self):
+        counts = Counter()
+        expired = 0
+        offset = 0
+        while True:
+            page = self.pages(offset, BATCH_SIZE)
+            for key, record in page:
+                if self.expire(key, record):
+                    expired += 1
+                else:
+                    counts.update(references(record))
+            offset += len(page)
+            if len(page) < BATCH_SIZE:
+                break
+            yield
+
+        cutoff = time.time() - self.grace_seconds
+        removed = freed = live = 0
+        shard = None
+        for entry in self.store.blobs():
+            current = os.path.basename(os.path.dirname(entry.path))
+            if current != shard:
+                if shard is not None:
+                    yield
+                shard = current
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if counts[entry.name] or stat.st_mtime > cutoff:
+                live += stat.st_size
+                continue
+            size = self.store.remove(entry.name)
+            removed += 1 if size else 0
+            freed += size
+        self._remove_partial_uploads(cutoff)
+
+        self.store.recount(live)
+        self._stats["cycles"] += 1
+        self._stats["removed"] += removed
+        self._stats["freed_bytes"] += freed
+        self._stats["expired"] += expired
+        self._stats["live_bytes"] = live
+
+    def _remove_partial_uploads(self, cutoff):
+        """Deletes temporary upload files left behind by a crashed process."""
+        try:
+            entries = list(os.scandir(os.path.join(self.store.root, "tmp")))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            try:
+                if entry.stat().st_mtime <= cutoff:
+                    os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+def run_periodically(collector, interval, slice_seconds, pause_seconds):
+    """
+    Starts a daemon thread that runs `collector` one slice at a time,
+    pausing between slices, and starts a new cycle every `interval` seconds.
+
+    Returns:
+        threading.Thread: The started thread.
+    """
+    def loop():
+        while True:
+            started = time.monotonic()
+            while not collector.step(slice_seconds):
+                time.sleep(pause_seconds)
+            time.sleep(max(interval - (time.monotonic() - started), 0))
+
+    thread = threading.Thread(target=loop, name="media-gc", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,131 @@
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from src.media import CHUNK_SIZE
+
+_PATH = re.compile(r"^/media/([0-9a-f]{64})$")
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+_MIME = re.compile(r"^[\w.+-]+/[\w.+-]+$")
+
+
+def parse_range(header, size):
+    """
+    Returns the byte span a single-range Range header asks for.
+
+    Args:
+        header (str): The Range header value, e.g. "bytes=0-1023" or "bytes=-500".
+        size (int): Size of the file in bytes.
+
+    Returns:
+        tuple(int, int): (start, end) with `end` exclusive, or None when the
+            header is absent or not a single byte range (serve the whole file).
+
+    Raises:
+        ValueError: If the range lies entirely outside the file.
+    """
+    match = _RANGE.match((header or "").strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        start, end = max(size - int(last), 0), size
+    else:
+        start = int(first)
+        if last != "" and int(last) < start:
+            # Syntactically invalid, so the header is ignored
+            return None
+        end = size if last == "" else min(int(last) + 1, size)
+    if start >= size or start >= end:
+        raise ValueError(f"Range {header!r} is outside the file ({size} bytes)")
+    return start, end
+
+
+class _MediaHandler(BaseHTTPRequestHandler):
+    store = None  # set on the subclass MediaServer creates
+
+    def do_HEAD(self):
+        self._serve(body=False)
+
+    def do_GET(self):
+        self._serve(body=True)
+
+    def _serve(self, body):
+        url = urlsplit(self.path)
+        match = _PATH.match(url.path)
+        if not match:
+            self.send_error(404)
+            return
+        digest = match.group(1)
+        try:
+            # Opened once: the garbage collector may delete the blob at any
+            # moment, and a blob it deletes after this still reads to the end
+            with self.store.mapped(digest) as mapping:
+                self._send(url, digest, mapping, body)
+        except FileNotFoundError:
+            self.send_error(404)
+
+    def _send(self, url, digest, mapping, body):
+        size = len(mapping)
+        try:
+            span = parse_range(self.headers.get("Range"), size)
+        except ValueError:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.end_headers()
+            return
+
+        start, end = span or (0, size)
+        self.send_response(206 if span else 200)
+        content_type = parse_qs(url.query).get("type", [""])[0]
+        self.send_header(
+            "Content-Type", content_type if _MIME.match(content_type) else "application/octet-stream"
+        )
+        self.send_header("Content-Length", str(end - start))
+        self.send_header("Accept-Ranges", "bytes")
+        if span:
+            self.send_header("Content-Range", f"bytes {start}-{end - 1}/{size}")
+        # Content-addressed: the bytes behind a URL never change
+        self.send_header("ETag", f'"{digest}"')
+        self.send_header("Cache-Control", "private, max-age=31536000, immutable")
+        self.end_headers()
+        if not body:
+            return
+        try:
+            for offset in range(start, end, CHUNK_SIZE):
+                self.wfile.write(mapping[offset:min(offset + CHUNK_SIZE, end)])
+        except (BrokenPipeError, ConnectionResetError):
+            # Players drop connections whenever the user seeks
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MediaServer:
+    """
+    Small HTTP server that streams blobs of a MediaStore to the browser.
+
+    GET /media/<sha256>?type=<mime> answers Range requests with 206 partial
+    content read from the blob's memory map, one chunk at a time, so the
+    browser's video and audio players can seek through large files while
+    neither this process nor the Streamlit session holds them in memory.
+    Runs on daemon threads, one per connection.
+    """
+
+    def __init__(self, store, host="127.0.0.1", port=0):
+        handler = type("MediaHandler", (_MediaHandler,), {"store": store})
+        self._httpd = ThreadingHTTPServer((host, port), handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="media-server", daemon=True
+        )
+        self._thread.start()
+
+    def close(self):
+        """Stops the server and closes its socket."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -0,0 +1,82 @@
+"""
+Copies the JSON stores into the one-file-per-record layout used by the
+"files" storage mode.
+
+    python -m src.migrate --files-dir diagnostics_records
+
+The JSON files default to the DIAGNOSTICS_*_FILE settings. A journal left
+by the "journal" mode is applied on top of the requests snapshot. Records
+keep their version numbers, so the migration can be re-run safely; each
+store's index is compacted at the end.
+"""
+import argparse
+import json
+import os
+import sys
+
+from src import fileio, journal, storage
+from src.filestore import FileStore
+
+
+def _read_store(path, with_journal=False):
+    """Returns the records of a JSON store ({} if the file does not exist)."""
+    data = {}
+    if os.path.exists(path):
+        data = fileio.read_json(path)
+    if with_journal:
+        journal.replay(journal.journal_path(path), data)
+    return data
+
+
+def migrate_json_to_files(files_dir, data_file=None, users_file=None, tutorials_file=None):
+    """
+    Writes every request, tutorial and user from the JSON files into a FileStore.
+
+    Args:
+        files_dir (str): Root directory of the file store (created if needed).
+        data_file, users_file, tutorials_file (str): JSON stores to read
+            (default: the paths configured in src.storage).
+
+    Returns:
+        dict: Number of records migrated per store.
+    """
+    sources = {
+        "requests": (data_file or storage.DATA_FILE, True),
+        "tutorials": (tutorials_file or storage.TUTORIALS_FILE, False),
+        "users": (users_file or storage.USERS_FILE, False),
+    }
+    target = FileStore(files_dir)
+    counts = {}
+    for table, (path, with_journal) in sources.items():
+        records = _read_store(path, with_journal)
+        target.put_many(table, records)
+        target.compact(table)
+        counts[table] = len(records)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Migrates the JSON stores to the one-file-per-record 'files' layout."
+    )
+    parser.add_argument("--files-dir", default=storage.FILES_DIR, help="Target directory")
+    parser.add_argument("--data-file", default=storage.DATA_FILE)
+    parser.add_argument("--users-file", default=storage.USERS_FILE)
+    parser.add_argument("--tutorials-file", default=storage.TUTORIALS_FILE)
+    args = parser.parse_args(argv)
+
+    try:
+        counts = migrate_json_to_files(
+            args.files_dir, args.data_file, args.users_file, args.tutorials_file,
+        )
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Migration failed: {e}", file=sys.stderr)
+        return 1
+    for table, count in counts.items():
+        print(f"{table}: {count} records")
+    print(f"Set DIAGNOSTICS_STORAGE_MODE=files and DIAGNOSTICS_FILES_DIR={args.files_dir} to use them.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,437 @@
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from src import symptoms
+from src.ids import record_ms
+from src.versions import VersionConflictError, version_of
+from src.workqueue import queue_fields
+
+# Every store is a table of JSON documents keyed by ID, with the fields used
+# for filtering and ordering copied into indexed columns.
+TABLES = ("requests", "tutorials", "users")
+
+# PRAGMA synchronous level giving each of fileio.DURABILITY_MODES in WAL
+# mode: NORMAL only syncs at checkpoints, so a commit survives a crash of the
+# process but not a power loss; FULL syncs the WAL on every commit and EXTRA
+# also syncs the directory.
+SYNCHRONOUS = {"none": "OFF", "flush": "NORMAL", "fsync": "FULL", "fsync-dir": "EXTRA"}
+
+
+def _columns(record):
+    """
+    Extracts the indexed column values (status, user_email, timestamp,
+    timestamp_ms, deadline_ms, lease_expires_ms, symptom_mask) from a record.
+    """
+    user_email = record.get('user_email') or record.get('email') or ''
+    timestamp = record.get('timestamp') or record.get('created_at') or ''
+    deadline, lease = queue_fields(record) or (None, None)
+    symptom_mask = symptoms.mask_of(record) if 'symptoms' in record else None
+    return (
+        record.get('status'), user_email.strip().lower(), timestamp, record_ms(record),
+        deadline, lease, symptom_mask,
+    )
+
+
+class SQLiteStore:
+    """
+    Document store for requests, tutorials and users backed by a single SQLite
+    database in WAL mode, so several processes can read while one writes.
+
+    Connections are opened per thread because Streamlit serves each session
+    from its own script thread.
+
+    `durability` maps table names to one of fileio.DURABILITY_MODES
+    ("flush" for tables it does not list); each write transaction runs at
+    the matching SYNCHRONOUS level.
+    """
+
+    def __init__(self, path, durability=None):
+        self.path = path
+        self.durability = durability if durability is not None else {}
+        self._local = threading.local()
+        conn = self._connect()
+        with self._transaction(conn):
+            for table in TABLES:
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} ("
+                    "id TEXT PRIMARY KEY, status TEXT, user_email TEXT, "
+                    "timestamp TEXT, timestamp_ms INTEGER, deadline_ms INTEGER, "
+                    "lease_expires_ms INTEGER, symptom_mask INTEGER, data TEXT NOT NULL)"
+                )
+                self._add_timestamp_ms(conn, table)
+                self._add_queue_columns(conn, table)
+                self._add_symptom_mask(conn, table)
+                for column in ("status", "user_email", "timestamp_ms"):
+                    conn.execute(
+                        f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} "
+                        f"ON {table} ({column})"
+                    )
+                # Serves status-filtered pages and ranges in time order without a sort
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{table}_status_timestamp_ms "
+                    f"ON {table} (status, timestamp_ms)"
+                )
+                # Work queue: pending records in deadline order
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{table}_queue "
+                    f"ON {table} (deadline_ms) WHERE status = 'pending'"
+                )
+            # Materialised per-table counts ("<table>" and "<table>:<status>"),
+            # kept in step with every write inside the same transaction.
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            if conn.execute("SELECT COUNT(*) FROM counters").fetchone()[0] == 0:
+                self._rebuild_counters(conn)
+
+    def _add_timestamp_ms(self, conn, table):
+        """Adds and backfills the timestamp_ms column on databases created before it existed."""
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if "timestamp_ms" in columns:
+            return
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN timestamp_ms INTEGER")
+        conn.execute(f"DROP INDEX IF EXISTS idx_{table}_timestamp")
+        conn.execute(f"DROP INDEX IF EXISTS idx_{table}_status_timestamp")
+        rows = conn.execute(f"SELECT id, data FROM {table}").fetchall()
+        conn.executemany(
+            f"UPDATE {table} SET timestamp_ms = ? WHERE id = ?",
+            [(record_ms(json.loads(data)), key) for key, data in rows],
+        )
+
+    def _add_queue_columns(self, conn, table):
+        """Adds and backfills the work queue columns on databases created before they existed."""
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if "deadline_ms" in columns:
+            return
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN deadline_ms INTEGER")
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN lease_expires_ms INTEGER")
+        rows = conn.execute(f"SELECT id, data FROM {table} WHERE status = 'pending'").fetchall()
+        conn.executemany(
+            f"UPDATE {table} SET deadline_ms = ?, lease_expires_ms = ? WHERE id = ?",
+            [queue_fields(json.loads(data)) + (key,) for key, data in rows],
+        )
+
+    def _add_symptom_mask(self, conn, table):
+        """Adds and backfills the symptom_mask column on databases created before it existed."""
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if "symptom_mask" in columns:
+            return
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN symptom_mask INTEGER")
+        rows = conn.execute(f"SELECT id, data FROM {table}").fetchall()
+        conn.executemany(
+            f"UPDATE {table} SET symptom_mask = ? WHERE id = ?",
+            [(_columns(json.loads(data))[-1], key) for key, data in rows],
+        )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.synchronous = "NORMAL"
+        return conn
+
+    @contextmanager
+    def _transaction(self, conn, table=None):
+        if table is not None:
+            level = SYNCHRONOUS[self.durability.get(table, "flush")]
+            if level != self._local.synchronous:
+                # Takes effect for this connection's next commit; it cannot
+                # be changed inside the transaction.
+                conn.execute(f"PRAGMA synchronous={level}")
+                self._local.synchronous = level
+        # IMMEDIATE takes the write lock up front so a read-modify-write
+        # cannot interleave with another writer.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def get(self, table, key):
+        """Returns the record stored under `key`, or None."""
+        row = self._connect().execute(
+            f"SELECT data FROM {table} WHERE id = ?", (key,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def all(self, table):
+        """Returns every record in the table as an {id: record} dict in insertion order."""
+        rows = self._connect().execute(f"SELECT id, data FROM {table} ORDER BY rowid")
+        return {key: json.loads(data) for key, data in rows}
+
+    def query(self, table, status=None, user_email=None):
+        """Returns the records matching the given indexed column values."""
+        where, params = self._filters(status, user_email)
+        rows = self._connect().execute(
+            f"SELECT id, data FROM {table}{where} ORDER BY rowid", params
+        )
+        return {key: json.loads(data) for key, data in rows}
+
+    def page(self, table, status=None, newest_first=True, offset=0, limit=20, user_email=None):
+        """Returns one page of (id, record) tuples ordered by timestamp via the timestamp index."""
+        where, params = self._filters(status, user_email)
+        direction = "DESC" if newest_first else "ASC"
+        rows = self._connect().execute(
+            f"SELECT id, data FROM {table}{where} "
+            f"ORDER BY timestamp_ms {direction}, rowid {direction} LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        )
+        return [(key, json.loads(data)) for key, data in rows]
+
+    def search(self, table, text, fields, status=None, newest_first=True, offset=0, limit=20):
+        """
+        Returns one page of records whose ID or one of `fields` contains `text`
+        (case-insensitive), ordered by timestamp.
+
+        Returns:
+            tuple(int, list): (number of matches, (id, record) tuples)
+        """
+        where, params = self._filters(status)
+        pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        columns = ["id"] + [f"json_extract(data, '$.{field}')" for field in fields]
+        match = " OR ".join(f"{column} LIKE ? ESCAPE '\\'" for column in columns)
+        where = f"{where} AND ({match})" if where else f" WHERE ({match})"
+        params = params + [pattern] * len(columns)
+        conn = self._connect()
+        total = conn.execute(f"SELECT COUNT(*) FROM {table}{where}", params).fetchone()[0]
+        direction = "DESC" if newest_first else "ASC"
+        rows = conn.execute(
+            f"SELECT id, data FROM {table}{where} "
+            f"ORDER BY timestamp_ms {direction}, rowid {direction} LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        )
+        return total, [(key, json.loads(data)) for key, data in rows]
+
+    def between(self, table, start_ms, end_ms, status=None):
+        """Returns (id, record) tuples created in [start_ms, end_ms), oldest first."""
+        clauses, params = ["timestamp_ms >= ?", "timestamp_ms < ?"], [start_ms, end_ms]
+        if status is not None:
+            clauses.insert(0, "status = ?")
+            params.insert(0, status)
+        rows = self._connect().execute(
+            f"SELECT id, data FROM {table} WHERE {' AND '.join(clauses)} "
+            "ORDER BY timestamp_ms, rowid",
+            params,
+        )
+        return [(key, json.loads(data)) for key, data in rows]
+
+    def next_claimable(self, table, now_ms):
+        """
+        Returns the ID of the pending record with the earliest deadline that is
+        unclaimed or whose lease ran out before `now_ms`, or None.
+
+        Walks the partial queue index in deadline order; only records under an
+        active lease are skipped, so this stays O(log n + experts).
+        """
+        row = self._connect().execute(
+            f"SELECT id FROM {table} WHERE status = 'pending' "
+            "AND (lease_expires_ms IS NULL OR lease_expires_ms <= ?) "
+            "ORDER BY deadline_ms LIMIT 1",
+            (now_ms,),
+        ).fetchone()
+        return row[0] if row else None
+
+    def count(self, table, status=None, user_email=None):
+        """Returns the number of records, optionally restricted to a status and/or user."""
+        where, params = self._filters(status, user_email)
+        return self._connect().execute(
+            f"SELECT COUNT(*) FROM {table}{where}", params
+        ).fetchone()[0]
+
+    def counters(self, table):
+        """
+        Returns the materialised counts for a table in O(1).
+
+        Returns:
+            dict: {"total": int, "by_status": {status: int}}
+        """
+        prefix = f"{table}:"
+        counts = {"total": 0, "by_status": {}}
+        rows = self._connect().execute(
+            "SELECT name, value FROM counters WHERE name = ? OR name LIKE ?",
+            (table, prefix + "%"),
+        )
+        for name, value in rows:
+            if name == table:
+                counts["total"] = value
+            else:
+                counts["by_status"][name[len(prefix):]] = value
+        return counts
+
+    def symptom_counts(self, table, by=()):
+        """
+        Counts the records reporting each symptom, overall or per group, in
+        one aggregate query over the symptom_mask column (kept in step with
+        every write), so no record is decoded in Python. Grouping reads the
+        `by` fields with json_extract.
+
+        Returns:
+            dict: {group: (records, [count per symptom code])}, as
+                symptoms.count() returns it.
+        """
+        keys = ["json_extract(data, ?)"] * len(by)
+        sums = [f"TOTAL((symptom_mask >> {code}) & 1)" for code in range(len(symptoms.SYMPTOMS))]
+        sql = f"SELECT {', '.join(keys + ['COUNT(*)'] + sums)} FROM {table}"
+        if by:
+            sql += " GROUP BY " + ", ".join(str(i + 1) for i in range(len(by)))
+        rows = self._connect().execute(sql, [f'$."{field}"' for field in by]).fetchall()
+        n = len(by)
+        return {
+            tuple(row[:n]): (row[n], [int(count) for count in row[n + 1:]])
+            for row in rows if row[n]
+        }
+
+    def put(self, table, key, record):
+        """Inserts or replaces a single record, giving it the next version number."""
+        conn = self._connect()
+        with self._transaction(conn, table):
+            current = self._current(conn, table, key)
+            record['version'] = (current[1] if current else 0) + 1
+            self._write(conn, table, key, record, current)
+
+    def insert(self, table, key, record):
+        """
+        Inserts a record at version 1 unless its key is taken.
+
+        Returns:
+            bool: False if a record already exists under `key`.
+        """
+        columns = _columns(record)
+        status = columns[0]
+        record['version'] = 1
+        conn = self._connect()
+        with self._transaction(conn, table):
+            inserted = conn.execute(
+                f"INSERT INTO {table} (id, status, user_email, timestamp, timestamp_ms, "
+                "deadline_ms, lease_expires_ms, symptom_mask, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO NOTHING",
+                (key, *columns, json.dumps(record)),
+            ).rowcount == 1
+            if inserted:
+                self._bump(conn, table, status, 1)
+        return inserted
+
+    def put_many(self, table, records):
+        """Inserts or replaces every record of an {id: record} dict in one transaction, as is."""
+        conn = self._connect()
+        with self._transaction(conn, table):
+            for key, record in records.items():
+                self._write(conn, table, key, record, self._current(conn, table, key))
+
+    def update(self, table, key, apply, expected_version=None):
+        """
+        Applies `apply(record)` to an existing record with optimistic concurrency.
+
+        The record is read and `apply` runs outside any transaction; the
+        write lock is only taken to commit, and only if the stored version is
+        still the one that was read. Otherwise the update is retried on the
+        fresh record, or, when the caller passed the `expected_version` it
+        read earlier, VersionConflictError is raised.
+
+        Returns:
+            dict: The updated record, or None if the key does not exist.
+        """
+        conn = self._connect()
+        while True:
+            record = self.get(table, key)
+            if record is None:
+                return None
+            version = version_of(record)
+            if expected_version is not None and version != expected_version:
+                raise VersionConflictError(table, key, expected_version, version)
+            apply(record)
+            record['version'] = version + 1
+            with self._transaction(conn, table):
+                current = self._current(conn, table, key)
+                if current is not None and current[1] == version:
+                    self._write(conn, table, key, record, current)
+                    return record
+            if current is None:
+                return None
+
+    def delete(self, table, key, expected_version=None):
+        """
+        Deletes a record. Returns True if it existed.
+
+        Raises:
+            VersionConflictError: If `expected_version` is given and the
+                stored record is at another version.
+        """
+        conn = self._connect()
+        with self._transaction(conn, table):
+            current = self._current(conn, table, key)
+            if current is None:
+                return False
+            if expected_version is not None and current[1] != expected_version:
+                raise VersionConflictError(table, key, expected_version, current[1])
+            conn.execute(f"DELETE FROM {table} WHERE id = ?", (key,))
+            self._bump(conn, table, current[0], -1)
+        return True
+
+    @staticmethod
+    def _filters(status=None, user_email=None):
+        """Builds the WHERE clause and parameters for the indexed column filters."""
+        clauses, params = [], []
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if user_email is not None:
+            clauses.append("user_email = ?")
+            params.append(user_email.strip().lower())
+        return (f" WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+    def _current(self, conn, table, key):
+        """Returns the stored (status, version) of a record, or None."""
+        return conn.execute(
+            f"SELECT status, COALESCE(json_extract(data, '$.version'), 0) FROM {table} WHERE id = ?",
+            (key,),
+        ).fetchone()
+
+    def _write(self, conn, table, key, record, current):
+        """Writes a record whose stored (status, version) is `current` (None if new)."""
+        columns = _columns(record)
+        status = columns[0]
+        if current is None:
+            self._bump(conn, table, status, 1)
+        elif current[0] != status:
+            self._bump(conn, table, current[0], -1, total=False)
+            self._bump(conn, table, status, 1, total=False)
+        conn.execute(
+            f"INSERT INTO {table} (id, status, user_email, timestamp, timestamp_ms, "
+            "deadline_ms, lease_expires_ms, symptom_mask, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET status = excluded.status, "
+            "user_email = excluded.user_email, timestamp = excluded.timestamp, "
+            "timestamp_ms = excluded.timestamp_ms, deadline_ms = excluded.deadline_ms, "
+            "lease_expires_ms = excluded.lease_expires_ms, symptom_mask = excluded.symptom_mask, "
+            "data = excluded.data",
+            (key, *columns, json.dumps(record)),
+        )
+
+    def _bump(self, conn, table, status, delta, total=True):
+        names = ([f"{table}:{status}"] if status is not None else []) + ([table] if total else [])
+        for name in names:
+            conn.execute(
+                "INSERT INTO counters (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, delta),
+            )
+
+    def _rebuild_counters(self, conn):
+        for table in TABLES:
+            conn.execute(
+                "INSERT INTO counters (name, value) SELECT ?, COUNT(*) FROM " + table,
+                (table,),
+            )
+            conn.execute(
+                f"INSERT INTO counters (name, value) "
+                f"SELECT ? || ':' || status, COUNT(*) FROM {table} "
+                "WHERE status IS NOT NULL GROUP BY status",
+                (table,),
+            )
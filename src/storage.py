@@ -1,126 +1,948 @@
-import hashlib
+import atexit
 import json
 import os
-import uuid
+import threading
+from concurrent.futures import Future
 from datetime import datetime
+from itertools import islice
+from urllib.parse import quote
+
+from src import codec, derivatives, fileio, hashing, ids, journal, media, symptoms
+from src.filecache import CachedJSONFile, UnreadableFileError
+from src.derivatives import DerivativePipeline, JobQueue
+from src.filestore import INDEX_FIELDS, FileStore
+from src.groupcommit import GroupCommitWriter
+from src.indexes import ALL, RecordIndex
+from src.media import MediaStore, QuotaExceededError
+from src.mediagc import MediaCollector, run_periodically
+from src.mediaserver import MediaServer
+from src.sqlite_store import SQLiteStore
+from src.versions import VersionConflictError, version_of
+from src.workqueue import WorkQueue
 
 DATA_FILE = os.getenv("DIAGNOSTICS_DATA_FILE", "diagnostics_data.json")
 USERS_FILE = os.getenv("DIAGNOSTICS_USERS_FILE", "users_data.json")
 TUTORIALS_FILE = os.getenv("DIAGNOSTICS_TUTORIALS_FILE", "tutorials_data.json")
 
-# In-memory caches for diagnostic data
-_DATA_CACHE = None
-_DATA_MTIME = None
-_CACHED_DATA_FILE = None
-
-# In-memory caches for user data
-_USERS_CACHE = None
-_USERS_MTIME = None
-_CACHED_USERS_FILE = None
+SQLITE_FILE = os.getenv("DIAGNOSTICS_SQLITE_FILE", "diagnostics.db")
+FILES_DIR = os.getenv("DIAGNOSTICS_FILES_DIR", "diagnostics_records")
+# Uploaded photos, videos and audio, stored by content (see src/media.py)
+MEDIA_DIR = os.getenv("DIAGNOSTICS_MEDIA_DIR", "diagnostics_media")
+# Media server that streams stored media to the browser with range requests
+# (see src/mediaserver.py): the port to listen on (0 turns it off), the
+# interface to bind, and the base URL browsers reach it at (default
+# http://localhost:<port>). Without it, files up to MEDIA_INLINE_MAX_MB are
+# sent through Streamlit instead.
+MEDIA_PORT = int(os.getenv("DIAGNOSTICS_MEDIA_PORT", "0"))
+MEDIA_HOST = os.getenv("DIAGNOSTICS_MEDIA_HOST", "127.0.0.1")
+MEDIA_URL = os.getenv("DIAGNOSTICS_MEDIA_URL", "")
+MEDIA_INLINE_MAX_MB = float(os.getenv("DIAGNOSTICS_MEDIA_INLINE_MAX_MB", "25"))
+# Thumbnail and preview jobs for image attachments (see src/derivatives.py)
+DERIVATIVE_JOBS_FILE = os.getenv("DIAGNOSTICS_DERIVATIVE_JOBS_FILE", "derivative_jobs.json")
+# Media lifecycle: storage quotas in MB for all media and per member (0 for
+# none), days a completed request keeps its media (0 keeps it forever), and
+# the garbage collector's schedule (see src/mediagc.py): seconds between
+# cycles (0 turns it off), milliseconds per time slice, and how long new
+# blobs are kept before they need a reference.
+MEDIA_QUOTA_MB = float(os.getenv("DIAGNOSTICS_MEDIA_QUOTA_MB", "0"))
+MEDIA_USER_QUOTA_MB = float(os.getenv("DIAGNOSTICS_MEDIA_USER_QUOTA_MB", "0"))
+MEDIA_RETENTION_DAYS = float(os.getenv("DIAGNOSTICS_MEDIA_RETENTION_DAYS", "0"))
+MEDIA_GC_INTERVAL = float(os.getenv("DIAGNOSTICS_MEDIA_GC_INTERVAL", "3600"))
+MEDIA_GC_SLICE_MS = float(os.getenv("DIAGNOSTICS_MEDIA_GC_SLICE_MS", "20"))
+MEDIA_GC_GRACE_HOURS = float(os.getenv("DIAGNOSTICS_MEDIA_GC_GRACE_HOURS", "24"))
+# Times an upload counts its member's usage outside the quota lock before
+# counting it under the lock (see _reserve_media())
+RESERVE_ATTEMPTS = 3
+
+# Storage mode: "json" rewrites the whole JSON file on every mutation,
+# "journal" appends each request mutation to DATA_FILE + ".journal" and
+# periodically compacts the journal into DATA_FILE in the background,
+# "sqlite" keeps requests, tutorials and users in SQLITE_FILE, and "files"
+# keeps every record in its own file under FILES_DIR (see src/filestore.py).
+STORAGE_MODE = os.getenv("DIAGNOSTICS_STORAGE_MODE", "json")
+JOURNAL_MAX_BYTES = int(os.getenv("DIAGNOSTICS_JOURNAL_MAX_BYTES", str(4 * 1024 * 1024)))
+
+# Durability of each store's writes, one of fileio.DURABILITY_MODES:
+# "none", "flush", "fsync" or "fsync-dir" (see src/fileio.py). Accounts and
+# requests default to surviving a power loss; tutorial requests only a crash
+# of the app.
+DURABILITY = {
+    "requests": os.getenv("DIAGNOSTICS_REQUESTS_DURABILITY", "fsync-dir"),
+    "users": os.getenv("DIAGNOSTICS_USERS_DURABILITY", "fsync-dir"),
+    "tutorials": os.getenv("DIAGNOSTICS_TUTORIALS_DURABILITY", "flush"),
+}
+for _durability in DURABILITY.values():
+    fileio.check_durability(_durability)
+
+# Group commit: above zero, whole-file JSON writes are handed to a background
+# thread that rewrites each file at most once per this many milliseconds.
+WRITE_DELAY_MS = float(os.getenv("DIAGNOSTICS_WRITE_DELAY_MS", "0"))
+
+# Expert work queue: hours until a new request is due, and how long a
+# claim lasts before the request returns to the queue unless renewed.
+REQUEST_SLA_HOURS = float(os.getenv("DIAGNOSTICS_REQUEST_SLA_HOURS", "48"))
+LEASE_SECONDS = int(os.getenv("DIAGNOSTICS_LEASE_SECONDS", "900"))
+
+# In-memory caches of the JSON-backed stores. In journal mode the requests
+# cache holds the snapshot plus the applied journal tail, and its signature
+# is that of the snapshot.
+_REQUESTS_CACHE = CachedJSONFile()
+_USERS_CACHE = CachedJSONFile()
+_TUTORIALS_CACHE = CachedJSONFile()
+
+# Secondary indexes over the cached stores, keyed by store name, as
+# (RecordIndex, records) pairs. An index is updated in place on every
+# mutation and rebuilt only when its store is reloaded from disk, which
+# replaces the cached dict. The indexes also serve as the materialised
+# counters behind get_stats(). They live in memory only: rebuilding one
+# from the cached records is a single pass, cheaper than keeping a copy on
+# disk in step with every write.
+_INDEXES = {}
+
+# Work queue over the cached requests as a (WorkQueue, records) pair,
+# maintained alongside the indexes.
+_QUEUE = (None, None)
+
+# Held while an index or the queue is built and published, and while a
+# change is filed in them, so a change made during a rebuild is never lost.
+# Taken last, after any store or journal lock.
+_INDEXES_LOCK = threading.Lock()
+
+# Journal state: byte offset of the first unapplied journal entry, the inode
+# of the journal that offset refers to, and the background compaction
+# thread, if one is running.
+_JOURNAL_OFFSET = 0
+_JOURNAL_INODE = None
+_JOURNAL_LOCK = threading.RLock()
+_COMPACTION_THREAD = None
+
+# Group commit state: the background writer (started on first use), and the
+# changes it has not written yet per JSON file, as {key: record or None}.
+# The future of each thread's latest mutation is kept in _WRITES.last.
+_WRITER = None
+_WRITER_LOCK = threading.Lock()
+_UNWRITTEN = {}
+_WRITES = threading.local()
+_WRITTEN = Future()
+_WRITTEN.set_result(None)
+
+# Open SQLite stores keyed by database path, and file and media stores keyed by root
+_SQLITE_STORES = {}
+_FILE_STORES = {}
+_MEDIA_STORES = {}
+# The media server, once started (False if its port was already taken)
+_MEDIA_SERVER = None
+_MEDIA_SERVER_LOCK = threading.Lock()
+# Derivative pipelines keyed by (media root, jobs file), started on first use
+_DERIVATIVES = {}
+_DERIVATIVES_LOCK = threading.Lock()
+# Media garbage collectors keyed by media root, and the roots whose
+# collector runs on a background thread
+_MEDIA_COLLECTORS = {}
+_MEDIA_GC_RUNNING = set()
+_MEDIA_GC_LOCK = threading.Lock()
+
+# Conditional writes rejected because the record had changed since the
+# caller read it, per store: each one is a lost update that was prevented.
+_CONFLICTS = {"requests": 0, "tutorials": 0, "users": 0}
+_CONFLICTS_LOCK = threading.Lock()
+
+# Fields matched (case-insensitively, as substrings) by the admin search
+# boxes, in addition to the record key.
+REQUEST_SEARCH_FIELDS = ("user_email", "make", "model", "year", "vin", "obd_codes")
+USER_SEARCH_FIELDS = ("name", "occupation")
 
 def _load_data():
     """Loads all data from the JSON file with caching."""
-    global _DATA_CACHE, _DATA_MTIME, _CACHED_DATA_FILE
+    global _JOURNAL_OFFSET
+    if STORAGE_MODE != "journal":
+        return _REQUESTS_CACHE.load(DATA_FILE)
+    if _REQUESTS_CACHE.bind(DATA_FILE):
+        _JOURNAL_OFFSET = 0
+    return _load_journaled_data()
 
-    # Invalidate cache if filename has changed
-    if DATA_FILE != _CACHED_DATA_FILE:
-        _DATA_CACHE = None
-        _DATA_MTIME = None
-        _CACHED_DATA_FILE = DATA_FILE
+def _save_data(data):
+    """Atomically saves data to the JSON file and updates the cache."""
+    _REQUESTS_CACHE.save(DATA_FILE, data, DURABILITY["requests"])
+
+def _load_journaled_data():
+    """Rebuilds request data from the DATA_FILE snapshot plus the journal tail."""
+    journal_file = journal.journal_path(DATA_FILE)
+    with _JOURNAL_LOCK:
+        # If a compaction replaced the journal while the snapshot was read,
+        # the snapshot may be newer than the journal that was replayed; read
+        # again, which reloads the snapshot and replays the new journal.
+        for _ in range(3):
+            data = _replay_journaled_data(journal_file)
+            journal_signature = fileio.file_signature(journal_file)
+            if (journal_signature[0] if journal_signature else None) == _JOURNAL_INODE:
+                break
+        return data
+
+def _replay_journaled_data(journal_file):
+    global _JOURNAL_OFFSET, _JOURNAL_INODE
+    cache = _REQUESTS_CACHE
+    # A compaction writes the new snapshot before it replaces the journal, so
+    # open the journal first: the file held open then has every entry since
+    # the snapshot read next, even if a compaction replaces both meanwhile.
+    # Opening it after the snapshot could pair an older snapshot with a
+    # trimmed journal and drop requests.
+    try:
+        journal_f = open(journal_file, "rb")
+    except FileNotFoundError:
+        journal_f = None
+    try:
+        journal_inode = os.fstat(journal_f.fileno()).st_ino if journal_f else None
+        snapshot = fileio.file_signature(DATA_FILE)
+        # A new snapshot or a replaced journal means another writer compacted;
+        # start over from the snapshot instead of applying the tail.
+        if (cache.data is None or snapshot != cache.signature
+                or (_JOURNAL_OFFSET and journal_inode != _JOURNAL_INODE)):
+            data = {}
+            if snapshot is not None:
+                try:
+                    data = fileio.read_json(DATA_FILE)
+                except (json.JSONDecodeError, OSError):
+                    return cache.data if cache.data is not None else {}
+            cache.replace(data, snapshot)
+            _JOURNAL_OFFSET = 0
+        else:
+            cache.hits += 1
+
+        applied = []
+        if journal_f is not None:
+            _JOURNAL_OFFSET, applied = journal.replay_file(journal_f, cache.data, _JOURNAL_OFFSET)
+        else:
+            _JOURNAL_OFFSET = 0
+        _JOURNAL_INODE = journal_inode
+    finally:
+        if journal_f is not None:
+            journal_f.close()
+    for request_id in applied:
+        _reindex("requests", cache.data, request_id)
+    return cache.data
+
+def _store_index(store):
+    """Returns (index, records) for a JSON-backed store, rebuilding the index if it was reloaded."""
+    records = _load(store)
+    with _INDEXES_LOCK:
+        index, source = _INDEXES.get(store, (None, None))
+        if index is None or source is not records:
+            index = RecordIndex(records, by_user=(store != "users"))
+            _INDEXES[store] = (index, records)
+    return index, records
+
+def _store_queue():
+    """Returns (queue, requests) for the JSON-backed requests, rebuilding the queue if they were reloaded."""
+    global _QUEUE
+    requests = _load("requests")
+    with _INDEXES_LOCK:
+        queue, source = _QUEUE
+        if queue is None or source is not requests:
+            queue = WorkQueue(requests)
+            _QUEUE = (queue, requests)
+    return queue, requests
+
+def _reindex(store, records, key):
+    """Re-files a record in its store's index (and the work queue) after it changed in `records`."""
+    with _INDEXES_LOCK:
+        index, source = _INDEXES.get(store, (None, None))
+        if index is not None and source is records:
+            index.update(key, records.get(key))
+        queue, source = _QUEUE
+        if store == "requests" and queue is not None and source is records:
+            queue.update(key, records.get(key))
+
+def _persist_request(requests, request_id):
+    """Persists a single created, modified or deleted request."""
+    global _JOURNAL_OFFSET, _JOURNAL_INODE, _COMPACTION_THREAD
+    if STORAGE_MODE != "journal":
+        _save_data(requests)
+        return
+
+    journal_file = journal.journal_path(DATA_FILE)
+    with _JOURNAL_LOCK:
+        if request_id in requests:
+            start, end = journal.append_record(
+                journal_file, request_id, requests[request_id], DURABILITY["requests"],
+            )
+        else:
+            start, end = journal.append_delete(journal_file, request_id, DURABILITY["requests"])
+        # The change is already in the cache; skip re-reading it unless
+        # another process appended entries we have not applied yet.
+        if start == _JOURNAL_OFFSET:
+            _JOURNAL_OFFSET = end
+            _JOURNAL_INODE = fileio.file_signature(journal_file)[0]
+
+        if end >= JOURNAL_MAX_BYTES and (
+            _COMPACTION_THREAD is None or not _COMPACTION_THREAD.is_alive()
+        ):
+            _COMPACTION_THREAD = threading.Thread(
+                target=_compact_journal, name="journal-compaction", daemon=True
+            )
+            _COMPACTION_THREAD.start()
+
+def _compact_journal():
+    """Folds the applied journal entries into a fresh DATA_FILE snapshot."""
+    global _JOURNAL_OFFSET, _JOURNAL_INODE
+    data_file = DATA_FILE
+    journal_file = journal.journal_path(data_file)
+
+    # One compaction at a time across processes; writers only contend for
+    # the data file lock while the journal is read and trimmed.
+    with fileio.writer_lock(journal_file):
+        with fileio.writer_lock(data_file), _JOURNAL_LOCK:
+            data = _load_journaled_data()
+            if data is not _REQUESTS_CACHE.data:
+                # The snapshot could not be read; never overwrite it with a partial view.
+                return
+            payload = codec.encode(data)
+            compacted_offset = _JOURNAL_OFFSET
+
+        # Writing the snapshot happens outside the lock so writers can keep
+        # appending while it runs.
+        fileio.atomic_write_bytes(data_file, payload, DURABILITY["requests"])
+
+        with fileio.writer_lock(data_file), _JOURNAL_LOCK:
+            journal.drop_prefix(journal_file, compacted_offset, DURABILITY["requests"])
+            if data_file == _REQUESTS_CACHE.path:
+                _REQUESTS_CACHE.signature = fileio.file_signature(data_file)
+                _JOURNAL_OFFSET -= compacted_offset
+                journal_signature = fileio.file_signature(journal_file)
+                _JOURNAL_INODE = journal_signature[0] if journal_signature else None
 
-    if not os.path.exists(DATA_FILE):
-        _DATA_CACHE = {}
-        _DATA_MTIME = None
-        return _DATA_CACHE
+# ---------------------------------------------------------------------------
+# Record access
+# ---------------------------------------------------------------------------
+# The public functions below work on one of three stores ("requests",
+# "tutorials", "users") through these helpers, so the JSON files and the
+# SQLite database are interchangeable behind the same API.
+
+def _sqlite_store():
+    """Returns the SQLiteStore for the current SQLITE_FILE, opening it on first use."""
+    store = _SQLITE_STORES.get(SQLITE_FILE)
+    if store is None:
+        store = _SQLITE_STORES[SQLITE_FILE] = SQLiteStore(SQLITE_FILE, DURABILITY)
+    return store
+
+def _file_store():
+    """Returns the FileStore for the current FILES_DIR, opening it on first use."""
+    store = _FILE_STORES.get(FILES_DIR)
+    if store is None:
+        store = _FILE_STORES[FILES_DIR] = FileStore(FILES_DIR, DURABILITY)
+    return store
+
+def _media_store():
+    """Returns the MediaStore for the current MEDIA_DIR."""
+    store = _MEDIA_STORES.get(MEDIA_DIR)
+    if store is None:
+        store = _MEDIA_STORES[MEDIA_DIR] = MediaStore(MEDIA_DIR, DURABILITY["requests"])
+    return store
+
+def _document_store():
+    """Returns the SQLiteStore or FileStore behind the current mode, or None in the JSON modes."""
+    if STORAGE_MODE == "sqlite":
+        return _sqlite_store()
+    if STORAGE_MODE == "files":
+        return _file_store()
+    return None
+
+def _store_file(store):
+    """Returns the JSON file that backs a store."""
+    if store == "requests":
+        return DATA_FILE
+    if store == "users":
+        return USERS_FILE
+    return TUTORIALS_FILE
+
+def _load(store):
+    """
+    Loads every record of a JSON-backed store.
 
-    try:
-        current_mtime = os.path.getmtime(DATA_FILE)
-        if _DATA_CACHE is not None and _DATA_MTIME == current_mtime:
-            return _DATA_CACHE
-
-        with open(DATA_FILE, 'r') as f:
-            _DATA_CACHE = json.load(f)
-            _DATA_MTIME = current_mtime
-            return _DATA_CACHE
-    except (json.JSONDecodeError, OSError):
-        return {}
+    In files mode this returns the store's index entries instead (see
+    src/filestore.py), which carry every field the indexes and the work
+    queue need; use _resolve() to read the records themselves.
+    """
+    if STORAGE_MODE == "files":
+        stubs, _ = _file_store().sync(store, on_change=lambda stubs, key: _reindex(store, stubs, key))
+        return stubs
+    if store == "requests":
+        records = _load_data()
+    elif store == "users":
+        records = _load_users()
+    else:
+        records = _load_tutorials()
+    _overlay_unwritten(store, _store_file(store), records)
+    return records
+
+def _persist(store, records, key):
+    """
+    Persists a JSON-backed store after the record under `key` changed.
 
-def _save_data(data):
-    """Saves data to the JSON file and updates the cache."""
-    global _DATA_CACHE, _DATA_MTIME, _CACHED_DATA_FILE
-    with open(DATA_FILE, 'w') as f:
-        json.dump(data, f, indent=4)
+    With WRITE_DELAY_MS set, a store that is rewritten as a whole is written
+    later by the group-commit thread instead; the change is already visible
+    in `records`, the in-memory copy every reader shares.
+    """
+    _reindex(store, records, key)
+    if WRITE_DELAY_MS > 0 and not (store == "requests" and STORAGE_MODE == "journal"):
+        _defer_write(store, records, key)
+        return
+    _WRITES.last = _WRITTEN
+    if store == "requests":
+        _persist_request(records, key)
+    elif store == "users":
+        _save_users(records)
+    else:
+        _save_tutorials(records)
+
+def _cache(store):
+    """Returns the in-memory cache of a JSON-backed store."""
+    if store == "requests":
+        return _REQUESTS_CACHE
+    if store == "users":
+        return _USERS_CACHE
+    return _TUTORIALS_CACHE
+
+def _group_writer():
+    """Returns the group-commit writer, starting it on first use."""
+    global _WRITER
+    with _WRITER_LOCK:
+        if _WRITER is None:
+            _WRITER = GroupCommitWriter(_write_unwritten, WRITE_DELAY_MS / 1000)
+            atexit.register(_WRITER.close)
+        _WRITER.max_delay = WRITE_DELAY_MS / 1000
+        return _WRITER
+
+def _defer_write(store, records, key):
+    """Queues a changed record for the group-commit writer (called under the store's file lock)."""
+    path = _store_file(store)
+    with _WRITER_LOCK:
+        _UNWRITTEN.setdefault(path, {})[key] = records.get(key)
+    _WRITES.last = _group_writer().submit((store, path))
+
+def _overlay_unwritten(store, path, records):
+    """
+    Re-applies the changes still waiting for the group-commit writer to a
+    store, so they survive the cache being reloaded from disk before they
+    were written.
+    """
+    if not _UNWRITTEN.get(path):
+        return
+    with _WRITER_LOCK:
+        changes = list(_UNWRITTEN.get(path, {}).items())
+    for key, record in changes:
+        if record is None:
+            if records.pop(key, None) is not None:
+                _reindex(store, records, key)
+        elif records.get(key) is not record:
+            records[key] = record
+            _reindex(store, records, key)
+
+def _write_unwritten(tag):
+    """Writes one JSON store's deferred changes in a single rewrite (group-commit thread)."""
+    store, path = tag
+    cache = _cache(store)
+    with fileio.writer_lock(path):
+        if cache.path == path:
+            records = cache.load(path)
+        else:
+            # The process has moved on to another file; write this one without the cache
+            records = fileio.read_json(path) if os.path.exists(path) else {}
+        _overlay_unwritten(store, path, records)
+        if cache.path == path:
+            # Raises instead of replacing a file the cache could not read
+            cache.save(path, records, DURABILITY[store])
+        else:
+            fileio.atomic_write_json(path, records, DURABILITY[store])
+        # Writers hold the same file lock, so nothing was queued for this
+        # file since the overlay above.
+        with _WRITER_LOCK:
+            _UNWRITTEN.pop(path, None)
+
+def _resolve(store, records, keys):
+    """
+    Returns the (key, record) tuples for keys taken from a store's index.
 
-    # Update cache
-    _DATA_CACHE = data
-    _DATA_MTIME = os.path.getmtime(DATA_FILE)
-    _CACHED_DATA_FILE = DATA_FILE
+    In files mode `records` holds index entries, so each record is read from
+    its own file. Keys deleted in the meantime are skipped in every mode.
+    """
+    if STORAGE_MODE != "files":
+        pairs = ((k, records.get(k)) for k in keys)
+        return [(k, record) for k, record in pairs if record is not None]
+    get = _file_store().get
+    pairs = ((k, get(store, k)) for k in keys)
+    return [(k, record) for k, record in pairs if record is not None]
+
+def _get_record(store, key):
+    """Returns a single record, or None if it does not exist."""
+    docs = _document_store()
+    if docs is not None:
+        return docs.get(store, key)
+    return _load(store).get(key)
+
+def _all_records(store):
+    """Returns all records of a store as an {id: record} dict."""
+    docs = _document_store()
+    if docs is not None:
+        return docs.all(store)
+    return _load(store)
+
+def _put_record(store, key, record):
+    """Creates or replaces a record, giving it the next version number."""
+    docs = _document_store()
+    if docs is not None:
+        _WRITES.last = _WRITTEN
+        docs.put(store, key, record)
+        return
+    with fileio.writer_lock(_store_file(store)):
+        records = _load(store)
+        previous = records.get(key)
+        record['version'] = (version_of(previous) if previous is not None else 0) + 1
+        records[key] = record
+        _persist(store, records, key)
+
+def _insert_record(store, key, record):
+    """
+    Creates a record at version 1 unless its key is taken, atomically
+    across threads and processes.
 
-def create_request(data):
+    Returns:
+        bool: False if a record already exists under `key`.
     """
-    Creates a new diagnostic request.
+    docs = _document_store()
+    if docs is not None:
+        _WRITES.last = _WRITTEN
+        return docs.insert(store, key, record)
+    with fileio.writer_lock(_store_file(store)):
+        records = _load(store)
+        if key in records:
+            return False
+        record['version'] = 1
+        records[key] = record
+        _persist(store, records, key)
+    return True
+
+def _update_record(store, key, apply, expected_version=None):
+    """
+    Applies `apply(record)` to an existing record, bumps its version and persists it.
 
     Args:
-        data (dict): Dictionary containing car details and symptoms.
+        expected_version (int): Only apply the update if the record is still
+            at this version (the one the caller read), for callers that
+            computed the change from an earlier read.
 
     Returns:
-        str: The unique request ID.
+        dict: The updated record, or None if the key does not exist.
+
+    Raises:
+        VersionConflictError: If the record is at another version than
+            `expected_version`.
     """
-    requests = _load_data()
-    request_id = str(uuid.uuid4())
+    try:
+        docs = _document_store()
+        if docs is not None:
+            _WRITES.last = _WRITTEN
+            return docs.update(store, key, apply, expected_version)
+        # A JSON store is rewritten as a whole, so the check-and-write runs
+        # under that store's file lock.
+        with fileio.writer_lock(_store_file(store)):
+            records = _load(store)
+            record = records.get(key)
+            if record is None:
+                return None
+            version = version_of(record)
+            if expected_version is not None and version != expected_version:
+                raise VersionConflictError(store, key, expected_version, version)
+            apply(record)
+            record['version'] = version + 1
+            _persist(store, records, key)
+        return record
+    except VersionConflictError:
+        _count_conflict(store)
+        raise
+
+def _delete_record(store, key, expected_version=None):
+    """
+    Deletes a record. Returns True if it existed.
 
+    Raises:
+        VersionConflictError: If the record is at another version than
+            `expected_version`.
+    """
+    try:
+        docs = _document_store()
+        if docs is not None:
+            _WRITES.last = _WRITTEN
+            return docs.delete(store, key, expected_version)
+        with fileio.writer_lock(_store_file(store)):
+            records = _load(store)
+            if key not in records:
+                return False
+            version = version_of(records[key])
+            if expected_version is not None and version != expected_version:
+                raise VersionConflictError(store, key, expected_version, version)
+            del records[key]
+            _persist(store, records, key)
+        return True
+    except VersionConflictError:
+        _count_conflict(store)
+        raise
+
+def _count_conflict(store):
+    with _CONFLICTS_LOCK:
+        _CONFLICTS[store] += 1
+
+def _new_request_record(data):
+    """Fills in the bookkeeping fields shared by diagnostic and tutorial requests."""
+    created_ms = ids.now_ms()
+    # Time-ordered ID; requests stored earlier keep their uuid4 IDs
+    request_id = ids.uuid7(created_ms)
     data['request_id'] = request_id
-    data['timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    data['timestamp'] = ids.format_timestamp(created_ms)
+    data['timestamp_ms'] = created_ms
     data['status'] = 'pending'
     data['response'] = None
+    return request_id
 
-    requests[request_id] = data
-    _save_data(requests)
+def _complete_request(response_text):
+    """Returns an update that records an expert response and completes the request."""
+    def apply(record):
+        record['response'] = response_text
+        record['status'] = 'completed'
+        record['response_timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        record.pop('claimed_by', None)
+        record.pop('lease_expires_ms', None)
+    return apply
+
+def create_request(data):
+    """
+    Creates a new diagnostic request.
+
+    Args:
+        data (dict): Dictionary containing car details and symptoms.
+
+    Returns:
+        str: The unique request ID.
+    """
+    request_id = _new_request_record(data)
+    data['sla_deadline_ms'] = data['timestamp_ms'] + int(REQUEST_SLA_HOURS * 3600 * 1000)
+    # Checked symptoms as a bitmask of src/symptoms.py codes, for analytics
+    data['symptom_mask'] = symptoms.encode(data.get('symptoms'))
+    _put_record("requests", request_id, data)
     return request_id
 
 def get_request(request_id):
     """Retrieves a specific request by ID."""
-    requests = _load_data()
-    return requests.get(request_id)
+    return _get_record("requests", request_id)
 
 def get_all_requests():
     """Retrieves all requests."""
-    return _load_data()
+    return _all_records("requests")
+
+def get_requests_by_status(status):
+    """
+    Retrieves the requests with a given status (e.g. 'pending').
+
+    Uses the status index, so the cost scales with the number of matches
+    rather than the size of the store.
+
+    Returns:
+        dict: Matching requests keyed by request ID.
+    """
+    if STORAGE_MODE == "sqlite":
+        return _sqlite_store().query("requests", status=status)
+    index, requests = _store_index("requests")
+    return dict(_resolve("requests", requests, index.keys_with_status(status)))
+
+def get_requests_page(status=None, order='newest', offset=0, limit=20, user_email=None):
+    """
+    Retrieves one page of requests ordered by submission time.
 
-def update_request_response(request_id, response_text):
+    Backed by the timestamp-ordered index, so a page costs O(limit + log n)
+    instead of sorting every request.
+
+    Args:
+        status (str): Only include requests with this status (None for all).
+        order (str): 'newest' or 'oldest' first.
+        offset (int): Number of requests to skip.
+        limit (int): Maximum number of requests to return.
+        user_email (str): Only include requests submitted by this member.
+
+    Returns:
+        list: (request_id, request) tuples.
+    """
+    newest_first = _newest_first(order)
+    if STORAGE_MODE == "sqlite":
+        return _sqlite_store().page("requests", status, newest_first, offset, limit, user_email)
+    index, requests = _store_index("requests")
+    facet = _facet(status, user_email)
+    if facet is None:
+        keys = islice(_filtered_keys(index, requests, status, user_email, newest_first), offset, offset + limit)
+        return _resolve("requests", requests, keys)
+    return _resolve("requests", requests, index.page(facet, newest_first, offset, limit))
+
+def search_requests(query, status=None, order='newest', offset=0, limit=20):
+    """
+    Retrieves one page of the requests matching a search box query.
+
+    A request matches when its ID or one of REQUEST_SEARCH_FIELDS contains
+    the query (case-insensitive). Matching walks the timestamp-ordered index
+    and keeps only the requested page, so no more than `limit` records are
+    returned however many match.
+
+    Args:
+        query (str): Text to look for; blank matches every request.
+        status (str): Only include requests with this status (None for all).
+        order (str): 'newest' or 'oldest' first.
+        offset (int): Number of matches to skip.
+        limit (int): Maximum number of requests to return.
+
+    Returns:
+        tuple(int, list): (number of matches, (request_id, request) tuples)
+    """
+    text = (query or "").strip().lower()
+    if not text:
+        return count_requests(status), get_requests_page(status, order, offset, limit)
+    newest_first = _newest_first(order)
+    if STORAGE_MODE == "sqlite":
+        return _sqlite_store().search(
+            "requests", text, REQUEST_SEARCH_FIELDS, status, newest_first, offset, limit,
+        )
+    index, requests = _store_index("requests")
+    return _search_page(
+        "requests", requests, index.iter_keys(_facet(status), newest_first),
+        text, REQUEST_SEARCH_FIELDS, offset, limit,
+    )
+
+def get_requests_between(start, end, status=None):
+    """
+    Retrieves the requests submitted in a time window, oldest first.
+
+    Backed by the timestamp-ordered index, so the cost is O(log n + matches).
+    Requests stored before 'timestamp_ms' existed are placed by their
+    one-second 'timestamp' string.
+
+    Args:
+        start: Inclusive lower bound, as a datetime, a "%Y-%m-%d %H:%M:%S"
+            string (local time) or epoch milliseconds.
+        end: Exclusive upper bound, in the same forms.
+        status (str): Only include requests with this status (None for all).
+
+    Returns:
+        list: (request_id, request) tuples.
+    """
+    start_ms, end_ms = ids.to_ms(start), ids.to_ms(end)
+    if STORAGE_MODE == "sqlite":
+        return _sqlite_store().between("requests", start_ms, end_ms, status)
+    index, requests = _store_index("requests")
+    facet = ALL if status is None else ("status", status)
+    return _resolve("requests", requests, index.between(start_ms, end_ms, facet))
+
+def count_requests(status=None, user_email=None):
+    """Returns the number of requests, optionally restricted to a status and/or member."""
+    if STORAGE_MODE == "sqlite":
+        return _sqlite_store().count("requests", status, user_email)
+    index, requests = _store_index("requests")
+    facet = _facet(status, user_email)
+    if facet is None:
+        return sum(1 for _ in _filtered_keys(index, requests, status, user_email, False))
+    return index.count(facet)
+
+def _newest_first(order):
+    if order not in ('newest', 'oldest'):
+        raise ValueError(f"Unknown order: {order!r}")
+    return order == 'newest'
+
+def _facet(status=None, user_email=None):
+    """Returns the index facet for a status or user filter, or None when both are given."""
+    if status is not None and user_email is not None:
+        return None
+    if user_email is not None:
+        return ("user_email", user_email.strip().lower())
+    return ALL if status is None else ("status", status)
+
+def _filtered_keys(index, requests, status, user_email, newest_first):
+    """Yields a member's request keys with a given status, by filtering that member's facet."""
+    for key in index.iter_keys(("user_email", user_email.strip().lower()), newest_first):
+        record = requests.get(key)
+        if record is not None and record.get('status') == status:
+            yield key
+
+def _search_page(store, records, keys, text, fields, offset, limit):
+    """
+    Scans `keys` in order for records matching `text` and returns
+    (number of matches, the (key, record) tuples of the requested page).
+
+    In files mode every candidate record is read from its file, since the
+    index entries do not carry the searchable fields.
+    """
+    get = _file_store().get if STORAGE_MODE == "files" else (lambda _, key: records.get(key))
+    total, page = 0, []
+    for key in keys:
+        record = get(store, key)
+        if record is None or not _matches(key, record, text, fields):
+            continue
+        if offset <= total < offset + limit:
+            page.append((key, record))
+        total += 1
+    return total, page
+
+def _matches(key, record, text, fields):
+    if text in key.lower():
+        return True
+    return any(text in str(record.get(field) or "").lower() for field in fields)
+
+def update_request_response(request_id, response_text, expected_version=None):
     """
     Updates a request with the expert's diagnosis.
 
     Args:
         request_id (str): The ID of the request to update.
         response_text (str): The diagnosis/solution.
+        expected_version (int): Fail with VersionConflictError unless the
+            request is still at this version.
 
     Returns:
         bool: True if successful, False if request not found.
     """
-    requests = _load_data()
-    if request_id in requests:
-        requests[request_id]['response'] = response_text
-        requests[request_id]['status'] = 'completed'
-        requests[request_id]['response_timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        _save_data(requests)
-        return True
-    return False
+    return _update_record(
+        "requests", request_id, _complete_request(response_text), expected_version,
+    ) is not None
+
+class LeaseLostError(Exception):
+    """Raised when an expert acts on a request they no longer hold a claim on."""
+
+
+def _holds_claim(record, expert_id):
+    return record.get('status') == 'pending' and record.get('claimed_by') == expert_id
+
+def _claim(expert_id, now_ms, lease_ms):
+    """Returns an update that claims a pending request unless another expert holds a live lease."""
+    def apply(record):
+        if record.get('status') != 'pending' or (
+            record.get('claimed_by') not in (None, expert_id)
+            and record.get('lease_expires_ms', 0) > now_ms
+        ):
+            raise LeaseLostError("This request was claimed by another expert.")
+        record['claimed_by'] = expert_id
+        record['lease_expires_ms'] = now_ms + lease_ms
+    return apply
+
+def _next_claimable(now_ms):
+    """Returns the ID of the most urgent request nobody holds a live lease on, or None."""
+    if STORAGE_MODE == "sqlite":
+        return _sqlite_store().next_claimable("requests", now_ms)
+    queue, _ = _store_queue()
+    return queue.peek(now_ms)
+
+def claim_next_request(expert_id, lease_seconds=None):
+    """
+    Claims the most urgent pending request for an expert.
 
-def _load_tutorials():
-    """Loads all tutorial requests from the JSON file."""
-    if not os.path.exists(TUTORIALS_FILE):
-        return {}
+    Requests are served in SLA deadline order from the work queue (a heap,
+    or the SQLite queue index), so a claim costs O(log n). The claim is a
+    lease: unless renewed with renew_lease() or completed, the request
+    returns to the queue after `lease_seconds`. The claim itself is a
+    compare-and-set on the stored record, so two experts (or processes)
+    racing for the same request cannot both win it.
+
+    Args:
+        expert_id (str): Identifies the claiming expert.
+        lease_seconds (int): Lease length (default LEASE_SECONDS).
+
+    Returns:
+        tuple: (request_id, request), or None if no request is waiting.
+    """
+    lease_ms = (LEASE_SECONDS if lease_seconds is None else lease_seconds) * 1000
+    while True:
+        now_ms = ids.now_ms()
+        request_id = _next_claimable(now_ms)
+        if request_id is None:
+            return None
+        try:
+            record = _update_record("requests", request_id, _claim(expert_id, now_ms, lease_ms))
+        except LeaseLostError:
+            record = None
+        if record is not None:
+            return request_id, record
+        # Lost the race for this request (or it is gone): re-file it and try the next
+        if STORAGE_MODE != "sqlite":
+            queue, requests = _store_queue()
+            queue.update(request_id, requests.get(request_id))
+
+def renew_lease(request_id, expert_id, lease_seconds=None):
+    """
+    Extends an expert's claim on a request.
+
+    Returns:
+        int: The new lease expiry in epoch milliseconds.
+
+    Raises:
+        LeaseLostError: If the expert no longer holds the claim.
+    """
+    lease_ms = (LEASE_SECONDS if lease_seconds is None else lease_seconds) * 1000
+
+    def apply(record):
+        if not _holds_claim(record, expert_id):
+            raise LeaseLostError("Your claim on this request was lost.")
+        record['lease_expires_ms'] = ids.now_ms() + lease_ms
+    record = _update_record("requests", request_id, apply)
+    if record is None:
+        raise LeaseLostError("This request no longer exists.")
+    return record['lease_expires_ms']
+
+def release_request(request_id, expert_id):
+    """
+    Returns a claimed request to the work queue.
+
+    Returns:
+        bool: True if released, False if the expert did not hold the claim.
+    """
+    def apply(record):
+        if not _holds_claim(record, expert_id):
+            raise LeaseLostError("Your claim on this request was lost.")
+        record.pop('claimed_by')
+        record.pop('lease_expires_ms', None)
     try:
-        with open(TUTORIALS_FILE, 'r') as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        return {}
+        return _update_record("requests", request_id, apply) is not None
+    except LeaseLostError:
+        return False
+
+def complete_claimed_request(request_id, expert_id, response_text, expert_name=None):
+    """
+    Records an expert response on a request the expert has claimed.
+
+    Unlike update_request_response, this is a compare-and-set: it only
+    succeeds while the request is still pending and claimed by `expert_id`
+    (an expired lease nobody else has taken over still counts), so a second
+    expert cannot overwrite the first one's diagnosis. The response is
+    recorded as 'answered_by' `expert_name`, or `expert_id` if no name is given.
+
+    Returns:
+        dict: The completed request.
+
+    Raises:
+        LeaseLostError: If the request was completed or claimed by someone else.
+    """
+    complete = _complete_request(response_text)
+
+    def apply(record):
+        if not _holds_claim(record, expert_id):
+            raise LeaseLostError("This request was completed or claimed by another expert.")
+        complete(record)
+        record['answered_by'] = expert_name or expert_id
+    record = _update_record("requests", request_id, apply)
+    if record is None:
+        raise LeaseLostError("This request no longer exists.")
+    return record
+
+def _load_tutorials():
+    """Loads all tutorial requests from the JSON file with caching."""
+    return _TUTORIALS_CACHE.load(TUTORIALS_FILE)
 
 def _save_tutorials(data):
-    """Saves tutorial requests to the JSON file."""
-    with open(TUTORIALS_FILE, 'w') as f:
-        json.dump(data, f, indent=4)
+    """Atomically saves tutorial requests to the JSON file and updates the cache."""
+    _TUTORIALS_CACHE.save(TUTORIALS_FILE, data, DURABILITY["tutorials"])
 
 def create_tutorial_request(data):
     """
@@ -132,65 +954,429 @@ def create_tutorial_request(data):
     Returns:
         str: The unique tutorial request ID.
     """
-    requests = _load_tutorials()
-    request_id = str(uuid.uuid4())
-
-    data['request_id'] = request_id
-    data['timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    data['status'] = 'pending'
-    data['response'] = None
-
-    requests[request_id] = data
-    _save_tutorials(requests)
+    request_id = _new_request_record(data)
+    _put_record("tutorials", request_id, data)
     return request_id
 
 def get_tutorial_request(request_id):
     """Retrieves a specific tutorial request by ID."""
-    requests = _load_tutorials()
-    return requests.get(request_id)
+    return _get_record("tutorials", request_id)
 
 def get_all_tutorial_requests():
     """Retrieves all tutorial requests."""
-    return _load_tutorials()
+    return _all_records("tutorials")
 
-def update_tutorial_request_response(request_id, response_text):
+def update_tutorial_request_response(request_id, response_text, expected_version=None):
     """
     Updates a tutorial request with the expert's response/link.
 
     Args:
         request_id (str): The ID of the tutorial request to update.
         response_text (str): The response/tutorial link.
+        expected_version (int): Fail with VersionConflictError unless the
+            tutorial request is still at this version.
 
     Returns:
         bool: True if successful, False if request not found.
     """
-    requests = _load_tutorials()
-    if request_id in requests:
-        requests[request_id]['response'] = response_text
-        requests[request_id]['status'] = 'completed'
-        requests[request_id]['response_timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        _save_tutorials(requests)
-        return True
-    return False
+    return _update_record(
+        "tutorials", request_id, _complete_request(response_text), expected_version,
+    ) is not None
 
-def update_request_files(request_id, filenames):
+def update_request_files(request_id, filenames, expected_version=None):
     """
     Updates a request with uploaded file names.
 
     Args:
         request_id (str): The ID of the request to update.
         filenames (list): List of filenames uploaded.
+        expected_version (int): Fail with VersionConflictError unless the
+            request is still at this version.
 
     Returns:
         bool: True if successful, False if request not found.
     """
-    requests = _load_data()
-    if request_id in requests:
-        requests[request_id]['has_files'] = True
-        requests[request_id]['files'] = filenames
-        _save_data(requests)
+    def apply(record):
+        record['has_files'] = True
+        record['files'] = filenames
+        record.pop('files_error', None)
+    return _update_record("requests", request_id, apply, expected_version) is not None
+
+def attach_request_files(request_id, uploads):
+    """
+    Stores uploaded files in the media store and links them to a request.
+
+    Runs on the media worker threads: each file is streamed to disk in
+    chunks while it is hashed, so a large video neither blocks the
+    submitting session nor sits in memory twice. Identical files are stored
+    once. The request's 'files' list gets one entry per upload (name,
+    sha256, size, type); until then the expert view shows the upload as
+    in progress, and if storing fails the error is kept in 'files_error'.
+    The member's and the global media quotas are checked on the worker,
+    which reserves the size of the uploads before reading any of them (see
+    _reserve_media()); uploads that would exceed a quota are not stored and
+    the request gets a QuotaExceededError in 'files_error'.
+
+    Args:
+        request_id (str): The request the files belong to.
+        uploads (list): Binary file objects with a name, e.g. from st.file_uploader.
+
+    Returns:
+        Future: Resolves to True once the files are linked, or False if the
+            request no longer exists.
+    """
+    store = _media_store()
+
+    def ingest():
+        reservation = None
+        try:
+            record = _get_record("requests", request_id) or {}
+            sizes = [_upload_size(upload) for upload in uploads]
+            reservation = _reserve_media(record.get('user_email'), sum(sizes))
+            # Each upload may use no more than the size it was reserved for
+            files = [
+                store.put_upload(upload, limit=size if reservation else None)
+                for upload, size in zip(uploads, sizes)
+            ]
+        except (OSError, QuotaExceededError) as e:
+            _release_media(reservation)
+            _update_record("requests", request_id, lambda record: record.update(files_error=str(e)))
+            raise
+        try:
+            images = [entry for entry in files if derivatives.supported(entry)]
+            for entry in images:
+                entry['derivatives'] = {"status": "pending", "attempts": 0}
+            if not update_request_files(request_id, files):
+                return False
+        finally:
+            # Linked files count against the quotas from here on
+            _release_media(reservation)
+        pipeline = _derivative_pipeline() if images else None
+        for digest in dict.fromkeys(entry['sha256'] for entry in images):
+            pipeline.enqueue(request_id, digest)
         return True
-    return False
+    return media.submit(ingest)
+
+def _upload_size(upload):
+    """Returns the bytes left to read from an upload, from its 'size' or by seeking."""
+    size = getattr(upload, 'size', None)
+    if size is None:
+        position = upload.tell()
+        size = upload.seek(0, os.SEEK_END) - position
+        upload.seek(position)
+    return size
+
+def _reservations_file():
+    return os.path.join(MEDIA_DIR, "reservations.json")
+
+def _read_reservations():
+    """Returns the unexpired quota reservations as {token: {"email", "size", "expires_ms"}}."""
+    try:
+        reservations = fileio.read_json(_reservations_file())
+    except FileNotFoundError:
+        return {}
+    now = ids.now_ms()
+    return {token: held for token, held in reservations.items() if held['expires_ms'] > now}
+
+def _reserve_media(email, size):
+    """
+    Reserves `size` bytes of the media quotas for uploads about to be stored.
+
+    The check and the reservation run under the reservations file's writer
+    lock, and get_media_quota_left() subtracts the bytes still reserved, so
+    concurrent uploads (from any process) cannot together pass a quota.
+    A reservation is held until the files are linked to their request, or
+    for MEDIA_GC_GRACE_HOURS if its process dies first.
+
+    The member's usage, which reads all their requests, is counted before
+    the lock is taken. If the reservations file changed meanwhile, an upload
+    may have been linked and released in between, so it is counted again;
+    after RESERVE_ATTEMPTS tries it is counted under the lock.
+
+    Returns:
+        str: The reservation, for _release_media(), or None if no quota is set.
+
+    Raises:
+        QuotaExceededError: If `size` is more than is left.
+    """
+    if MEDIA_QUOTA_MB <= 0 and MEDIA_USER_QUOTA_MB <= 0:
+        return None
+    os.makedirs(MEDIA_DIR, exist_ok=True)
+    path = _reservations_file()
+    for _ in range(RESERVE_ATTEMPTS):
+        signature = fileio.file_signature(path)
+        used = _user_media_bytes(email) if MEDIA_USER_QUOTA_MB > 0 and email else 0
+        with fileio.writer_lock(path):
+            if fileio.file_signature(path) == signature:
+                return _add_reservation(email, size, used)
+    with fileio.writer_lock(path):
+        return _add_reservation(email, size)
+
+def _add_reservation(email, size, used=None):
+    """Checks the quotas and records a reservation. Runs under the reservations file's lock."""
+    reservations = _read_reservations()
+    left = _quota_left(email, reservations, used)
+    if size > left:
+        raise QuotaExceededError(left)
+    token = ids.uuid7()
+    reservations[token] = {
+        "email": (email or "").strip().lower(),
+        "size": size,
+        "expires_ms": ids.now_ms() + int(MEDIA_GC_GRACE_HOURS * 3600 * 1000),
+    }
+    fileio.atomic_write_json(_reservations_file(), reservations, DURABILITY["requests"])
+    return token
+
+def _release_media(reservation):
+    """Drops a quota reservation made by _reserve_media() (None is ignored)."""
+    if reservation is None:
+        return
+    with fileio.writer_lock(_reservations_file()):
+        reservations = _read_reservations()
+        if reservations.pop(reservation, None) is not None:
+            fileio.atomic_write_json(_reservations_file(), reservations, DURABILITY["requests"])
+
+def _derivative_pipeline():
+    """
+    Returns the derivative pipeline for the current MEDIA_DIR and
+    DERIVATIVE_JOBS_FILE, starting it on first use along with any jobs a
+    previous process left in the queue.
+    """
+    key = (MEDIA_DIR, DERIVATIVE_JOBS_FILE)
+    with _DERIVATIVES_LOCK:
+        pipeline = _DERIVATIVES.get(key)
+        if pipeline is None:
+            jobs = JobQueue(DERIVATIVE_JOBS_FILE, DURABILITY["requests"])
+            pipeline = _DERIVATIVES[key] = DerivativePipeline(_media_store(), jobs, _record_derivatives)
+            pipeline.resume()
+        return pipeline
+
+def _record_derivatives(request_id, digest, status):
+    """Records a derivative job's status on every file entry of the request with that digest."""
+    def apply(record):
+        for entry in record.get('files') or []:
+            if isinstance(entry, dict) and entry.get('sha256') == digest:
+                entry['derivatives'] = status
+    _update_record("requests", request_id, apply)
+
+def resume_derivative_jobs():
+    """
+    Restarts thumbnail and preview jobs that were queued or waiting for a
+    retry when the app last stopped. Does nothing once the pipeline runs,
+    or when Pillow is not installed.
+    """
+    if derivatives.Image is not None:
+        _derivative_pipeline()
+
+def wait_for_derivatives(timeout=None):
+    """
+    Blocks until every queued thumbnail and preview job has finished,
+    including the retries of failed ones.
+
+    Returns:
+        bool: False if `timeout` seconds passed first.
+    """
+    with _DERIVATIVES_LOCK:
+        pipelines = list(_DERIVATIVES.values())
+    return all(pipeline.wait(timeout) for pipeline in pipelines)
+
+def _user_media_bytes(email):
+    """
+    Returns the bytes of all files attached to a member's requests,
+    including the thumbnails and previews made of them.
+    """
+    total = 0
+    for record in get_user_requests(email).values():
+        for entry in record.get('files') or []:
+            if not isinstance(entry, dict):
+                continue
+            total += entry['size']
+            for derived in (entry.get('derivatives') or {}).values():
+                if isinstance(derived, dict) and 'size' in derived:
+                    total += derived['size']
+    return total
+
+def get_media_quota_left(email=None):
+    """
+    Returns how many bytes of uploads a member can still attach.
+
+    Args:
+        email (str): The member, or None to check the global quota only.
+
+    Returns:
+        int: The smaller of what is left of MEDIA_USER_QUOTA_MB and of
+            MEDIA_QUOTA_MB (never negative), or None if neither is set.
+            Bytes reserved by uploads still being stored count as used.
+    """
+    if MEDIA_QUOTA_MB <= 0 and (MEDIA_USER_QUOTA_MB <= 0 or not email):
+        return None
+    return _quota_left(email, _read_reservations())
+
+def _quota_left(email, reservations, used=None):
+    """
+    Returns the bytes left under both quotas, after the reserved bytes.
+    `used` is the member's usage if already counted (see _user_media_bytes()).
+    """
+    left = []
+    if MEDIA_QUOTA_MB > 0:
+        reserved = sum(held['size'] for held in reservations.values())
+        left.append(int(MEDIA_QUOTA_MB * 1024 * 1024) - _media_store().usage() - reserved)
+    if MEDIA_USER_QUOTA_MB > 0 and email:
+        email_key = email.strip().lower()
+        reserved = sum(held['size'] for held in reservations.values() if held['email'] == email_key)
+        if used is None:
+            used = _user_media_bytes(email)
+        left.append(int(MEDIA_USER_QUOTA_MB * 1024 * 1024) - used - reserved)
+    return max(min(left), 0) if left else float("inf")
+
+def _detach_media(reason):
+    """Returns an update that removes a request's files, recording why and when."""
+    def apply(record):
+        record['files_removed'] = {
+            "reason": reason,
+            "count": len(record.get('files') or []),
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        record['files'] = []
+    return apply
+
+def _media_expired(record, now_ms):
+    """Returns True if a completed request's media is past MEDIA_RETENTION_DAYS."""
+    if MEDIA_RETENTION_DAYS <= 0 or record.get('status') != 'completed' or not record.get('files'):
+        return False
+    try:
+        completed_ms = ids.to_ms(record.get('response_timestamp') or "")
+    except ValueError:
+        return False
+    return now_ms - completed_ms > MEDIA_RETENTION_DAYS * 86_400_000
+
+def _expire_media(key, record):
+    """Retention policy for the garbage collector: drops the media of an expired request."""
+    if not _media_expired(record, ids.now_ms()):
+        return False
+    # Checked again on the current record, which may have changed since the page was read
+    def apply(current):
+        if _media_expired(current, ids.now_ms()):
+            _detach_media("retention")(current)
+    updated = _update_record("requests", key, apply)
+    return updated is None or not updated.get('files')
+
+def _requests_oldest_first(offset, limit):
+    return get_requests_page(order='oldest', offset=offset, limit=limit)
+
+def _media_collector():
+    """Returns the MediaCollector for the current MEDIA_DIR."""
+    with _MEDIA_GC_LOCK:
+        collector = _MEDIA_COLLECTORS.get(MEDIA_DIR)
+        if collector is None:
+            collector = _MEDIA_COLLECTORS[MEDIA_DIR] = MediaCollector(
+                _media_store(), _requests_oldest_first, _expire_media, MEDIA_GC_GRACE_HOURS * 3600,
+            )
+        return collector
+
+def start_media_collector():
+    """
+    Starts the background garbage collection of media, unless
+    MEDIA_GC_INTERVAL is 0. Does nothing if it already runs.
+
+    Every MEDIA_GC_INTERVAL seconds a cycle applies the retention policy and
+    deletes media no request refers to any more, in slices of
+    MEDIA_GC_SLICE_MS separated by pauses four times as long, so it takes
+    at most a fifth of a core and never blocks a page for long.
+    """
+    if MEDIA_GC_INTERVAL <= 0:
+        return
+    with _MEDIA_GC_LOCK:
+        if MEDIA_DIR in _MEDIA_GC_RUNNING:
+            return
+        _MEDIA_GC_RUNNING.add(MEDIA_DIR)
+    slice_seconds = MEDIA_GC_SLICE_MS / 1000
+    run_periodically(_media_collector(), MEDIA_GC_INTERVAL, slice_seconds, 4 * slice_seconds)
+
+def collect_media():
+    """
+    Runs a full garbage collection cycle now.
+
+    Returns:
+        dict: The collector's totals (see get_media_stats()).
+    """
+    collector = _media_collector()
+    collector.collect()
+    return collector.stats()
+
+def get_media_stats():
+    """
+    Returns media storage figures for the admin area.
+
+    Returns:
+        dict: bytes (held by all blobs), quota_bytes (None without a global
+            quota), and the garbage collector's totals: cycles, removed,
+            freed_bytes, expired (requests whose media the retention policy
+            dropped) and live_bytes.
+    """
+    return {
+        "bytes": _media_store().usage(),
+        "quota_bytes": int(MEDIA_QUOTA_MB * 1024 * 1024) if MEDIA_QUOTA_MB > 0 else None,
+        **_media_collector().stats(),
+    }
+
+def get_media_path(digest):
+    """Returns the local path of a stored media file, by the sha256 recorded on its request."""
+    return _media_store().path(digest)
+
+def _media_server():
+    """Starts the media server on first use. Returns it, or False if the port is taken."""
+    global _MEDIA_SERVER
+    with _MEDIA_SERVER_LOCK:
+        if _MEDIA_SERVER is None:
+            try:
+                _MEDIA_SERVER = MediaServer(_media_store(), MEDIA_HOST, MEDIA_PORT)
+            except OSError:
+                # Usually another app process already serves the media on this port
+                _MEDIA_SERVER = False
+        return _MEDIA_SERVER
+
+def get_media_url(entry):
+    """
+    Returns a URL the browser can stream a request's file from, seeking
+    with range requests, or None if the media server is turned off.
+
+    Args:
+        entry (dict): One of the request's 'files' entries.
+    """
+    if not MEDIA_PORT:
+        return None
+    _media_server()
+    base = MEDIA_URL or f"http://localhost:{MEDIA_PORT}"
+    return f"{base.rstrip('/')}/media/{entry['sha256']}?type={quote(entry.get('type') or '')}"
+
+
+def read_media(entry):
+    """
+    Reads a request's file for sending through Streamlit, through a memory
+    map so only the file itself is paged in.
+
+    Returns:
+        bytes: The file, or None if it is larger than MEDIA_INLINE_MAX_MB.
+    """
+    if entry['size'] > MEDIA_INLINE_MAX_MB * 1024 * 1024:
+        return None
+    return download_media(entry)
+
+
+def download_media(entry):
+    """
+    Reads a request's file for a download, whatever its size.
+
+    Streamlit's download button holds the whole file in memory, so pass this
+    to it as a callable (e.g. functools.partial(download_media, entry)):
+    the file is then only read when the button is clicked, not on every
+    rerun that shows the button.
+
+    Returns:
+        bytes: The file.
+    """
+    return _media_store().read_range(entry['sha256'])
 
 
 # ---------------------------------------------------------------------------
@@ -199,52 +1385,31 @@ def update_request_files(request_id, filenames):
 
 def _load_users():
     """Loads all users from the JSON file with caching."""
-    global _USERS_CACHE, _USERS_MTIME, _CACHED_USERS_FILE
+    return _USERS_CACHE.load(USERS_FILE)
 
-    # Invalidate cache if filename has changed
-    if USERS_FILE != _CACHED_USERS_FILE:
-        _USERS_CACHE = None
-        _USERS_MTIME = None
-        _CACHED_USERS_FILE = USERS_FILE
 
-    if not os.path.exists(USERS_FILE):
-        _USERS_CACHE = {}
-        _USERS_MTIME = None
-        return _USERS_CACHE
+def _save_users(data):
+    """Atomically saves users data to the JSON file and updates the cache."""
+    _USERS_CACHE.save(USERS_FILE, data, DURABILITY["users"])
 
-    try:
-        current_mtime = os.path.getmtime(USERS_FILE)
-        if _USERS_CACHE is not None and _USERS_MTIME == current_mtime:
-            return _USERS_CACHE
-
-        with open(USERS_FILE, 'r') as f:
-            _USERS_CACHE = json.load(f)
-            _USERS_MTIME = current_mtime
-            return _USERS_CACHE
-    except (json.JSONDecodeError, OSError):
-        return {}
 
+# Shown when the hashing pool is saturated; the request can simply be retried
+BUSY_MESSAGE = "The service is busy right now. Please try again in a few seconds."
 
-def _save_users(data):
-    """Saves users data to the JSON file and updates the cache."""
-    global _USERS_CACHE, _USERS_MTIME, _CACHED_USERS_FILE
-    with open(USERS_FILE, 'w') as f:
-        json.dump(data, f, indent=4)
 
-    # Update cache
-    _USERS_CACHE = data
-    _USERS_MTIME = os.path.getmtime(USERS_FILE)
-    _CACHED_USERS_FILE = USERS_FILE
+def _hash_password(password, salt=None):
+    """
+    Returns (hex_hash, hex_salt) using PBKDF2-HMAC-SHA256.
 
+    The hash runs on the bounded hashing pool rather than the calling
+    script thread.
 
-def _hash_password(password, salt=None):
-    """Returns (hex_hash, hex_salt) using PBKDF2-HMAC-SHA256."""
+    Raises:
+        hashing.HashingBusyError: If the pool is saturated.
+    """
     if salt is None:
         salt = os.urandom(16).hex()
-    dk = hashlib.pbkdf2_hmac(
-        'sha256', password.encode('utf-8'), salt.encode('utf-8'), 600000
-    )
-    return dk.hex(), salt
+    return hashing.get_service().pbkdf2(password, salt, 600000), salt
 
 
 def create_user(email, password, name, dob, occupation):
@@ -254,12 +1419,16 @@ def create_user(email, password, name, dob, occupation):
     Returns:
         tuple(bool, str): (success, message)
     """
-    users = _load_users()
     email_key = email.lower().strip()
-    if email_key in users:
+    if _get_record("users", email_key) is not None:
         return False, "An account with this email already exists."
-    pw_hash, salt = _hash_password(password)
-    users[email_key] = {
+    try:
+        pw_hash, salt = _hash_password(password)
+    except hashing.HashingBusyError:
+        return False, BUSY_MESSAGE
+    # Checked again on insert: another signup for the same email may have
+    # been stored while the password was hashed.
+    created = _insert_record("users", email_key, {
         "email": email_key,
         "name": name.strip(),
         "dob": str(dob),
@@ -268,20 +1437,53 @@ def create_user(email, password, name, dob, occupation):
         "salt": salt,
         "status": "active",
         "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-    }
-    _save_users(users)
+    })
+    if not created:
+        return False, "An account with this email already exists."
     return True, "Account created successfully."
 
 
 def get_user(email):
     """Retrieves a user record by email (case-insensitive)."""
-    users = _load_users()
-    return users.get(email.lower().strip())
+    return _get_record("users", email.lower().strip())
 
 
 def get_all_users():
     """Retrieves all user records."""
-    return _load_users()
+    return _all_records("users")
+
+
+def get_users_page(status=None, search=None, offset=0, limit=20):
+    """
+    Retrieves one page of member accounts in registration order.
+
+    Served from the users index (or the SQLite timestamp index), so only the
+    requested page of records is returned. With a search query, accounts
+    whose email or one of USER_SEARCH_FIELDS contains it (case-insensitive)
+    are matched while walking the index.
+
+    Args:
+        status (str): Only include accounts with this status (None for all).
+        search (str): Text to look for; blank matches every account.
+        offset (int): Number of accounts to skip.
+        limit (int): Maximum number of accounts to return.
+
+    Returns:
+        tuple(int, list): (number of matching accounts, (email, user) tuples)
+    """
+    text = (search or "").strip().lower()
+    if STORAGE_MODE == "sqlite":
+        store = _sqlite_store()
+        if text:
+            return store.search("users", text, USER_SEARCH_FIELDS, status, False, offset, limit)
+        return store.count("users", status), store.page("users", status, False, offset, limit)
+    index, users = _store_index("users")
+    facet = _facet(status)
+    if text:
+        return _search_page(
+            "users", users, index.iter_keys(facet, False), text, USER_SEARCH_FIELDS, offset, limit,
+        )
+    return index.count(facet), _resolve("users", users, index.page(facet, False, offset, limit))
 
 
 def verify_user(email, password):
@@ -296,49 +1498,217 @@ def verify_user(email, password):
         return False, "No account found with this email address."
     if user.get('status') == 'paused':
         return False, "Your account has been suspended. Please contact support."
-    pw_hash, _ = _hash_password(password, user['salt'])
+    try:
+        pw_hash, _ = _hash_password(password, user['salt'])
+    except hashing.HashingBusyError:
+        return False, BUSY_MESSAGE
     if pw_hash == user['password_hash']:
         return True, "Login successful."
     return False, "Incorrect password."
 
 
-def update_user_status(email, status):
+def update_user_status(email, status, expected_version=None):
     """
     Sets the status of a user account ('active' or 'paused').
 
+    Args:
+        expected_version (int): Fail with VersionConflictError unless the
+            account is still at this version.
+
     Returns:
         bool: True if successful, False if user not found.
     """
-    users = _load_users()
-    email_key = email.lower().strip()
-    if email_key in users:
-        users[email_key]['status'] = status
-        _save_users(users)
-        return True
-    return False
+    def apply(user):
+        user['status'] = status
+    return _update_record("users", email.lower().strip(), apply, expected_version) is not None
 
 
-def delete_user(email):
+def delete_user(email, expected_version=None):
     """
     Permanently removes a user account.
 
+    The files attached to the member's requests are detached too, and the
+    media garbage collector deletes them once no other request refers to
+    them. The requests themselves are kept.
+
+    Args:
+        expected_version (int): Fail with VersionConflictError unless the
+            account is still at this version.
+
     Returns:
         bool: True if successful, False if user not found.
     """
-    users = _load_users()
     email_key = email.lower().strip()
-    if email_key in users:
-        del users[email_key]
-        _save_users(users)
-        return True
-    return False
+    if not _delete_record("users", email_key, expected_version):
+        return False
+    for request_id, record in get_user_requests(email_key).items():
+        if record.get('files'):
+            _update_record("requests", request_id, _detach_media("account deleted"))
+    return True
+
+
+def get_stats():
+    """
+    Returns the request and member counts shown in the admin Key Metrics panel.
+
+    The counts are materialised aggregates (the store indexes, or the
+    counters table in SQLite mode) kept up to date by every create, update
+    and delete, so this does not scan any records.
+
+    Returns:
+        dict: total_requests, pending_requests, completed_requests,
+            total_users, active_users and paused_users.
+    """
+    if STORAGE_MODE == "sqlite":
+        requests = _sqlite_store().counters("requests")
+        users = _sqlite_store().counters("users")
+    else:
+        requests = _store_index("requests")[0].counters()
+        users = _store_index("users")[0].counters()
+    return {
+        "total_requests": requests["total"],
+        "pending_requests": requests["by_status"].get("pending", 0),
+        "completed_requests": requests["by_status"].get("completed", 0),
+        "total_users": users["total"],
+        "active_users": users["by_status"].get("active", 0),
+        "paused_users": users["by_status"].get("paused", 0),
+    }
+
+
+def get_symptom_stats(by=()):
+    """
+    Returns how often each symptom was reported, overall or per vehicle.
+
+    Counts over the 'symptom_mask' kept with every request: in sqlite mode
+    in one aggregate query over the symptom_mask column, in files mode over
+    the index entries (which carry the mask and the vehicle), so records are
+    not read one by one. In the JSON modes the cached requests are counted
+    in one pass. Requests stored before masks were have theirs computed.
+
+    Args:
+        by (tuple): Request fields to group by, e.g. ("make",) or
+            ("make", "model", "year"); empty for one overall group.
+
+    Returns:
+        dict: {group: (requests, counts)}, where group is the tuple of the
+            `by` values (() overall) and counts lists the requests
+            reporting each symptom, indexed by symptom code.
+    """
+    by = tuple(by)
+    if STORAGE_MODE == "sqlite":
+        return _sqlite_store().symptom_counts("requests", by)
+    records = _load("requests")
+    if STORAGE_MODE == "files":
+        records = _symptom_entries(records, by)
+    else:
+        records = list(records.values())
+    masks = [symptoms.mask_of(record) for record in records]
+    groups = [tuple(record.get(field) for field in by) for record in records] if by else None
+    return symptoms.count(masks, groups)
+
+def _symptom_entries(stubs, by):
+    """
+    Returns the files-mode index entries of every request, reading the
+    record instead for entries written before they carried the mask (or a
+    grouped field the index does not keep).
+    """
+    indexed = all(field in INDEX_FIELDS for field in by)
+    get = _file_store().get
+    entries = []
+    for key, stub in list(stubs.items()):
+        if not indexed or 'symptom_mask' not in stub:
+            stub = get("requests", key)
+            if stub is None:
+                continue
+        entries.append(stub)
+    return entries
+
+
+def get_cache_stats():
+    """
+    Returns hit/miss counters of the in-memory caches of the JSON-backed stores.
+
+    Returns:
+        dict: {"requests" | "users" | "tutorials": {"hits", "misses", "hit_rate"}}
+    """
+    return {
+        "requests": _REQUESTS_CACHE.stats(),
+        "users": _USERS_CACHE.stats(),
+        "tutorials": _TUTORIALS_CACHE.stats(),
+    }
+
+
+def last_write():
+    """
+    Returns a Future that completes once the calling thread's most recent
+    create, update or delete is on disk.
+
+    Writes are synchronous unless DIAGNOSTICS_WRITE_DELAY_MS enables group
+    commit, so the future is usually already done. If the deferred write
+    fails, result() raises its exception.
+    """
+    return getattr(_WRITES, "last", _WRITTEN)
+
+
+def flush_writes(timeout=None):
+    """
+    Writes every change the group-commit thread is holding back, without
+    waiting for the end of its delay.
+
+    Returns:
+        bool: True if all of them reached the disk within `timeout` seconds.
+    """
+    writer = _WRITER
+    return True if writer is None else writer.flush(timeout)
+
+
+def get_write_stats():
+    """
+    Returns the group-commit counters: mutations handed to the writer, file
+    rewrites it performed, and mutations still waiting. Without batching
+    every mutation would have been a rewrite.
+
+    Returns:
+        dict: submitted, flushes and pending (all 0 while group commit is off).
+    """
+    writer = _WRITER
+    if writer is None:
+        return {"submitted": 0, "flushes": 0, "pending": 0}
+    return writer.stats()
+
+
+def get_hashing_stats():
+    """
+    Returns the password hashing pool's load: hashes running and waiting
+    now, the longest the queue has been, and how many hashes completed or
+    were turned away. Rising rejections mean logins and signups arrive
+    faster than the pool can hash them.
+
+    Returns:
+        dict: workers, max_queued, running, queued, peak_queued, completed,
+            rejected and timed_out (see hashing.HashingService.stats()).
+    """
+    return hashing.get_service().stats()
+
+
+def get_conflict_stats():
+    """
+    Returns how many conditional writes this process rejected per store
+    because the record had changed since it was read. Each one is an update
+    that would previously have been silently lost; a rising count means
+    sessions are contending for the same records.
+
+    Returns:
+        dict: {"requests" | "tutorials" | "users": int}
+    """
+    with _CONFLICTS_LOCK:
+        return dict(_CONFLICTS)
 
 
 def get_user_requests(email):
     """Returns all diagnostic requests submitted by a specific user."""
-    all_reqs = _load_data()
     email_key = email.lower().strip()
-    return {
-        k: v for k, v in all_reqs.items()
-        if v.get('user_email', '').lower() == email_key
-    }
+    if STORAGE_MODE == "sqlite":
+        return _sqlite_store().query("requests", user_email=email_key)
+    index, requests = _store_index("requests")
+    return dict(_resolve("requests", requests, index.keys_for_user(email_key)))
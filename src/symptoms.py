@@ -0,0 +1,167 @@
+try:
+    import numpy as np
+except ImportError:  # optional: analytics fall back to plain Python
+    np = None
+
+# Symptom categories, in the order the checklist shows them
+CATEGORIES = ("power", "tactile", "audible", "fuel", "visual", "temperature")
+
+# Every checklist symptom with its code, which is its bit in a request's
+# 'symptom_mask'. Masks are stored on requests, so codes must never be
+# renumbered or reused: add new symptoms at the end with the next code
+# (at most 64, the width of the masks in the vectorised path).
+# "other" is set when the category's free-text field was filled in.
+TAXONOMY = (
+    (0, "power", "loss_of_power"),
+    (1, "power", "intermittent_power_loss"),
+    (2, "power", "power_surges"),
+    (3, "power", "increased_power"),
+    (4, "power", "hesitation_lag"),
+    (5, "power", "no_change"),
+    (6, "power", "other"),
+    (7, "tactile", "vibration"),
+    (8, "tactile", "rough_engine"),
+    (9, "tactile", "pulling_to_side"),
+    (10, "tactile", "shaking"),
+    (11, "tactile", "jerking"),
+    (12, "tactile", "hunting"),
+    (13, "tactile", "stiff_controls"),
+    (14, "tactile", "no_change"),
+    (15, "tactile", "other"),
+    (16, "audible", "rattling"),
+    (17, "audible", "knocking"),
+    (18, "audible", "grinding"),
+    (19, "audible", "squealing"),
+    (20, "audible", "humming"),
+    (21, "audible", "clicking"),
+    (22, "audible", "no_change"),
+    (23, "audible", "other"),
+    (24, "fuel", "increased_consumption"),
+    (25, "fuel", "fuel_smell"),
+    (26, "fuel", "decreased_mileage"),
+    (27, "fuel", "fuel_leak"),
+    (28, "fuel", "difficulty_starting"),
+    (29, "fuel", "stalling"),
+    (30, "fuel", "no_change"),
+    (31, "fuel", "other"),
+    (32, "visual", "white_smoke"),
+    (33, "visual", "black_smoke"),
+    (34, "visual", "blue_smoke"),
+    (35, "visual", "warning_lights"),
+    (36, "visual", "fluid_leak"),
+    (37, "visual", "corrosion"),
+    (38, "visual", "no_change"),
+    (39, "visual", "other"),
+    (40, "temperature", "overheating"),
+    (41, "temperature", "running_hot"),
+    (42, "temperature", "running_cold"),
+    (43, "temperature", "ac_issues"),
+    (44, "temperature", "heater_issues"),
+    (45, "temperature", "no_change"),
+    (46, "temperature", "other"),
+)
+
+# (category, field) per code, and the reverse lookup
+SYMPTOMS = tuple((category, field) for _, category, field in sorted(TAXONOMY))
+CODES = {(category, field): code for code, category, field in TAXONOMY}
+
+
+def encode(symptoms):
+    """
+    Returns the bitmask of the symptoms reported on a request.
+
+    Args:
+        symptoms (dict | str): The request's 'symptoms' field. Free-text
+            symptoms (older requests) and unknown fields set no bits.
+
+    Returns:
+        int: The sum of 1 << code over every checked symptom.
+    """
+    if not isinstance(symptoms, dict):
+        return 0
+    mask = 0
+    for category in CATEGORIES:
+        values = symptoms.get(category)
+        if not isinstance(values, dict):
+            continue
+        for field, value in values.items():
+            code = CODES.get((category, field))
+            if code is not None and value:
+                mask |= 1 << code
+    return mask
+
+
+def decode(mask):
+    """Returns the (category, field) pairs of the symptoms set in a mask, by code."""
+    return [SYMPTOMS[code] for code in range(len(SYMPTOMS)) if mask >> code & 1]
+
+
+def mask_of(record):
+    """Returns a request's 'symptom_mask', computing it for requests stored before masks were."""
+    mask = record.get('symptom_mask')
+    return encode(record.get('symptoms')) if mask is None else mask
+
+
+def count(masks, groups=None):
+    """
+    Counts how many masks have each symptom set, per group.
+
+    Uses NumPy when it is installed: the masks are unpacked into an
+    (n, len(SYMPTOMS)) bit matrix and summed per group in one pass, with
+    the rows sorted by group and added up with np.add.reduceat. Without
+    NumPy the set bits of each mask are counted in plain Python.
+
+    Args:
+        masks (list): Symptom masks.
+        groups (list): Group of each mask (any hashable, e.g. a (make, model)
+            tuple), or None to count all masks as the single group ().
+
+    Returns:
+        dict: {group: (masks in the group, [count per symptom code])}
+    """
+    if groups is None:
+        groups = [()] * len(masks)
+    if not masks:
+        return {}
+    if np is None:
+        return _count_python(masks, groups)
+    return _count_numpy(masks, groups)
+
+
+def _count_python(masks, groups):
+    table = {}
+    for mask, group in zip(masks, groups):
+        entry = table.get(group)
+        if entry is None:
+            entry = table[group] = [0, [0] * len(SYMPTOMS)]
+        entry[0] += 1
+        counts = entry[1]
+        while mask:
+            low = mask & -mask
+            counts[low.bit_length() - 1] += 1
+            mask ^= low
+    return {group: (total, counts) for group, (total, counts) in table.items()}
+
+
+def _count_numpy(masks, groups):
+    n = len(masks)
+    # Little-endian bytes of each mask, unpacked least significant bit first,
+    # so column i of `bits` is symptom code i
+    as_bytes = np.asarray(masks, dtype="<u8").view(np.uint8).reshape(n, 8)
+    bits = np.unpackbits(as_bytes, axis=1, bitorder="little")[:, :len(SYMPTOMS)]
+
+    labels = {}
+    group_ids = np.fromiter(
+        (labels.setdefault(group, len(labels)) for group in groups), dtype=np.intp, count=n,
+    )
+    order = np.argsort(group_ids, kind="stable")
+    sorted_ids = group_ids[order]
+    starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+    counts = np.add.reduceat(bits[order], starts, axis=0, dtype=np.int64)
+    sizes = np.diff(np.r_[starts, n])
+
+    keys = list(labels)
+    return {
+        keys[group_id]: (int(size), row)
+        for group_id, size, row in zip(sorted_ids[starts].tolist(), sizes.tolist(), counts.tolist())
+    }
@@ -1,6 +1,8 @@
 import re
 from datetime import date, datetime
 
+from src.vehicles import SELECT_MAKE, SELECT_MODEL, get_catalog
+
 def validate_signup(name, email, password, dob, occupation):
     """
     Validates new member signup fields.
@@ -80,23 +82,40 @@ def validate_signup(name, email, password, dob, occupation):
 
     return errors
 
-def _validate_vehicle_details(make, model, year, mileage, vin, engine_type, transmission_type, fuel_type):
+def _validate_make_model(make, model):
     """
-    Validates the vehicle details for a diagnostic request.
+    Validates a make/model pair: required, length-limited, and listed in the
+    vehicle catalog (length is checked first so oversized input never
+    reaches the lookup).
     """
     errors = []
+    catalog = get_catalog()
 
     # Validate Make
-    if not make or make == "Select Make":
+    if not make or make == SELECT_MAKE:
         errors.append("Please select a Car Make from the dropdown.")
     elif len(make) > 50:
         errors.append("Car Make must be less than 50 characters.")
+    elif not catalog.is_valid_make(make):
+        errors.append("Please select a Car Make from the dropdown.")
 
     # Validate Model
-    if not model or model == "Select Model":
+    if not model or model == SELECT_MODEL:
         errors.append("Please select a Car Model from the dropdown.")
     elif len(model) > 50:
         errors.append("Car Model must be less than 50 characters.")
+    elif make and catalog.is_valid_make(make) and not catalog.is_valid_model(make, model):
+        errors.append(f"{model} is not a listed model for {make}. Choose it from the dropdown or select Other.")
+
+    return errors
+
+def _validate_vehicle_details(make, model, year, mileage, vin, engine_type, transmission_type, fuel_type):
+    """
+    Validates the vehicle details for a diagnostic request.
+    """
+    errors = []
+
+    errors.extend(_validate_make_model(make, model))
 
     # Validate Year
     if not isinstance(year, int) or year == 0 or year < 1980 or year > 2025:
@@ -257,17 +276,7 @@ def validate_tutorial_request(make, model, year, description, medium):
     """
     errors = []
 
-    # Validate Make
-    if not make or make == "Select Make":
-        errors.append("Please select a Car Make from the dropdown.")
-    elif len(make) > 50:
-        errors.append("Car Make must be less than 50 characters.")
-
-    # Validate Model
-    if not model or model == "Select Model":
-        errors.append("Please select a Car Model from the dropdown.")
-    elif len(model) > 50:
-        errors.append("Car Model must be less than 50 characters.")
+    errors.extend(_validate_make_model(make, model))
 
     # Validate Year
     if not isinstance(year, int) or year == 0 or year < 1980 or year > 2025:
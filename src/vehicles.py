@@ -0,0 +1,151 @@
+import json
+import os
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter
+
+# Versioned make -> models catalog shipped with the app
+CATALOG_FILE = os.getenv(
+    "DIAGNOSTICS_VEHICLE_CATALOG",
+    os.path.join(os.path.dirname(__file__), "data", "vehicle_catalog.json"),
+)
+
+# Placeholder and catch-all choices shown in the make/model dropdowns
+SELECT_MAKE = "Select Make"
+SELECT_MODEL = "Select Model"
+OTHER = "Other"
+
+
+def _normalise(text):
+    """Lower-cases text and collapses everything but letters and digits to single spaces."""
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", text.lower()).split())
+
+
+def _trigrams(text):
+    """Returns the set of word trigrams of normalised text, each word padded like pg_trgm."""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class VehicleCatalog:
+    """
+    Immutable make/model catalog with precomputed lookups.
+
+    Dropdown options and membership sets are built once, so every lookup is a
+    dict access. A trigram index and a sorted prefix list over "make model"
+    (and bare model) labels serve typeahead search without scanning every
+    variant.
+    """
+
+    def __init__(self, data):
+        self.version = data.get("version")
+        self.market = data.get("market")
+        makes = data["makes"]
+        self._makes = tuple(makes)
+        self._models = {make: tuple(models) for make, models in makes.items()}
+        self._model_sets = {make: frozenset(models) for make, models in makes.items()}
+        self._make_options = [SELECT_MAKE, *self._makes, OTHER]
+        self._model_options = {
+            make: [SELECT_MODEL, *models, OTHER] for make, models in self._models.items()
+        }
+        self._default_model_options = [SELECT_MODEL, OTHER]
+
+        # Search entries are (make, model) pairs; model is None for a bare make.
+        self._entries = []
+        self._postings = {}
+        prefixes = []
+        for make in self._makes:
+            for model in (None, *self._models[make]):
+                entry = len(self._entries)
+                self._entries.append((make, model))
+                label = _normalise(make if model is None else f"{make} {model}")
+                for gram in _trigrams(label):
+                    self._postings.setdefault(gram, []).append(entry)
+                prefixes.append((label, entry))
+                if model is not None:
+                    prefixes.append((_normalise(model), entry))
+        prefixes.sort()
+        self._prefix_labels = [label for label, _ in prefixes]
+        self._prefix_entries = [entry for _, entry in prefixes]
+
+    def makes(self):
+        """Returns the catalog makes in display order."""
+        return list(self._makes)
+
+    def models(self, make):
+        """Returns the models listed for a make (empty for unknown makes)."""
+        return list(self._models.get(make, ()))
+
+    def make_options(self):
+        """Returns the make dropdown choices: placeholder, every make, then 'Other'."""
+        return self._make_options
+
+    def model_options(self, make):
+        """Returns the model dropdown choices for a make: placeholder, its models, then 'Other'."""
+        return self._model_options.get(make, self._default_model_options)
+
+    def is_valid_make(self, make):
+        """Returns True for a catalog make or 'Other'."""
+        return make == OTHER or make in self._model_sets
+
+    def is_valid_model(self, make, model):
+        """Returns True if `model` is listed for `make`, or is 'Other'."""
+        return model == OTHER or model in self._model_sets.get(make, ())
+
+    def search(self, query, limit=10):
+        """
+        Returns up to `limit` (make, model) pairs matching a typed query,
+        best first; model is None when the match is a make on its own.
+
+        Labels starting with the query rank first; otherwise candidates are
+        ranked by the share of the query's trigrams they contain, which
+        tolerates typos and partial words ("hilx", "lan cruiser").
+        """
+        text = _normalise(query)
+        if not text:
+            return []
+        scores = Counter()
+        pos = bisect_left(self._prefix_labels, text)
+        while pos < len(self._prefix_labels) and self._prefix_labels[pos].startswith(text):
+            scores[self._prefix_entries[pos]] = 2.0
+            pos += 1
+
+        grams = _trigrams(text)
+        if len(text) >= 3 and grams:
+            shared = Counter()
+            for gram in grams:
+                shared.update(self._postings.get(gram, ()))
+            for entry, count in shared.items():
+                similarity = count / len(grams)
+                if similarity >= 0.5:
+                    scores[entry] = max(scores[entry], similarity)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self._sort_key(item[0])))
+        return [self._entries[entry] for entry, _ in ranked[:limit]]
+
+    def _sort_key(self, entry):
+        make, model = self._entries[entry]
+        return (model is not None, len(model or ""), make, model or "")
+
+
+_CATALOG = None
+_CATALOG_LOCK = threading.Lock()
+
+
+def load_catalog(path):
+    """Reads a catalog JSON file ({"version", "makes": {make: [models]}})."""
+    with open(path, encoding="utf-8") as f:
+        return VehicleCatalog(json.load(f))
+
+
+def get_catalog():
+    """Returns the process-wide catalog, loading CATALOG_FILE on first use."""
+    global _CATALOG
+    with _CATALOG_LOCK:
+        if _CATALOG is None:
+            _CATALOG = load_catalog(CATALOG_FILE)
+        return _CATALOG
@@ -0,0 +1,21 @@
+class VersionConflictError(Exception):
+    """
+    Raised by a conditional write when the stored record is no longer at the
+    version the caller read, i.e. applying the write would lose someone
+    else's update.
+    """
+
+    def __init__(self, store, key, expected, actual):
+        super().__init__(
+            f"{store} record {key!r} is at version {actual}, not {expected}; "
+            "it was changed by someone else."
+        )
+        self.store = store
+        self.key = key
+        self.expected = expected
+        self.actual = actual
+
+
+def version_of(record):
+    """Returns a record's version number; records stored before versioning are version 0."""
+    return record.get('version', 0)
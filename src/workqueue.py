@@ -0,0 +1,95 @@
+import threading
+from heapq import heapify, heappop, heappush
+
+from src.ids import record_ms
+
+
+def queue_fields(record):
+    """
+    Returns the (deadline_ms, lease_expires_ms) a record is queued under, or
+    None if it is not waiting for an expert.
+
+    Requests stored before SLA deadlines existed are due at submission, so
+    they rank by age ahead of newer requests. lease_expires_ms is None for
+    an unclaimed request.
+    """
+    if record is None or record.get('status') != 'pending':
+        return None
+    deadline = record.get('sla_deadline_ms') or record_ms(record)
+    lease = record.get('lease_expires_ms') if record.get('claimed_by') else None
+    return deadline, lease
+
+
+class WorkQueue:
+    """
+    Expert work queue over the pending records of a {key: record} dict.
+
+    Unclaimed records sit in a ready heap of (deadline_ms, seq, key) and
+    claimed ones in a lease heap of (lease_expires_ms, seq, key, deadline_ms);
+    leases that have run out are moved back to the ready heap when the queue
+    is next read. Heap entries are never removed in place: the queue
+    remembers each key's current entry and discards stale ones when they
+    reach the top, so both update() and peek() cost O(log n).
+    """
+
+    def __init__(self, records=None):
+        self._ready = []
+        self._leased = []
+        self._current = {}
+        self._next_seq = 0
+        self._lock = threading.Lock()
+        for key, record in list((records or {}).items()):
+            self.update(key, record)
+
+    def __len__(self):
+        return len(self._current)
+
+    def update(self, key, record):
+        """Re-files `key` after its record was created or changed; None removes it."""
+        fields = queue_fields(record)
+        with self._lock:
+            if fields is None:
+                self._current.pop(key, None)
+                return
+            deadline, lease = fields
+            current = self._current.get(key)
+            if lease is None:
+                if current is not None and len(current) == 3 and current[0] == deadline:
+                    return
+                entry = (deadline, self._seq(), key)
+                heappush(self._ready, entry)
+            else:
+                if current is not None and len(current) == 4 and current[0] == lease:
+                    return
+                entry = (lease, self._seq(), key, deadline)
+                heappush(self._leased, entry)
+            self._current[key] = entry
+            if len(self._ready) + len(self._leased) > 2 * len(self._current) + 64:
+                self._compact()
+
+    def peek(self, now_ms):
+        """Returns the key of the unclaimed record with the earliest deadline, or None."""
+        with self._lock:
+            while self._leased and self._leased[0][0] <= now_ms:
+                entry = heappop(self._leased)
+                if self._current.get(entry[2]) is entry:
+                    ready = (entry[3], self._seq(), entry[2])
+                    heappush(self._ready, ready)
+                    self._current[entry[2]] = ready
+            while self._ready:
+                entry = self._ready[0]
+                if self._current.get(entry[2]) is entry:
+                    return entry[2]
+                heappop(self._ready)
+            return None
+
+    def _seq(self):
+        self._next_seq += 1
+        return self._next_seq
+
+    def _compact(self):
+        """Drops stale heap entries once they outnumber the live ones."""
+        self._ready = [e for e in self._current.values() if len(e) == 3]
+        self._leased = [e for e in self._current.values() if len(e) == 4]
+        heapify(self._ready)
+        heapify(self._leased)
@@ -0,0 +1,41 @@
+import importlib
+import io
+import sys
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+class Upload(io.BytesIO):
+    """Stands in for a Streamlit UploadedFile, recording how it is read."""
+
+    def __init__(self, data, name, type=None):
+        super().__init__(data)
+        self.name = name
+        self.type = type
+        self.reads = []
+        self.read_bytes = 0
+
+    def read(self, size=-1):
+        self.reads.append((size, threading.current_thread().name))
+        chunk = super().read(size)
+        self.read_bytes += len(chunk)
+        return chunk
+
+
+@pytest.fixture
+def app_module():
+    """Imports app.py against a mocked Streamlit whose session_state is a real dict."""
+    st = MagicMock()
+    st.columns.side_effect = lambda spec: [MagicMock() for _ in range(spec if isinstance(spec, int) else len(spec))]
+    st.button.return_value = False
+    st.session_state = {"logged_in_user": {"name": "Test", "email": "test@example.com"}}
+    with patch.dict(sys.modules, {
+        "streamlit": st,
+        "src.storage": MagicMock(),
+        "src.validation": MagicMock(),
+    }):
+        import app
+        importlib.reload(app)
+        yield app, st.session_state
@@ -0,0 +1,86 @@
+import pytest
+import src.storage
+from src.storage import (
+    count_requests, create_request, create_user, get_requests_page, get_users_page,
+    search_requests, update_request_response, update_user_status,
+)
+
+
+@pytest.fixture(autouse=True)
+def mock_storage_path(tmp_path, monkeypatch):
+    """Fixture to use temporary files for storage during tests."""
+    monkeypatch.setattr(src.storage, "DATA_FILE", str(tmp_path / "test_diagnostics.json"))
+    monkeypatch.setattr(src.storage, "USERS_FILE", str(tmp_path / "test_users.json"))
+    monkeypatch.setattr(src.storage, "SQLITE_FILE", str(tmp_path / "test_diagnostics.db"))
+    monkeypatch.setattr(src.storage, "FILES_DIR", str(tmp_path / "records"))
+    # Hashing is not under test here
+    monkeypatch.setattr(src.storage, "_hash_password", lambda password, salt=None: ("hash", "salt"))
+
+
+@pytest.fixture(params=["json", "sqlite", "files"])
+def storage_mode(request, monkeypatch):
+    monkeypatch.setattr(src.storage, "STORAGE_MODE", request.param)
+    return request.param
+
+
+def _request(email, make, model, year=2015):
+    return create_request({"user_email": email, "make": make, "model": model, "year": year})
+
+
+def test_search_requests(storage_mode):
+    hilux = _request("ann@example.com", "Toyota", "Hilux")
+    civic = _request("bob@example.com", "Honda", "Civic", 2008)
+    corolla = _request("ann@example.com", "Toyota", "Corolla")
+    update_request_response(corolla, "done")
+
+    total, page = search_requests("toyota")
+    assert total == 2
+    assert [k for k, _ in page] == [corolla, hilux]
+    assert search_requests("TOYOTA", status="pending")[0] == 1
+    assert [k for k, _ in search_requests("bob@")[1]] == [civic]
+    assert [k for k, _ in search_requests("2008")[1]] == [civic]
+    assert [k for k, _ in search_requests(civic.upper())[1]] == [civic]
+    assert search_requests("100%")[0] == 0
+
+    total, page = search_requests("toyota", order="oldest", offset=1, limit=1)
+    assert total == 2 and [k for k, _ in page] == [corolla]
+
+    total, page = search_requests("  ", limit=2)
+    assert total == 3 and [k for k, _ in page] == [corolla, civic]
+
+
+def test_requests_page_for_member(storage_mode):
+    first = _request("ann@example.com", "Toyota", "Hilux")
+    _request("bob@example.com", "Honda", "Civic")
+    second = _request("ann@example.com", "Toyota", "Corolla")
+    update_request_response(first, "done")
+
+    page = get_requests_page(limit=5, user_email="Ann@example.com")
+    assert [k for k, _ in page] == [second, first]
+    assert count_requests(user_email="ann@example.com") == 2
+    assert count_requests("completed", user_email="ann@example.com") == 1
+    assert [k for k, _ in get_requests_page("pending", user_email="ann@example.com")] == [second]
+
+
+def test_users_page(storage_mode):
+    for i in range(5):
+        create_user(f"member{i}@example.com", "pw", f"Member {i}", "1990-01-01",
+                    "Mechanic" if i % 2 else "Driver")
+    update_user_status("member3@example.com", "paused")
+
+    total, page = get_users_page(limit=2)
+    assert total == 5
+    assert [email for email, _ in page] == ["member0@example.com", "member1@example.com"]
+    total, page = get_users_page(offset=4, limit=2)
+    assert [email for email, _ in page] == ["member4@example.com"]
+
+    total, page = get_users_page(status="paused")
+    assert total == 1 and page[0][1]["name"] == "Member 3"
+
+    total, page = get_users_page(search="mechanic")
+    assert total == 2
+    assert [email for email, _ in page] == ["member1@example.com", "member3@example.com"]
+    total, page = get_users_page(status="active", search="MECHANIC")
+    assert [email for email, _ in page] == ["member1@example.com"]
+    assert get_users_page(search="member2@")[0] == 1
+    assert get_users_page(search="nobody")[0] == 0
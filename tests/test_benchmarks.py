@@ -0,0 +1,66 @@
+import json
+
+import pytest
+import src.storage
+from benchmarks import bench_codec, bench_storage, datagen
+from src.validation import validate_input
+
+
+@pytest.fixture(autouse=True)
+def restore_storage(monkeypatch):
+    """The benchmark repoints the storage module; undo that after each test."""
+    for name in ("STORAGE_MODE", "DATA_FILE", "USERS_FILE", "TUTORIALS_FILE", "SQLITE_FILE", "FILES_DIR"):
+        monkeypatch.setattr(src.storage, name, getattr(src.storage, name))
+
+
+def test_generated_requests_match_app_shape():
+    data = datagen.generate(50, "hash", "salt", seed=1)
+    assert len(data["requests"]) == 50
+    assert len(data["users"]) == 10
+    assert len(data["tutorials"]) == 5
+
+    for request_id, record in data["requests"].items():
+        assert record["request_id"] == request_id
+        assert record["user_email"] in data["users"]
+        assert set(record["symptoms"]) == set(datagen.SYMPTOM_FLAGS) | {"additional_details"}
+        errors = validate_input(
+            record["make"], record["model"], record["year"], record["mileage"], record["vin"],
+            record["engine_type"], record["transmission_type"], record["fuel_type"],
+            record["last_service_date"], record["symptoms"], record["obd_codes"],
+        )
+        assert errors == []
+    assert list(data["requests"]) == sorted(data["requests"])
+
+
+def test_run_writes_comparable_results(tmp_path):
+    output = tmp_path / "results.json"
+    assert bench_storage.main([
+        "--sizes", "30", "--modes", "json", "sqlite", "files", "--repeat", "2",
+        "--output", str(output),
+    ]) == 0
+
+    report = json.loads(output.read_text())
+    ops = {(r["mode"], r["op"]) for r in report["results"]}
+    assert ("json", "get_all_requests_cold") in ops
+    assert ("sqlite", "verify_user") in ops
+    assert ("files", "get_request") in ops
+    assert ("json", "update_request_response@fsync-dir") in ops
+    assert ("sqlite", "update_user_status@none") in ops
+    assert report["meta"]["sizes"] == [30]
+
+    slower = json.loads(output.read_text())
+    for result in slower["results"]:
+        result["median_ms"] *= 2
+    assert len(bench_storage.compare(slower, report)) == len(report["results"])
+    assert bench_storage.compare(report, slower) == []
+
+
+def test_codec_benchmark_covers_every_encoding(tmp_path):
+    output = tmp_path / "codec.json"
+    assert bench_codec.main(["--sizes", "20", "--repeat", "2", "--output", str(output)]) == 0
+
+    report = json.loads(output.read_text())
+    sizes = {r["mode"]: r["bytes"] for r in report["results"] if r["op"] == "load"}
+    assert {"pretty", "json-stdlib"} <= set(sizes)
+    assert sizes["json-stdlib"] < sizes["pretty"]
+    assert {r["op"] for r in report["results"]} == {"save", "load"}
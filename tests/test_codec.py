@@ -0,0 +1,85 @@
+import json
+
+import pytest
+import src.storage
+from src import codec, convert, fileio
+from src.storage import create_request, get_request
+
+RECORDS = {
+    "r1": {"make": "Škoda", "symptoms": {"power": {"loss_of_power": True}}, "files": ["a.jpg"]},
+    "r2": {"make": "Ford", "year": 2015, "response": None},
+}
+
+
+@pytest.fixture(autouse=True)
+def mock_storage_path(tmp_path, monkeypatch):
+    """Fixture to use temporary files for storage during tests."""
+    monkeypatch.setattr(src.storage, "DATA_FILE", str(tmp_path / "test_diagnostics.json"))
+    monkeypatch.setattr(src.storage, "USERS_FILE", str(tmp_path / "test_users.json"))
+    monkeypatch.setattr(src.storage, "TUTORIALS_FILE", str(tmp_path / "test_tutorials.json"))
+    monkeypatch.setattr(src.storage, "STORAGE_MODE", "json")
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def json_library(request, monkeypatch):
+    if request.param == "orjson" and codec.orjson is None:
+        pytest.skip("orjson is not installed")
+    if request.param == "stdlib":
+        monkeypatch.setattr(codec, "orjson", None)
+    return request.param
+
+
+@pytest.mark.parametrize("encoding", ["pretty", "json", "msgpack"])
+def test_every_encoding_round_trips(tmp_path, json_library, encoding):
+    if encoding == "msgpack" and codec.msgpack is None:
+        pytest.skip("msgpack is not installed")
+    path = str(tmp_path / "data.json")
+    fileio.atomic_write_json(path, RECORDS, encoding=encoding)
+    assert fileio.read_json(path) == RECORDS
+    with open(path, "rb") as f:
+        assert codec.detect(f.read()) == encoding
+
+
+def test_minified_json_is_smaller_and_readable_by_stdlib(tmp_path, json_library):
+    pretty = codec.encode(RECORDS, "pretty")
+    compact = codec.encode(RECORDS, "json")
+    assert len(compact) < len(pretty)
+    assert json.loads(compact) == json.loads(pretty) == RECORDS
+
+
+def test_msgpack_falls_back_to_json_when_missing(monkeypatch):
+    monkeypatch.setattr(codec, "msgpack", None)
+    assert codec.resolve("msgpack") == "json"
+    assert codec.decode(codec.encode(RECORDS, "msgpack")) == RECORDS
+    with pytest.raises(json.JSONDecodeError):
+        codec.decode(b"\x81\xa1a\x01")
+    with pytest.raises(ValueError):
+        codec.resolve("yaml")
+
+
+def test_store_files_follow_the_configured_encoding(monkeypatch):
+    request_id = create_request({"make": "Toyota"})
+    with open(src.storage.DATA_FILE, "rb") as f:
+        assert codec.detect(f.read()) == "json"
+
+    monkeypatch.setattr(codec, "ENCODING", "pretty")
+    create_request({"make": "Honda"})
+    with open(src.storage.DATA_FILE, "rb") as f:
+        assert codec.detect(f.read()) == "pretty"
+    assert get_request(request_id)["make"] == "Toyota"
+
+
+def test_converter_rewrites_files_in_place(capsys):
+    fileio.atomic_write_json(src.storage.DATA_FILE, RECORDS, encoding="pretty")
+    fileio.atomic_write_json(src.storage.USERS_FILE, {}, encoding="pretty")
+
+    assert convert.main(["--to", "json"]) == 0
+    output = capsys.readouterr().out
+    assert "pretty -> json" in output
+    assert "test_tutorials.json: skipped" in output
+    with open(src.storage.DATA_FILE, "rb") as f:
+        assert codec.detect(f.read()) == "json"
+    assert fileio.read_json(src.storage.DATA_FILE) == RECORDS
+
+    before, old_size, new_size = convert.convert_file(src.storage.DATA_FILE, "pretty")
+    assert before == "json" and new_size > old_size
@@ -0,0 +1,120 @@
+import io
+import os
+
+import pytest
+import src.storage
+from conftest import Upload
+from src import derivatives
+from src.derivatives import JobQueue
+from src.storage import (
+    attach_request_files, create_request, get_media_path, get_request, resume_derivative_jobs,
+    wait_for_derivatives,
+)
+
+
+@pytest.fixture(autouse=True)
+def mock_storage_path(tmp_path, monkeypatch):
+    """Fixture to use temporary files for storage during tests."""
+    monkeypatch.setattr(src.storage, "DATA_FILE", str(tmp_path / "test_diagnostics.json"))
+    monkeypatch.setattr(src.storage, "MEDIA_DIR", str(tmp_path / "media"))
+    monkeypatch.setattr(src.storage, "DERIVATIVE_JOBS_FILE", str(tmp_path / "test_jobs.json"))
+    monkeypatch.setattr(src.storage, "STORAGE_MODE", "json")
+    monkeypatch.setattr(src.storage, "_DERIVATIVES", {})
+    monkeypatch.setattr(derivatives, "RETRY_SECONDS", 0.01)
+    yield
+    for pipeline in src.storage._DERIVATIVES.values():
+        pipeline.close()
+
+
+@pytest.fixture
+def renderer(monkeypatch):
+    """Stands in for Pillow: 'renders' by tagging the original bytes with the size."""
+    calls = []
+    failures = []
+
+    def render(path, max_side):
+        calls.append(max_side)
+        if failures:
+            raise OSError(failures.pop(0))
+        with open(path, "rb") as f:
+            return f.read() + f"@{max_side}".encode()
+
+    monkeypatch.setattr(derivatives, "Image", object())
+    monkeypatch.setattr(derivatives, "render", render)
+    return calls, failures
+
+
+def _attach(*uploads):
+    request_id = create_request({"make": "Toyota", "has_files": True})
+    assert attach_request_files(request_id, list(uploads)).result(timeout=10)
+    assert wait_for_derivatives(timeout=10)
+    return request_id, get_request(request_id)["files"]
+
+
+def test_thumbnail_and_preview_are_recorded_on_the_file(renderer):
+    request_id, files = _attach(
+        Upload(b"jpeg bytes", "engine.jpg", "image/jpeg"), Upload(b"wav bytes", "knock.wav"),
+    )
+    photo, audio = files
+    assert "derivatives" not in audio
+    status = photo["derivatives"]
+    assert status["status"] == "ready" and status["attempts"] == 1
+    for name, side in derivatives.SIZES.items():
+        assert status[name]["type"] == "image/jpeg"
+        with open(get_media_path(status[name]["sha256"]), "rb") as f:
+            assert f.read() == f"jpeg bytes@{side}".encode()
+    assert JobQueue(src.storage.DERIVATIVE_JOBS_FILE).all() == {}
+
+
+def test_failed_jobs_are_retried(renderer):
+    calls, failures = renderer
+    failures.append("truncated file")
+    _, files = _attach(Upload(b"jpeg bytes", "engine.jpg", "image/jpeg"))
+    status = files[0]["derivatives"]
+    assert status["status"] == "ready" and status["attempts"] == 2
+    assert len(calls) == 1 + len(derivatives.SIZES)
+
+
+def test_jobs_give_up_after_max_attempts(renderer, monkeypatch):
+    _, failures = renderer
+    monkeypatch.setattr(derivatives, "MAX_ATTEMPTS", 2)
+    failures.extend(["cannot identify image file"] * 2)
+    _, files = _attach(Upload(b"not an image", "engine.jpg", "image/jpeg"))
+    assert files[0]["derivatives"] == {
+        "status": "failed", "attempts": 2, "error": "cannot identify image file",
+    }
+    assert JobQueue(src.storage.DERIVATIVE_JOBS_FILE).all() == {}
+
+
+def test_queued_jobs_survive_a_restart(renderer):
+    store = src.storage._media_store()
+    digest, _, _ = store.put(io.BytesIO(b"jpeg bytes"))
+    request_id = create_request({"make": "Toyota", "has_files": True})
+    src.storage.update_request_files(request_id, [
+        {"name": "engine.jpg", "sha256": digest, "size": 10, "type": "image/jpeg",
+         "derivatives": {"status": "pending", "attempts": 0}},
+    ])
+    # Queued by a process that stopped before running it
+    JobQueue(src.storage.DERIVATIVE_JOBS_FILE).add(request_id, digest)
+
+    resume_derivative_jobs()
+    assert wait_for_derivatives(timeout=10)
+    assert get_request(request_id)["files"][0]["derivatives"]["status"] == "ready"
+
+
+def test_without_pillow_images_are_left_as_uploaded(monkeypatch):
+    monkeypatch.setattr(derivatives, "Image", None)
+    _, files = _attach(Upload(b"jpeg bytes", "engine.jpg", "image/jpeg"))
+    assert "derivatives" not in files[0]
+    assert not os.path.exists(src.storage.DERIVATIVE_JOBS_FILE)
+
+
+def test_render_downscales_to_jpeg(tmp_path):
+    if derivatives.Image is None:
+        pytest.skip("Pillow is not installed")
+    from PIL import Image
+
+    path = str(tmp_path / "photo.png")
+    Image.new("RGBA", (4000, 1000), (200, 30, 30, 255)).save(path)
+    with Image.open(io.BytesIO(derivatives.render(path, 320))) as thumb:
+        assert thumb.format == "JPEG" and thumb.size == (320, 80)
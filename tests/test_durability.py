@@ -0,0 +1,103 @@
+import os
+
+import pytest
+import src.storage
+from src import fileio, journal
+from src.sqlite_store import SQLiteStore
+from src.storage import create_request, create_tutorial_request, update_user_status
+
+
+@pytest.fixture
+def fsyncs(monkeypatch):
+    """Records what os.fsync is called on: 'file' or 'dir'."""
+    calls = []
+    real_fsync = os.fsync
+
+    def fsync(fd):
+        calls.append("dir" if os.path.isdir(f"/proc/self/fd/{fd}") else "file")
+        real_fsync(fd)
+
+    monkeypatch.setattr(os, "fsync", fsync)
+    return calls
+
+
+@pytest.fixture(autouse=True)
+def mock_storage_path(tmp_path, monkeypatch):
+    """Fixture to use temporary files for storage during tests."""
+    monkeypatch.setattr(src.storage, "DATA_FILE", str(tmp_path / "test_diagnostics.json"))
+    monkeypatch.setattr(src.storage, "USERS_FILE", str(tmp_path / "test_users.json"))
+    monkeypatch.setattr(src.storage, "TUTORIALS_FILE", str(tmp_path / "test_tutorials.json"))
+    monkeypatch.setattr(src.storage, "SQLITE_FILE", str(tmp_path / "test_diagnostics.db"))
+    monkeypatch.setattr(src.storage, "FILES_DIR", str(tmp_path / "records"))
+    monkeypatch.setattr(src.storage, "STORAGE_MODE", "json")
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc to tell files from directories")
+@pytest.mark.parametrize("durability, expected", [
+    ("none", []),
+    ("flush", []),
+    ("fsync", ["file"]),
+    ("fsync-dir", ["file", "dir"]),
+])
+def test_atomic_write_syncs_as_requested(tmp_path, fsyncs, durability, expected):
+    path = str(tmp_path / "data.json")
+    fileio.atomic_write_json(path, {"a": 1}, durability)
+    assert fileio.read_json(path) == {"a": 1}
+    assert fsyncs == expected
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc to tell files from directories")
+def test_journal_syncs_directory_only_when_created(tmp_path, fsyncs):
+    path = str(tmp_path / "data.json.journal")
+    journal.append_record(path, "a", {"n": 1}, "fsync-dir")
+    journal.append_record(path, "b", {"n": 2}, "fsync-dir")
+    assert fsyncs == ["file", "dir", "file"]
+
+
+def test_unknown_durability_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        fileio.atomic_write_json(str(tmp_path / "data.json"), {}, "always")
+    assert not os.listdir(tmp_path)
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc to tell files from directories")
+def test_each_store_uses_its_own_durability(monkeypatch, fsyncs):
+    monkeypatch.setitem(src.storage.DURABILITY, "requests", "fsync")
+    monkeypatch.setitem(src.storage.DURABILITY, "tutorials", "none")
+    create_request({"make": "Toyota"})
+    assert fsyncs == ["file"]
+    create_tutorial_request({"make": "Toyota"})
+    assert fsyncs == ["file"]
+
+
+def test_defaults_are_strict_for_users_and_relaxed_for_tutorials():
+    assert src.storage.DURABILITY["users"] == "fsync-dir"
+    assert src.storage.DURABILITY["tutorials"] == "flush"
+
+
+def test_sqlite_writes_use_the_table_synchronous_level(tmp_path):
+    store = SQLiteStore(str(tmp_path / "test.db"), {"users": "fsync", "tutorials": "none"})
+    conn = store._connect()
+
+    def level():
+        return conn.execute("PRAGMA synchronous").fetchone()[0]
+
+    store.put("users", "a@example.com", {"status": "active"})
+    assert level() == 2  # FULL
+    store.put("tutorials", "t1", {"status": "pending"})
+    assert level() == 0  # OFF
+    store.put("requests", "r1", {"status": "pending"})
+    assert level() == 1  # NORMAL
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc to tell files from directories")
+def test_file_store_syncs_record_and_index(monkeypatch, fsyncs):
+    monkeypatch.setattr(src.storage, "STORAGE_MODE", "files")
+    monkeypatch.setitem(src.storage.DURABILITY, "users", "fsync")
+    src.storage._file_store().put("users", "a@example.com", {"email": "a@example.com", "status": "active"})
+    assert fsyncs == ["file", "file"]
+
+    fsyncs.clear()
+    monkeypatch.setitem(src.storage.DURABILITY, "users", "fsync-dir")
+    assert update_user_status("a@example.com", "paused")
+    assert fsyncs == ["file", "dir", "file"]
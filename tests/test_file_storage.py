@@ -0,0 +1,115 @@
+import json
+import os
+
+import pytest
+import src.filestore
+import src.storage
+from src import fileio, journal
+from src.filestore import FileStore
+from src.migrate import migrate_json_to_files
+from src.storage import (
+    create_request, create_user, delete_user, get_request, get_requests_by_status,
+    get_user, update_request_response,
+)
+from src.versions import VersionConflictError
+
+
+@pytest.fixture(autouse=True)
+def files_mode(tmp_path, monkeypatch):
+    """Fixture to use a temporary directory in "files" mode during tests."""
+    monkeypatch.setattr(src.storage, "STORAGE_MODE", "files")
+    monkeypatch.setattr(src.storage, "DATA_FILE", str(tmp_path / "test_diagnostics.json"))
+    monkeypatch.setattr(src.storage, "USERS_FILE", str(tmp_path / "test_users.json"))
+    monkeypatch.setattr(src.storage, "TUTORIALS_FILE", str(tmp_path / "test_tutorials.json"))
+    monkeypatch.setattr(src.storage, "FILES_DIR", str(tmp_path / "records"))
+    monkeypatch.setattr(src.storage, "_hash_password", lambda password, salt=None: ("hash", "salt"))
+
+
+def test_each_record_is_its_own_file(tmp_path):
+    request_id = create_request({"make": "Toyota", "description": "Knocks when cold"})
+    store = src.storage._file_store()
+    path = store.record_path("requests", request_id)
+    assert os.path.dirname(os.path.dirname(path)) == str(tmp_path / "records" / "requests")
+    assert fileio.read_json(path)["make"] == "Toyota"
+    assert not os.path.exists(src.storage.DATA_FILE)
+
+    # The index holds only the listing fields, not the record body
+    entry = json.loads(open(store.index_path("requests")).readline())
+    assert entry["key"] == request_id
+    assert entry["value"]["status"] == "pending"
+    assert "description" not in entry["value"]
+
+
+def test_crud_and_listing():
+    first = create_request({"make": "Toyota"})
+    second = create_request({"make": "Honda"})
+    update_request_response(first, "Replace the spark plugs.")
+    assert get_request(first)["response"] == "Replace the spark plugs."
+    assert list(get_requests_by_status("pending")) == [second]
+    assert get_request("missing") is None
+
+    create_user("a@example.com", "pw", "A", "1990-01-01", "Driver")
+    assert get_user("a@example.com")["name"] == "A"
+    with pytest.raises(VersionConflictError):
+        delete_user("a@example.com", expected_version=2)
+    assert delete_user("a@example.com")
+    assert get_user("a@example.com") is None
+    assert not delete_user("a@example.com")
+
+
+def test_other_processes_writes_are_seen_incrementally(tmp_path):
+    root = str(tmp_path / "shared")
+    reader, writer = FileStore(root), FileStore(root)
+    writer.put("requests", "a", {"status": "pending"})
+    stubs, changed = reader.sync("requests")
+    assert changed == ["a"]
+
+    writer.put("requests", "b", {"status": "pending"})
+    writer.update("requests", "a", lambda record: record.update(status="completed"))
+    stubs, changed = reader.sync("requests")
+    assert changed == ["b", "a"]
+    assert stubs["a"]["status"] == "completed"
+    assert reader.get("requests", "a")["version"] == 2
+    assert reader.sync("requests")[1] == []
+
+
+def test_index_is_compacted_once_mostly_superseded(tmp_path, monkeypatch):
+    monkeypatch.setattr(src.filestore, "INDEX_COMPACT_MIN_ENTRIES", 10)
+    root = str(tmp_path / "shared")
+    store, other = FileStore(root), FileStore(root)
+    store.put("requests", "a", {"status": "pending"})
+    store.put("requests", "b", {"status": "pending"})
+    other.sync("requests")
+    for _ in range(12):
+        store.update("requests", "a", lambda record: record.update(hits=record.get("hits", 0) + 1))
+        store.sync("requests")
+
+    with open(store.index_path("requests")) as f:
+        assert len(f.readlines()) < 12
+    store.delete("requests", "b")
+    stubs, _ = other.sync("requests")
+    assert list(stubs) == ["a"]
+    assert other.get("requests", "a")["hits"] == 12
+
+
+def test_migration_copies_json_stores(tmp_path):
+    fileio.atomic_write_json(src.storage.DATA_FILE, {
+        "r1": {"request_id": "r1", "status": "pending", "version": 3},
+    })
+    journal.append_record(journal.journal_path(src.storage.DATA_FILE), "r2", {
+        "request_id": "r2", "status": "completed",
+    })
+    fileio.atomic_write_json(src.storage.USERS_FILE, {
+        "a@example.com": {"email": "a@example.com", "status": "active"},
+    })
+
+    counts = migrate_json_to_files(src.storage.FILES_DIR)
+    assert counts == {"requests": 2, "tutorials": 0, "users": 1}
+    assert get_request("r1")["version"] == 3
+    assert list(get_requests_by_status("completed")) == ["r2"]
+    assert get_user("a@example.com")["status"] == "active"
+
+    # Running it again leaves one index entry per record
+    migrate_json_to_files(src.storage.FILES_DIR)
+    with open(src.storage._file_store().index_path("requests")) as f:
+        assert len(f.readlines()) == 2
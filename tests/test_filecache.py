@@ -0,0 +1,95 @@
+import json
+import os
+
+import pytest
+import src.storage
+from src.filecache import CachedJSONFile, UnreadableFileError
+from src.storage import (
+    create_tutorial_request, get_tutorial_request, get_all_tutorial_requests,
+    get_cache_stats,
+)
+
+
+@pytest.fixture(autouse=True)
+def mock_storage_path(tmp_path, monkeypatch):
+    """Fixture to use a temporary file for storage during tests."""
+    monkeypatch.setattr(src.storage, "TUTORIALS_FILE", str(tmp_path / "test_tutorials.json"))
+    monkeypatch.setattr(src.storage, "_TUTORIALS_CACHE", CachedJSONFile())
+
+
+def _replace(path, data):
+    """Atomically replaces a file the way another process would."""
+    with open(path + ".new", "w") as f:
+        json.dump(data, f)
+    os.replace(path + ".new", path)
+
+
+def test_tutorial_reads_are_served_from_cache(monkeypatch):
+    request_id = create_tutorial_request({"topic": "Brakes"})
+
+    reads = []
+    real_read = src.filecache.fileio.read_json
+    monkeypatch.setattr(
+        src.filecache.fileio, "read_json", lambda path: reads.append(path) or real_read(path)
+    )
+    for _ in range(5):
+        assert get_tutorial_request(request_id)["topic"] == "Brakes"
+        assert request_id in get_all_tutorial_requests()
+
+    assert reads == []
+    assert get_cache_stats()["tutorials"]["hits"] >= 10
+
+
+def test_external_replacement_is_noticed():
+    request_id = create_tutorial_request({"topic": "Brakes"})
+    data = dict(get_all_tutorial_requests())
+    data[request_id] = dict(data[request_id], status="completed")
+    _replace(src.storage.TUTORIALS_FILE, data)
+
+    assert get_tutorial_request(request_id)["status"] == "completed"
+
+
+def test_filename_change_invalidates(tmp_path, monkeypatch):
+    request_id = create_tutorial_request({"topic": "Brakes"})
+    monkeypatch.setattr(src.storage, "TUTORIALS_FILE", str(tmp_path / "other.json"))
+    assert get_tutorial_request(request_id) is None
+
+
+def test_hit_miss_counters(tmp_path):
+    path = str(tmp_path / "data.json")
+    cache = CachedJSONFile()
+    _replace(path, {"a": 1})
+
+    assert cache.load(path) == {"a": 1}
+    assert cache.load(path) == {"a": 1}
+    _replace(path, {"a": 2})
+    assert cache.load(path) == {"a": 2}
+    assert cache.stats() == {"hits": 1, "misses": 2, "hit_rate": 1 / 3}
+
+
+def test_unparseable_file_keeps_last_good_copy(tmp_path):
+    path = str(tmp_path / "data.json")
+    cache = CachedJSONFile()
+    _replace(path, {"a": 1})
+    assert cache.load(path) == {"a": 1}
+
+    with open(path, "w") as f:
+        f.write("{not json")
+    assert cache.load(path) == {"a": 1}
+
+
+def test_unreadable_file_is_never_overwritten():
+    path = src.storage.TUTORIALS_FILE
+    with open(path, "w") as f:
+        f.write('{"t1": {"make": "Ford", "status": "pen')
+
+    assert get_all_tutorial_requests() == {}
+    with pytest.raises(UnreadableFileError):
+        create_tutorial_request({"make": "Toyota"})
+    with open(path) as f:
+        assert f.read() == '{"t1": {"make": "Ford", "status": "pen'
+
+    # Once the file is repaired, writes go through and keep its records
+    _replace(path, {"t1": {"make": "Ford", "status": "pending"}})
+    request_id = create_tutorial_request({"make": "Toyota"})
+    assert set(get_all_tutorial_requests()) == {"t1", request_id}
@@ -0,0 +1,108 @@
+import threading
+
+import pytest
+import src.storage
+from src import fileio
+from src.groupcommit import GroupCommitWriter
+from src.storage import (
+    create_request, create_user, delete_user, flush_writes, get_request, get_requests_by_status,
+    get_stats, get_user, get_write_stats, last_write, update_request_response,
+)
+
+
+@pytest.fixture(autouse=True)
+def group_commit(tmp_path, monkeypatch):
+    """Fixture to use temporary files and a group-commit writer that only flushes on demand."""
+    monkeypatch.setattr(src.storage, "DATA_FILE", str(tmp_path / "test_diagnostics.json"))
+    monkeypatch.setattr(src.storage, "USERS_FILE", str(tmp_path / "test_users.json"))
+    monkeypatch.setattr(src.storage, "STORAGE_MODE", "json")
+    monkeypatch.setattr(src.storage, "_hash_password", lambda password, salt=None: ("hash", "salt"))
+    monkeypatch.setattr(src.storage, "WRITE_DELAY_MS", 60_000)
+    monkeypatch.setattr(src.storage, "_WRITER", None)
+    monkeypatch.setattr(src.storage, "_UNWRITTEN", {})
+    yield
+    if src.storage._WRITER is not None:
+        src.storage._WRITER.close()
+
+
+def test_writer_coalesces_a_batch_into_one_flush_per_tag():
+    flushed = []
+    writer = GroupCommitWriter(flushed.append, max_delay=60)
+    futures = [writer.submit("a"), writer.submit("b"), writer.submit("a")]
+    assert not any(f.done() for f in futures)
+    assert writer.flush(timeout=5)
+    assert sorted(flushed) == ["a", "b"]
+    assert all(f.result() is None for f in futures)
+    assert writer.stats() == {"submitted": 3, "flushes": 2, "pending": 0}
+    writer.close()
+
+
+def test_writer_flushes_after_max_delay_and_on_close():
+    flushed = threading.Event()
+    writer = GroupCommitWriter(lambda tag: flushed.set(), max_delay=0.01)
+    writer.submit("a").result(timeout=5)
+    assert flushed.is_set()
+
+    closing = GroupCommitWriter(lambda tag: None, max_delay=60)
+    future = closing.submit("a")
+    closing.close(timeout=5)
+    assert future.done()
+    with pytest.raises(RuntimeError):
+        closing.submit("a")
+    writer.close()
+
+
+def test_writer_reports_flush_errors_to_the_batch():
+    def flush(tag):
+        raise OSError("disk full")
+
+    writer = GroupCommitWriter(flush, max_delay=60)
+    future = writer.submit("a")
+    writer.flush(timeout=5)
+    with pytest.raises(OSError):
+        future.result()
+    writer.close()
+
+
+def test_mutations_are_visible_before_they_are_written():
+    first = create_request({"make": "Toyota"})
+    second = create_request({"make": "Honda"})
+    update_request_response(first, "Replace the spark plugs.")
+    create_user("a@example.com", "pw", "A", "1990-01-01", "Driver")
+
+    assert get_request(first)["status"] == "completed"
+    assert list(get_requests_by_status("pending")) == [second]
+    assert get_stats()["total_users"] == 1
+    assert not last_write().done()
+    assert fileio.file_signature(src.storage.DATA_FILE) is None
+
+    assert flush_writes(timeout=5)
+    assert last_write().done()
+    assert set(fileio.read_json(src.storage.DATA_FILE)) == {first, second}
+    assert "a@example.com" in fileio.read_json(src.storage.USERS_FILE)
+    # Four mutations, one rewrite per file
+    assert get_write_stats() == {"submitted": 4, "flushes": 2, "pending": 0}
+
+
+def test_unwritten_changes_survive_a_reload_from_disk():
+    request_id = create_request({"make": "Toyota"})
+    create_user("a@example.com", "pw", "A", "1990-01-01", "Driver")
+    assert delete_user("a@example.com")
+    # Another process rewrites the file before our batch is flushed
+    fileio.atomic_write_json(src.storage.DATA_FILE, {"other": {"status": "pending"}})
+
+    assert get_request(request_id)["make"] == "Toyota"
+    assert len(get_requests_by_status("pending")) == 2
+    assert get_user("a@example.com") is None
+
+    flush_writes(timeout=5)
+    assert set(fileio.read_json(src.storage.DATA_FILE)) == {"other", request_id}
+    assert fileio.read_json(src.storage.USERS_FILE) == {}
+
+
+def test_writes_are_synchronous_without_a_delay(monkeypatch):
+    monkeypatch.setattr(src.storage, "WRITE_DELAY_MS", 0)
+    request_id = create_request({"make": "Toyota"})
+    assert last_write().done()
+    assert request_id in fileio.read_json(src.storage.DATA_FILE)
+    assert src.storage._WRITER is None
@@ -0,0 +1,104 @@
+import hashlib
+import threading
+import time
+
+import pytest
+import src.storage
+from src import hashing
+from src.storage import BUSY_MESSAGE, create_user, get_hashing_stats, verify_user
+
+
+@pytest.fixture(autouse=True)
+def mock_storage_path(tmp_path, monkeypatch):
+    """Fixture to use a temporary file for storage during tests."""
+    monkeypatch.setattr(src.storage, "USERS_FILE", str(tmp_path / "test_users.json"))
+
+
+@pytest.fixture
+def blocked_service(monkeypatch):
+    """A one-worker, one-slot-queue service whose hashes wait for `release`."""
+    release = threading.Event()
+    real_pbkdf2 = hashlib.pbkdf2_hmac
+
+    def slow_pbkdf2(*args):
+        release.wait(5)
+        return real_pbkdf2(*args)
+
+    monkeypatch.setattr(hashing.hashlib, "pbkdf2_hmac", slow_pbkdf2)
+    service = hashing.HashingService(max_workers=1, max_queued=1, timeout=5)
+    monkeypatch.setattr(hashing, "_SERVICE", service)
+    yield service, release
+    release.set()
+
+
+def test_matches_direct_pbkdf2():
+    service = hashing.HashingService(max_workers=2, max_queued=2)
+    expected = hashlib.pbkdf2_hmac('sha256', b"pw", b"salt", 1000).hex()
+    assert service.pbkdf2("pw", "salt", 1000) == expected
+    assert service.stats()["completed"] == 1
+
+
+def test_overload_is_rejected_fast(blocked_service):
+    service, release = blocked_service
+    results = []
+    callers = [
+        threading.Thread(target=lambda: results.append(service.pbkdf2("pw", "salt", 1000)))
+        for _ in range(2)
+    ]
+    # Start the second caller only once the first is running on the worker,
+    # so exactly one hash is ever queued.
+    deadline = time.monotonic() + 5
+    for expected in ((1, 0), (1, 1)):
+        callers[expected[1]].start()
+        while (service.stats()["running"], service.stats()["queued"]) != expected:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+
+    start = time.monotonic()
+    with pytest.raises(hashing.HashingBusyError):
+        service.pbkdf2("pw", "salt", 1000)
+    assert time.monotonic() - start < 0.5
+
+    release.set()
+    for caller in callers:
+        caller.join(5)
+    stats = service.stats()
+    assert len(results) == 2
+    assert stats["rejected"] == 1
+    assert stats["peak_queued"] == 1
+    assert stats["queued"] == 0 and stats["running"] == 0
+
+
+def test_admin_stats_report_the_queue_depth(blocked_service):
+    service, release = blocked_service
+    caller = threading.Thread(target=service.pbkdf2, args=("pw", "salt", 1000))
+    caller.start()
+    deadline = time.monotonic() + 5
+    while get_hashing_stats()["running"] != 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    stats = get_hashing_stats()
+    assert (stats["workers"], stats["max_queued"], stats["running"], stats["queued"]) == (1, 1, 1, 0)
+    release.set()
+    caller.join(5)
+    assert get_hashing_stats()["completed"] == 1
+
+
+def test_timeout_degrades_to_busy(blocked_service):
+    service, _ = blocked_service
+    service.timeout = 0.05
+    with pytest.raises(hashing.HashingBusyError):
+        service.pbkdf2("pw", "salt", 1000)
+    assert service.stats()["timed_out"] == 1
+
+
+def test_login_and_signup_report_busy(monkeypatch):
+    assert create_user("a@example.com", "Password1", "A", "1990-01-01", "Mechanic")[0]
+
+    service = hashing.HashingService(max_workers=1, max_queued=0)
+    monkeypatch.setattr(hashing, "_SERVICE", service)
+    monkeypatch.setattr(service._slots, "acquire", lambda blocking=True: False)
+
+    assert verify_user("a@example.com", "Password1") == (False, BUSY_MESSAGE)
+    assert create_user("b@example.com", "Password1", "B", "1990-01-01", "Mechanic") == (
+        False, BUSY_MESSAGE,
+    )
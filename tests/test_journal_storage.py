@@ -0,0 +1,110 @@
+import json
+import pytest
+import src.storage
+from src import fileio, journal
+from src.storage import create_request, get_request, update_request_response, get_all_requests, update_request_files
+
+
+@pytest.fixture(autouse=True)
+def journal_mode(tmp_path, monkeypatch):
+    """Run storage in journal mode against a temporary data file."""
+    monkeypatch.setattr(src.storage, "DATA_FILE", str(tmp_path / "test_diagnostics.json"))
+    monkeypatch.setattr(src.storage, "STORAGE_MODE", "journal")
+
+
+def _reset_cache():
+    """Forget the in-memory state so the next load rebuilds from disk."""
+    src.storage._REQUESTS_CACHE.bind(None)
+
+
+def test_create_request_appends_to_journal_only():
+    request_id = create_request({"make": "Toyota", "model": "Camry"})
+
+    journal_file = journal.journal_path(src.storage.DATA_FILE)
+    with open(journal_file) as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])["key"] == request_id
+    # No snapshot is written until the journal is compacted
+    assert not (src.storage.os.path.exists(src.storage.DATA_FILE))
+
+
+def test_state_rebuilt_from_journal():
+    request_id = create_request({"make": "Ford", "model": "Focus"})
+    update_request_response(request_id, "Replace the spark plugs.")
+    update_request_files(request_id, ["engine.mp4"])
+
+    _reset_cache()
+    req = get_request(request_id)
+    assert req["status"] == "completed"
+    assert req["response"] == "Replace the spark plugs."
+    assert req["files"] == ["engine.mp4"]
+
+
+def test_compaction_writes_snapshot_and_truncates_journal():
+    first = create_request({"make": "Honda", "model": "Civic"})
+    second = create_request({"make": "Mazda", "model": "3"})
+
+    src.storage._compact_journal()
+
+    with open(src.storage.DATA_FILE) as f:
+        snapshot = json.load(f)
+    assert set(snapshot) == {first, second}
+    assert journal.size(journal.journal_path(src.storage.DATA_FILE)) == 0
+
+    # Writes after compaction land in the journal tail on top of the snapshot
+    update_request_response(first, "Check the battery.")
+    _reset_cache()
+    all_reqs = get_all_requests()
+    assert len(all_reqs) == 2
+    assert all_reqs[first]["response"] == "Check the battery."
+
+
+def test_compaction_while_a_reader_loads_the_snapshot_loses_nothing(monkeypatch):
+    first = create_request({"make": "Honda", "model": "Civic"})
+    src.storage._compact_journal()
+    second = create_request({"make": "Mazda", "model": "3"})
+    _reset_cache()
+
+    data_file = src.storage.DATA_FILE
+    journal_file = journal.journal_path(data_file)
+    read_json = fileio.read_json
+    compacted = []
+
+    def read_during_compaction(path):
+        data = read_json(path)
+        if path == data_file and not compacted:
+            # Another process folds the journal into a new snapshot and
+            # trims it, right after this reader read the old snapshot
+            compacted.append(True)
+            state = dict(data)
+            journal.replay(journal_file, state)
+            fileio.atomic_write_json(data_file, state)
+            fileio.atomic_write_bytes(journal_file, b"")
+        return data
+
+    monkeypatch.setattr(fileio, "read_json", read_during_compaction)
+    assert set(get_all_requests()) == {first, second}
+    assert compacted
+
+
+def test_background_compaction_triggered_by_size(monkeypatch):
+    monkeypatch.setattr(src.storage, "JOURNAL_MAX_BYTES", 1)
+    request_id = create_request({"make": "Kia", "model": "Rio"})
+
+    src.storage._COMPACTION_THREAD.join(timeout=5)
+
+    with open(src.storage.DATA_FILE) as f:
+        assert request_id in json.load(f)
+    assert get_request(request_id)["make"] == "Kia"
+
+
+def test_torn_journal_tail_is_ignored():
+    request_id = create_request({"make": "Subaru", "model": "WRX"})
+    journal_file = journal.journal_path(src.storage.DATA_FILE)
+    with open(journal_file, "a") as f:
+        f.write('{"op": "put", "key": "half-writ')
+
+    _reset_cache()
+    all_reqs = get_all_requests()
+    assert list(all_reqs) == [request_id]
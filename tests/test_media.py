@@ -0,0 +1,189 @@
+import hashlib
+import io
+import os
+import urllib.error
+import urllib.request
+
+import pytest
+import src.storage
+from conftest import Upload
+from src.media import MediaStore
+from src.mediaserver import MediaServer, parse_range
+from src.storage import (
+    attach_request_files, create_request, download_media, get_media_path, get_media_url, get_request,
+    read_media,
+)
+
+
+class BrokenUpload(Upload):
+    def read(self, size=-1):
+        raise OSError("connection reset")
+
+
+@pytest.fixture(autouse=True)
+def mock_storage_path(tmp_path, monkeypatch):
+    """Fixture to use temporary files for storage during tests."""
+    monkeypatch.setattr(src.storage, "DATA_FILE", str(tmp_path / "test_diagnostics.json"))
+    monkeypatch.setattr(src.storage, "MEDIA_DIR", str(tmp_path / "media"))
+    monkeypatch.setattr(src.storage, "STORAGE_MODE", "json")
+
+
+def _blobs(root):
+    return [name for _, _, names in os.walk(os.path.join(root, "blobs")) for name in names]
+
+
+def test_put_streams_in_chunks_and_deduplicates(tmp_path):
+    store = MediaStore(str(tmp_path / "media"))
+    data = os.urandom(10_000)
+    upload = Upload(data, "clip.mp4")
+
+    digest, size, created = store.put(upload, chunk_size=4096)
+    assert digest == hashlib.sha256(data).hexdigest()
+    assert (size, created) == (10_000, True)
+    assert [read_size for read_size, _ in upload.reads] == [4096] * 4
+    with open(store.path(digest), "rb") as f:
+        assert f.read() == data
+
+    # Same content under another name: stored once
+    assert store.put(Upload(data, "copy.mp4")) == (digest, 10_000, False)
+    assert _blobs(store.root) == [digest]
+    assert os.listdir(os.path.join(store.root, "tmp")) == []
+
+
+def test_attach_links_files_off_the_script_thread():
+    request_id = create_request({"make": "Toyota", "has_files": True})
+    photo = Upload(b"\xff\xd8 jpeg bytes", "engine.jpg", "image/jpeg")
+    audio = Upload(b"RIFF wav bytes", "knock.wav")
+
+    assert attach_request_files(request_id, [photo, audio]).result(timeout=10)
+    files = get_request(request_id)["files"]
+    assert [f["name"] for f in files] == ["engine.jpg", "knock.wav"]
+    assert files[0]["type"] == "image/jpeg"
+    assert files[1]["type"].startswith("audio/")
+    assert files[0]["size"] == len(b"\xff\xd8 jpeg bytes")
+    assert os.path.exists(get_media_path(files[0]["sha256"]))
+    assert all(name.startswith("media") for _, name in photo.reads)
+
+
+def test_failed_upload_is_reported_on_the_request():
+    request_id = create_request({"make": "Toyota", "has_files": True})
+    future = attach_request_files(request_id, [BrokenUpload(b"", "clip.mp4")])
+    with pytest.raises(OSError):
+        future.result(timeout=10)
+    record = get_request(request_id)
+    assert record["files_error"] == "connection reset"
+    assert "files" not in record
+    assert os.listdir(os.path.join(src.storage.MEDIA_DIR, "tmp")) == []
+
+
+def test_range_reads_come_from_the_memory_map(tmp_path):
+    store = MediaStore(str(tmp_path / "media"))
+    data = os.urandom(10_000)
+    digest, _, _ = store.put(io.BytesIO(data))
+    assert store.read_range(digest, 100, 200) == data[100:200]
+    assert store.read_range(digest) == data
+    assert list(store.iter_range(digest, 1000, 9000, chunk_size=4096)) == [
+        data[1000:5096], data[5096:9000],
+    ]
+    empty, _, _ = store.put(io.BytesIO(b""))
+    assert store.read_range(empty) == b""
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("bytes=0-99", (0, 100)),
+    ("bytes=9900-", (9900, 10_000)),
+    ("bytes=-500", (9500, 10_000)),
+    ("bytes=9000-20000", (9000, 10_000)),
+    ("bytes=50-10", None),
+    ("bytes=0-1,5-9", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 10_000) == expected
+
+
+def test_parse_range_outside_the_file():
+    with pytest.raises(ValueError):
+        parse_range("bytes=10000-", 10_000)
+
+
+def test_media_server_answers_range_requests(tmp_path):
+    store = MediaStore(str(tmp_path / "media"))
+    data = os.urandom(3 * 1024 * 1024)
+    digest, _, _ = store.put(io.BytesIO(data))
+    server = MediaServer(store, port=0)
+    url = f"http://127.0.0.1:{server.port}/media/{digest}?type=video/mp4"
+    try:
+        request = urllib.request.Request(url, headers={"Range": "bytes=1000-2999999"})
+        with urllib.request.urlopen(request, timeout=10) as response:
+            assert response.status == 206
+            assert response.headers["Content-Range"] == f"bytes 1000-2999999/{len(data)}"
+            assert response.headers["Content-Type"] == "video/mp4"
+            assert response.read() == data[1000:3_000_000]
+
+        with urllib.request.urlopen(url, timeout=10) as response:
+            assert response.status == 200 and response.read() == data
+
+        for headers, status in [({"Range": f"bytes={len(data)}-"}, 416), ({}, 404)]:
+            target = url if headers else url.replace(digest, "0" * 64)
+            with pytest.raises(urllib.error.HTTPError) as excinfo:
+                urllib.request.urlopen(urllib.request.Request(target, headers=headers), timeout=10)
+            assert excinfo.value.code == status
+    finally:
+        server.close()
+
+
+def test_media_server_answers_404_once_the_collector_deleted_a_blob(tmp_path):
+    data = os.urandom(1024)
+
+    class CollectedStore(MediaStore):
+        """Deletes the blob on the n-th lookup of its file, as a concurrent GC run could."""
+        deleted_at = lookups = 0
+
+        def path(self, digest):
+            path = super().path(digest)
+            self.lookups += 1
+            if self.lookups == self.deleted_at and os.path.exists(path):
+                os.unlink(path)
+            return path
+
+    outcomes = []
+    for deleted_at in (1, 2, 3):
+        store = CollectedStore(str(tmp_path / f"media{deleted_at}"))
+        digest, _, _ = store.put(io.BytesIO(data))
+        store.lookups, store.deleted_at = 0, deleted_at
+        server = MediaServer(store, port=0)
+        try:
+            url = f"http://127.0.0.1:{server.port}/media/{digest}"
+            with urllib.request.urlopen(url, timeout=10) as response:
+                outcomes.append((response.status, response.read() == data))
+        except urllib.error.HTTPError as e:
+            outcomes.append((e.code, False))
+        finally:
+            server.close()
+    # Gone before the server opened it, or served whole from the open file
+    assert outcomes == [(404, False), (200, True), (200, True)]
+
+
+def test_media_url_and_inline_limit(monkeypatch):
+    entry = {"sha256": "ab" * 32, "size": 2 * 1024 * 1024, "type": "video/mp4"}
+    assert get_media_url(entry) is None
+
+    monkeypatch.setattr(src.storage, "MEDIA_INLINE_MAX_MB", 1)
+    assert read_media(entry) is None
+
+    monkeypatch.setattr(src.storage, "MEDIA_PORT", 8765)
+    monkeypatch.setattr(src.storage, "MEDIA_URL", "https://media.example.com/")
+    monkeypatch.setattr(src.storage, "_MEDIA_SERVER", False)
+    assert get_media_url(entry) == f"https://media.example.com/media/{'ab' * 32}?type=video/mp4"
+
+
+def test_large_files_can_still_be_downloaded(monkeypatch):
+    data = os.urandom(3 * 1024 * 1024)
+    request_id = create_request({"make": "Toyota", "has_files": True})
+    attach_request_files(request_id, [Upload(data, "long.mp4", "video/mp4")]).result(timeout=10)
+    entry = get_request(request_id)["files"][0]
+
+    monkeypatch.setattr(src.storage, "MEDIA_INLINE_MAX_MB", 1)
+    assert read_media(entry) is None
+    assert download_media(entry) == data
@@ -0,0 +1,194 @@
+import io
+import os
+import threading
+import time
+
+import pytest
+import src.storage
+from conftest import Upload
+from src import mediagc
+from src.storage import (
+    attach_request_files, collect_media, create_request, create_user, delete_user,
+    get_media_path, get_media_quota_left, get_media_stats, get_request, update_request_files,
+    update_request_response,
+)
+
+
+@pytest.fixture(autouse=True)
+def mock_storage_path(tmp_path, monkeypatch):
+    """Fixture to use temporary files for storage during tests."""
+    monkeypatch.setattr(src.storage, "DATA_FILE", str(tmp_path / "test_diagnostics.json"))
+    monkeypatch.setattr(src.storage, "USERS_FILE", str(tmp_path / "test_users.json"))
+    monkeypatch.setattr(src.storage, "MEDIA_DIR", str(tmp_path / "media"))
+    monkeypatch.setattr(src.storage, "STORAGE_MODE", "json")
+    monkeypatch.setattr(src.storage, "_MEDIA_STORES", {})
+    monkeypatch.setattr(src.storage, "_MEDIA_COLLECTORS", {})
+
+
+def _attach(data, email="owner@example.com", name="clip.mp4"):
+    request_id = create_request({"make": "Toyota", "has_files": True, "user_email": email})
+    attach_request_files(request_id, [Upload(data, name)]).exception(timeout=10)
+    return request_id
+
+
+def _age(digest, hours):
+    """Backdates a blob, as if it had been stored `hours` ago."""
+    then = time.time() - hours * 3600
+    os.utime(get_media_path(digest), (then, then))
+
+
+def test_user_quota_stops_reading_an_oversized_upload(monkeypatch):
+    monkeypatch.setattr(src.storage, "MEDIA_USER_QUOTA_MB", 3)
+    first = _attach(os.urandom(2 * 1024 * 1024))
+    assert len(get_request(first)["files"]) == 1
+    assert get_media_quota_left("owner@example.com") == 1024 * 1024
+    assert get_media_quota_left("someone@example.com") == 3 * 1024 * 1024
+
+    upload = Upload(os.urandom(8 * 1024 * 1024), "long.mp4")
+    second = create_request({"make": "Toyota", "has_files": True, "user_email": "owner@example.com"})
+    with pytest.raises(src.storage.QuotaExceededError):
+        attach_request_files(second, [upload]).result(timeout=10)
+    assert "storage quota" in get_request(second)["files_error"]
+    # Abandoned once past the limit, not read to the end
+    assert upload.read_bytes < 8 * 1024 * 1024
+    assert os.listdir(os.path.join(src.storage.MEDIA_DIR, "tmp")) == []
+
+
+def test_concurrent_uploads_cannot_both_pass_the_quota(monkeypatch):
+    monkeypatch.setattr(src.storage, "MEDIA_USER_QUOTA_MB", 3)
+    both_reading = threading.Barrier(2)
+
+    class SlowUpload(Upload):
+        def read(self, size=-1):
+            # Without a reservation both uploads get here before either is linked
+            try:
+                both_reading.wait(timeout=1)
+            except threading.BrokenBarrierError:
+                pass
+            return super().read(size)
+
+    requests = [
+        create_request({"make": "Toyota", "has_files": True, "user_email": "owner@example.com"})
+        for _ in range(2)
+    ]
+    futures = [
+        attach_request_files(request_id, [SlowUpload(os.urandom(2 * 1024 * 1024), "clip.mp4")])
+        for request_id in requests
+    ]
+    outcomes = [future.exception(timeout=10) for future in futures]
+    assert sorted(type(e).__name__ for e in outcomes) == ["NoneType", "QuotaExceededError"]
+    assert sum(len(get_request(request_id).get("files") or []) for request_id in requests) == 1
+    assert get_media_quota_left("owner@example.com") == 1024 * 1024
+
+
+def test_member_usage_is_recounted_if_an_upload_lands_meanwhile(monkeypatch):
+    monkeypatch.setattr(src.storage, "MEDIA_USER_QUOTA_MB", 3)
+    count = src.storage._user_media_bytes
+    landed = []
+
+    def count_then_land(email):
+        used = count(email)
+        if not landed:
+            landed.append(None)
+            # Linked and released after the count; this deadlocks if the count holds the lock
+            landed[0] = _attach(os.urandom(2 * 1024 * 1024))
+        return used
+
+    monkeypatch.setattr(src.storage, "_user_media_bytes", count_then_land)
+    with pytest.raises(src.storage.QuotaExceededError):
+        src.storage._reserve_media("owner@example.com", 2 * 1024 * 1024)
+    assert len(get_request(landed[0])["files"]) == 1
+
+
+def test_member_is_charged_for_thumbnails_and_previews(monkeypatch):
+    monkeypatch.setattr(src.storage, "MEDIA_USER_QUOTA_MB", 1)
+    request_id = create_request({"make": "Toyota", "has_files": True, "user_email": "owner@example.com"})
+    update_request_files(request_id, [{
+        "name": "engine.jpg", "sha256": "a" * 64, "size": 1000, "type": "image/jpeg",
+        "derivatives": {
+            "status": "ready", "attempts": 1,
+            "thumb": {"sha256": "b" * 64, "size": 100, "type": "image/jpeg"},
+            "preview": {"sha256": "c" * 64, "size": 400, "type": "image/jpeg"},
+        },
+    }])
+    assert get_media_quota_left("owner@example.com") == 1024 * 1024 - 1500
+
+
+def test_global_quota_counts_stored_bytes(monkeypatch):
+    monkeypatch.setattr(src.storage, "MEDIA_QUOTA_MB", 1)
+    assert get_media_quota_left() == 1024 * 1024
+    _attach(b"x" * 1000)
+    _attach(b"x" * 1000, email="other@example.com")  # same content, stored once
+    assert get_media_quota_left() == 1024 * 1024 - 1000
+    assert get_media_stats()["bytes"] == 1000
+
+
+def test_collector_removes_only_old_unreferenced_blobs():
+    kept = get_request(_attach(b"referenced"))["files"][0]["sha256"]
+    store = src.storage._media_store()
+    orphan, _, _ = store.put(io.BytesIO(b"orphan"))
+    fresh, _, _ = store.put(io.BytesIO(b"not linked yet"))
+    for digest in (kept, orphan):
+        _age(digest, 48)
+
+    stats = collect_media()
+    assert (stats["removed"], stats["freed_bytes"]) == (1, len(b"orphan"))
+    assert not store.exists(orphan)
+    assert store.exists(kept) and store.exists(fresh)
+    assert stats["live_bytes"] == store.usage() == len(b"referenced") + len(b"not linked yet")
+
+
+def test_collector_runs_in_bounded_slices(monkeypatch):
+    monkeypatch.setattr(mediagc, "BATCH_SIZE", 1)
+    for i in range(3):
+        _attach(f"file {i}".encode())
+    collector = src.storage._media_collector()
+    slices = 1
+    while not collector.step(0):
+        slices += 1
+    # One slice per page of requests, then one per shard of blobs
+    assert slices > 3
+    assert collector.stats()["cycles"] == 1
+
+
+def test_retention_drops_media_of_old_completed_requests(monkeypatch):
+    monkeypatch.setattr(src.storage, "MEDIA_RETENTION_DAYS", 30)
+    old = _attach(b"old clip")
+    recent = _attach(b"recent clip")
+    pending = _attach(b"pending clip")
+    update_request_response(old, "Replace the spark plugs.")
+    update_request_response(recent, "Check the belt.")
+    src.storage._update_record(
+        "requests", old, lambda record: record.update(response_timestamp="2020-01-01 09:00:00"),
+    )
+    digests = {key: get_request(key)["files"][0]["sha256"] for key in (old, recent, pending)}
+    for digest in digests.values():
+        _age(digest, 48)
+
+    stats = collect_media()
+    assert stats["expired"] == 1
+    removed = get_request(old)["files_removed"]
+    assert (removed["reason"], removed["count"]) == ("retention", 1)
+    assert get_request(old)["files"] == []
+    store = src.storage._media_store()
+    assert not store.exists(digests[old])
+    assert store.exists(digests[recent]) and store.exists(digests[pending])
+
+
+def test_deleting_a_user_releases_their_media():
+    create_user("owner@example.com", "secret123", "Owner", "1990-01-01", "Driver")
+    own = _attach(b"own clip")
+    shared = _attach(b"shared clip")
+    other = _attach(b"shared clip", email="other@example.com")
+    digests = {key: get_request(key)["files"][0]["sha256"] for key in (own, shared)}
+    for digest in digests.values():
+        _age(digest, 48)
+
+    assert delete_user("owner@example.com")
+    assert get_request(own)["files_removed"]["reason"] == "account deleted"
+    assert get_request(other)["files"]
+    collect_media()
+    store = src.storage._media_store()
+    assert not store.exists(digests[own])
+    # Still attached to another member's request
+    assert store.exists(digests[shared])
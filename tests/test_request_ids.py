@@ -0,0 +1,109 @@
+import json
+import sqlite3
+import uuid
+from datetime import datetime
+
+import pytest
+import src.storage
+from src import ids
+from src.sqlite_store import SQLiteStore
+from src.storage import (
+    create_request, get_request, get_requests_between, get_requests_page,
+)
+
+
+@pytest.fixture(autouse=True)
+def mock_storage_path(tmp_path, monkeypatch):
+    """Fixture to use a temporary file for storage during tests."""
+    monkeypatch.setattr(src.storage, "DATA_FILE", str(tmp_path / "test_diagnostics.json"))
+    monkeypatch.setattr(src.storage, "SQLITE_FILE", str(tmp_path / "test_diagnostics.db"))
+    monkeypatch.setattr(src.storage, "FILES_DIR", str(tmp_path / "records"))
+
+
+@pytest.fixture(params=["json", "journal", "sqlite", "files"])
+def storage_mode(request, monkeypatch):
+    monkeypatch.setattr(src.storage, "STORAGE_MODE", request.param)
+    return request.param
+
+
+def test_uuid7_is_time_ordered(monkeypatch):
+    monkeypatch.setattr(ids, "_last_ms", 0)
+    base = 1_700_000_000_000
+    first = ids.uuid7(base)
+    burst = [ids.uuid7(base + 1) for _ in range(50)]
+    later = ids.uuid7(base + 2)
+
+    assert [first] + burst + [later] == sorted([first] + burst + [later])
+    parsed = uuid.UUID(first)
+    assert parsed.version == 7
+    assert parsed.variant == uuid.RFC_4122
+    assert parsed.int >> 80 == base
+
+
+def test_new_requests_carry_epoch_ms(storage_mode):
+    before = ids.now_ms()
+    request_id = create_request({"make": "Toyota"})
+    record = get_request(request_id)
+
+    assert uuid.UUID(request_id).version == 7
+    assert before <= record["timestamp_ms"] <= ids.now_ms()
+    assert record["timestamp"] == ids.format_timestamp(record["timestamp_ms"])
+
+
+def test_requests_between(storage_mode):
+    created = []
+    for second in range(5):
+        request_id = create_request({"make": f"Make{second}"})
+        stamp = f"2025-03-01 12:00:{second:02d}"
+        src.storage._update_record(
+            "requests", request_id,
+            lambda r, s=stamp: r.update(timestamp=s, timestamp_ms=ids.to_ms(s)),
+        )
+        created.append(request_id)
+    src.storage.update_request_response(created[2], "done")
+
+    window = get_requests_between("2025-03-01 12:00:01", "2025-03-01 12:00:04")
+    assert [k for k, _ in window] == created[1:4]
+    window = get_requests_between(
+        datetime(2025, 3, 1, 12, 0, 1), ids.to_ms("2025-03-01 12:00:04"), status="pending",
+    )
+    assert [k for k, _ in window] == [created[1], created[3]]
+    assert get_requests_between("2025-03-02 00:00:00", "2025-03-03 00:00:00") == []
+
+
+def test_legacy_uuid4_records_resolve_and_sort(monkeypatch):
+    legacy_id = str(uuid.uuid4())
+    with open(src.storage.DATA_FILE, "w") as f:
+        json.dump({legacy_id: {
+            "request_id": legacy_id, "make": "Ford", "status": "pending",
+            "timestamp": "2020-06-01 08:30:00", "response": None,
+        }}, f)
+    new_id = create_request({"make": "Honda"})
+
+    assert get_request(legacy_id)["make"] == "Ford"
+    assert [k for k, _ in get_requests_page(order="oldest")] == [legacy_id, new_id]
+    window = get_requests_between("2020-06-01 00:00:00", "2020-06-02 00:00:00")
+    assert [k for k, _ in window] == [legacy_id]
+
+
+def test_sqlite_adds_timestamp_ms_to_existing_database():
+    legacy_id = str(uuid.uuid4())
+    record = {"request_id": legacy_id, "status": "pending", "timestamp": "2020-06-01 08:30:00"}
+    conn = sqlite3.connect(src.storage.SQLITE_FILE)
+    for table in ("requests", "tutorials", "users"):
+        conn.execute(
+            f"CREATE TABLE {table} (id TEXT PRIMARY KEY, status TEXT, user_email TEXT, "
+            "timestamp TEXT, data TEXT NOT NULL)"
+        )
+    conn.execute(
+        "INSERT INTO requests VALUES (?, 'pending', '', ?, ?)",
+        (legacy_id, record["timestamp"], json.dumps(record)),
+    )
+    conn.commit()
+    conn.close()
+
+    store = SQLiteStore(src.storage.SQLITE_FILE)
+    assert store.get("requests", legacy_id)["status"] == "pending"
+    window = store.between("requests", ids.to_ms("2020-06-01 08:30:00"), ids.to_ms("2020-06-01 08:30:01"))
+    assert [k for k, _ in window] == [legacy_id]
+    assert store.next_claimable("requests", ids.now_ms()) == legacy_id
@@ -0,0 +1,115 @@
+import json
+import pytest
+import src.storage
+from src.indexes import RecordIndex
+from src.storage import (
+    create_request, update_request_response, get_requests_by_status,
+    get_user_requests, update_request_files,
+)
+
+
+@pytest.fixture(autouse=True)
+def mock_storage_path(tmp_path, monkeypatch):
+    """Fixture to use a temporary file for storage during tests."""
+    monkeypatch.setattr(src.storage, "DATA_FILE", str(tmp_path / "test_diagnostics.json"))
+
+
+def test_get_requests_by_status_tracks_updates():
+    first = create_request({"make": "Toyota", "user_email": "a@example.com"})
+    second = create_request({"make": "Honda", "user_email": "b@example.com"})
+    assert list(get_requests_by_status("pending")) == [first, second]
+    assert get_requests_by_status("completed") == {}
+
+    update_request_response(first, "Replace the battery.")
+    assert list(get_requests_by_status("pending")) == [second]
+    completed = get_requests_by_status("completed")
+    assert list(completed) == [first]
+    assert completed[first]["response"] == "Replace the battery."
+
+
+def test_index_is_not_rebuilt_between_mutations():
+    create_request({"make": "Toyota", "user_email": "a@example.com"})
+    index = src.storage._store_index("requests")[0]
+    request_id = create_request({"make": "Mazda", "user_email": "a@example.com"})
+    update_request_files(request_id, ["a.jpg"])
+
+    assert src.storage._store_index("requests")[0] is index
+    assert len(get_user_requests("a@example.com")) == 2
+
+
+def test_index_rebuilt_when_file_changes_on_disk():
+    request_id = create_request({"make": "Toyota", "user_email": "a@example.com"})
+    get_requests_by_status("pending")
+
+    # Another process completes the request and adds one of its own
+    with open(src.storage.DATA_FILE) as f:
+        data = json.load(f)
+    data[request_id]["status"] = "completed"
+    data["external"] = {"request_id": "external", "status": "pending", "user_email": "b@example.com"}
+    with open(src.storage.DATA_FILE + ".new", "w") as f:
+        json.dump(data, f)
+    src.storage.os.replace(src.storage.DATA_FILE + ".new", src.storage.DATA_FILE)
+
+    assert list(get_requests_by_status("pending")) == ["external"]
+    assert list(get_user_requests("B@example.com")) == ["external"]
+
+
+def test_journal_tail_updates_index(monkeypatch):
+    monkeypatch.setattr(src.storage, "STORAGE_MODE", "journal")
+    request_id = create_request({"make": "Kia", "user_email": "a@example.com"})
+    assert list(get_requests_by_status("pending")) == [request_id]
+
+    # Simulate another process appending a completion to the journal
+    from src import journal
+    record = dict(get_requests_by_status("pending")[request_id], status="completed")
+    journal.append_record(journal.journal_path(src.storage.DATA_FILE), request_id, record)
+
+    assert get_requests_by_status("pending") == {}
+    assert list(get_requests_by_status("completed")) == [request_id]
+
+
+def test_record_index_keeps_position_on_unrelated_update():
+    index = RecordIndex({
+        "a": {"status": "pending", "user_email": "x@example.com"},
+        "b": {"status": "pending", "user_email": "x@example.com"},
+    })
+    index.update("a", {"status": "pending", "user_email": "x@example.com", "files": ["f"]})
+    assert index.keys_with_status("pending") == ["a", "b"]
+
+    index.update("a", {"status": "completed", "user_email": "y@example.com"})
+    assert index.keys_with_status("pending") == ["b"]
+    assert index.keys_for_user("x@example.com") == ["b"]
+    assert index.keys_for_user("y@example.com") == ["a"]
+
+    index.update("b", None)
+    assert index.keys_with_status("pending") == []
+    assert index.keys_for_user("x@example.com") == []
+
+
+def test_record_index_iterates_while_other_threads_update():
+    import threading
+
+    index = RecordIndex({f"r{i}": {"status": "pending"} for i in range(500)})
+    keys = index.iter_keys()
+    first = next(keys)
+    errors = []
+
+    def writer(start):
+        try:
+            for i in range(start, start + 500):
+                index.update(f"r{i}", {"status": "completed"})
+                index.update(f"r{i - start}", None)
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(n * 1000,)) for n in range(1, 5)]
+    for thread in threads:
+        thread.start()
+    rest = list(keys)
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    # The iteration sees the facet as it was when it started
+    assert [first] + rest == [f"r{i}" for i in reversed(range(500))]
+    assert index.counters() == {"total": 2000, "by_status": {"completed": 2000}}
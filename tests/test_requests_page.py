@@ -0,0 +1,71 @@
+import pytest
+import src.storage
+from src.ids import to_ms
+from src.storage import create_request, update_request_response, get_requests_page, count_requests
+
+
+@pytest.fixture(autouse=True)
+def mock_storage_path(tmp_path, monkeypatch):
+    """Fixture to use a temporary file for storage during tests."""
+    monkeypatch.setattr(src.storage, "DATA_FILE", str(tmp_path / "test_diagnostics.json"))
+    monkeypatch.setattr(src.storage, "SQLITE_FILE", str(tmp_path / "test_diagnostics.db"))
+    monkeypatch.setattr(src.storage, "FILES_DIR", str(tmp_path / "records"))
+
+
+@pytest.fixture(params=["json", "sqlite", "files"])
+def storage_mode(request, monkeypatch):
+    monkeypatch.setattr(src.storage, "STORAGE_MODE", request.param)
+    return request.param
+
+
+def _create(n, start_second=0):
+    """Creates n requests with strictly increasing timestamps."""
+    ids = []
+    for i in range(n):
+        request_id = create_request({"make": f"Make{i}"})
+        src.storage._update_record(
+            "requests", request_id,
+            lambda r, s=start_second + i: r.update(
+                timestamp=f"2025-01-01 00:00:{s:02d}",
+                timestamp_ms=to_ms(f"2025-01-01 00:00:{s:02d}"),
+            ),
+        )
+        ids.append(request_id)
+    return ids
+
+
+def test_newest_first_pages(storage_mode):
+    ids = _create(7)
+    page1 = get_requests_page(limit=3)
+    page2 = get_requests_page(offset=3, limit=3)
+    page3 = get_requests_page(offset=6, limit=3)
+    assert [k for k, _ in page1] == ids[::-1][:3]
+    assert [k for k, _ in page2] == ids[::-1][3:6]
+    assert [k for k, _ in page3] == ids[:1]
+    assert get_requests_page(offset=10, limit=3) == []
+
+
+def test_oldest_first_with_status_filter(storage_mode):
+    ids = _create(5)
+    update_request_response(ids[1], "done")
+    update_request_response(ids[3], "done")
+
+    pending = get_requests_page(status="pending", order="oldest", limit=10)
+    assert [k for k, _ in pending] == [ids[0], ids[2], ids[4]]
+    completed = get_requests_page(status="completed", order="newest", limit=10)
+    assert [k for k, _ in completed] == [ids[3], ids[1]]
+    assert completed[0][1]["response"] == "done"
+
+    assert count_requests() == 5
+    assert count_requests("pending") == 3
+    assert count_requests("completed") == 2
+
+
+def test_same_second_requests_keep_submission_order():
+    ids = [create_request({"make": "Toyota"}) for _ in range(4)]
+    assert [k for k, _ in get_requests_page(order="oldest", limit=4)] == ids
+
+
+def test_invalid_order():
+    with pytest.raises(ValueError):
+        get_requests_page(order="sideways")
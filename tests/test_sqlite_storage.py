@@ -0,0 +1,101 @@
+import sqlite3
+import pytest
+import src.storage
+from src.sqlite_store import SQLiteStore
+from src.storage import (
+    create_request, get_request, get_all_requests, update_request_response,
+    update_request_files, create_tutorial_request, get_tutorial_request,
+    get_all_tutorial_requests, update_tutorial_request_response,
+    create_user, get_user, get_all_users, verify_user, update_user_status,
+    delete_user, get_user_requests,
+)
+
+
+@pytest.fixture(autouse=True)
+def sqlite_mode(tmp_path, monkeypatch):
+    """Run storage against a temporary SQLite database."""
+    monkeypatch.setattr(src.storage, "SQLITE_FILE", str(tmp_path / "test_diagnostics.db"))
+    monkeypatch.setattr(src.storage, "STORAGE_MODE", "sqlite")
+
+
+def test_request_workflow():
+    request_id = create_request({"make": "Toyota", "model": "Camry", "user_email": "Owner@Example.com"})
+    assert get_request(request_id)["status"] == "pending"
+
+    assert update_request_response(request_id, "Check the air intake system.") is True
+    req = get_request(request_id)
+    assert req["status"] == "completed"
+    assert req["response"] == "Check the air intake system."
+    assert "response_timestamp" in req
+
+    assert update_request_files(request_id, ["noise.mp3"]) is True
+    assert get_request(request_id)["files"] == ["noise.mp3"]
+    assert list(get_all_requests()) == [request_id]
+
+
+def test_update_missing_request():
+    assert update_request_response("missing", "text") is False
+    assert update_request_files("missing", ["a.jpg"]) is False
+    assert get_request("missing") is None
+
+
+def test_get_user_requests_uses_indexed_email():
+    create_request({"make": "Toyota", "user_email": "owner@example.com"})
+    create_request({"make": "Honda", "user_email": "OWNER@example.com"})
+    create_request({"make": "Ford", "user_email": "other@example.com"})
+    assert len(get_user_requests(" Owner@Example.com ")) == 2
+    assert get_user_requests("nobody@example.com") == {}
+
+
+def test_tutorial_workflow():
+    tut_id = create_tutorial_request({"make": "Mazda", "model": "3", "description": "Cabin filter"})
+    assert get_tutorial_request(tut_id)["status"] == "pending"
+    assert update_tutorial_request_response(tut_id, "https://example.com/video") is True
+    assert get_all_tutorial_requests()[tut_id]["status"] == "completed"
+    # Tutorials and diagnostic requests live in separate tables
+    assert get_request(tut_id) is None
+
+
+def test_user_workflow():
+    ok, _ = create_user("sql@example.com", "Password1", "Sam", "1990-01-01", "Mechanic")
+    assert ok is True
+    ok, msg = create_user("SQL@example.com", "Password1", "Sam", "1990-01-01", "Mechanic")
+    assert ok is False and "already exists" in msg
+
+    assert verify_user("sql@example.com", "Password1") == (True, "Login successful.")
+    assert update_user_status("sql@example.com", "paused") is True
+    assert get_user("sql@example.com")["status"] == "paused"
+    assert len(get_all_users()) == 1
+    assert delete_user("sql@example.com") is True
+    assert delete_user("sql@example.com") is False
+    assert get_user("sql@example.com") is None
+
+
+def test_database_uses_wal_and_indexes():
+    create_request({"make": "Kia"})
+    conn = sqlite3.connect(src.storage.SQLITE_FILE)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    for column in ("status", "user_email", "timestamp_ms"):
+        assert f"idx_requests_{column}" in indexes
+
+
+def test_writes_visible_to_other_connections():
+    request_id = create_request({"make": "Subaru"})
+    other = SQLiteStore(src.storage.SQLITE_FILE)
+    assert other.get("requests", request_id)["make"] == "Subaru"
+
+    other.update("requests", request_id, lambda record: record.update(status="completed"))
+    assert get_request(request_id)["status"] == "completed"
+
+
+def test_failed_update_rolls_back():
+    request_id = create_request({"make": "Volvo"})
+
+    def broken(record):
+        record["status"] = "completed"
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        src.storage._sqlite_store().update("requests", request_id, broken)
+    assert get_request(request_id)["status"] == "pending"
@@ -0,0 +1,84 @@
+import pytest
+import src.storage
+from src.storage import (
+    create_request, update_request_response, create_user, update_user_status,
+    delete_user, get_stats,
+)
+
+
+@pytest.fixture(autouse=True)
+def mock_storage_path(tmp_path, monkeypatch):
+    """Fixture to use temporary files for storage during tests."""
+    monkeypatch.setattr(src.storage, "DATA_FILE", str(tmp_path / "test_diagnostics.json"))
+    monkeypatch.setattr(src.storage, "USERS_FILE", str(tmp_path / "test_users.json"))
+    monkeypatch.setattr(src.storage, "SQLITE_FILE", str(tmp_path / "test_diagnostics.db"))
+    monkeypatch.setattr(src.storage, "FILES_DIR", str(tmp_path / "records"))
+
+
+@pytest.fixture(params=["json", "journal", "sqlite", "files"])
+def storage_mode(request, monkeypatch):
+    monkeypatch.setattr(src.storage, "STORAGE_MODE", request.param)
+    return request.param
+
+
+def test_stats_empty(storage_mode):
+    assert get_stats() == {
+        "total_requests": 0,
+        "pending_requests": 0,
+        "completed_requests": 0,
+        "total_users": 0,
+        "active_users": 0,
+        "paused_users": 0,
+    }
+
+
+def test_stats_follow_writes(storage_mode):
+    first = create_request({"make": "Toyota"})
+    create_request({"make": "Honda"})
+    update_request_response(first, "Replace the spark plugs.")
+    create_user("a@example.com", "secret", "A", "1990-01-01", "Mechanic")
+    create_user("b@example.com", "secret", "B", "1990-01-01", "Mechanic")
+    update_user_status("b@example.com", "paused")
+
+    stats = get_stats()
+    assert stats["total_requests"] == 2
+    assert stats["pending_requests"] == 1
+    assert stats["completed_requests"] == 1
+    assert stats["total_users"] == 2
+    assert stats["active_users"] == 1
+    assert stats["paused_users"] == 1
+
+    delete_user("b@example.com")
+    stats = get_stats()
+    assert stats["total_users"] == 1
+    assert stats["paused_users"] == 0
+
+
+def test_stats_survive_reload(storage_mode):
+    """Counters are rebuilt from the stored records when the cache is dropped."""
+    request_id = create_request({"make": "Ford"})
+    update_request_response(request_id, "Check the alternator.")
+    create_request({"make": "Mazda"})
+
+    src.storage._REQUESTS_CACHE.invalidate()
+    src.storage._INDEXES.clear()
+    src.storage._SQLITE_STORES.clear()
+
+    stats = get_stats()
+    assert stats["total_requests"] == 2
+    assert stats["pending_requests"] == 1
+    assert stats["completed_requests"] == 1
+
+
+def test_sqlite_counters_rebuilt_from_existing_rows(storage_mode):
+    if storage_mode != "sqlite":
+        pytest.skip("SQLite only")
+    create_request({"make": "Kia"})
+    store = src.storage._sqlite_store()
+    conn = store._connect()
+    conn.execute("DELETE FROM counters")
+    src.storage._SQLITE_STORES.clear()
+
+    assert src.storage._sqlite_store().counters("requests") == {
+        "total": 1, "by_status": {"pending": 1},
+    }
@@ -0,0 +1,131 @@
+import json
+import multiprocessing
+import time
+import pytest
+import src.storage
+from src import hashing
+from src.storage import create_request, create_user, get_all_requests, get_all_users
+
+WRITERS = 4
+REQUESTS_PER_WRITER = 25
+
+pytestmark = pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(),
+    reason="stress test relies on fork to inherit the storage configuration",
+)
+
+
+@pytest.fixture(autouse=True)
+def mock_storage_path(tmp_path, monkeypatch):
+    """Fixture to use a temporary file for storage during tests."""
+    monkeypatch.setattr(src.storage, "DATA_FILE", str(tmp_path / "test_diagnostics.json"))
+
+
+def _writer(writer_id):
+    for i in range(REQUESTS_PER_WRITER):
+        create_request({"make": "Toyota", "model": "Camry", "writer": writer_id, "seq": i})
+
+
+def _reader(done, results):
+    """Polls the store until the writers finish, recording any shrink or empty read."""
+    last_seen, reads, violations = 0, 0, 0
+    while not done.is_set():
+        count = len(get_all_requests())
+        if count == 0 or count < last_seen:
+            violations += 1
+        last_seen = max(last_seen, count)
+        reads += 1
+    results.put((reads, violations))
+
+
+def _run_stress(mode, monkeypatch):
+    monkeypatch.setattr(src.storage, "STORAGE_MODE", mode)
+    create_request({"make": "Seed"})
+
+    ctx = multiprocessing.get_context("fork")
+    done, results = ctx.Event(), ctx.Queue()
+    reader = ctx.Process(target=_reader, args=(done, results))
+    writers = [ctx.Process(target=_writer, args=(w,)) for w in range(WRITERS)]
+
+    reader.start()
+    started = time.perf_counter()
+    for proc in writers:
+        proc.start()
+    for proc in writers:
+        proc.join(timeout=60)
+    elapsed = time.perf_counter() - started
+    done.set()
+    reads, violations = results.get(timeout=10)
+    reader.join(timeout=10)
+
+    total = WRITERS * REQUESTS_PER_WRITER
+    print(
+        f"\n[{mode}] {WRITERS} writers x {REQUESTS_PER_WRITER} requests: "
+        f"{total / elapsed:.0f} writes/s, {reads} concurrent reads"
+    )
+    assert all(proc.exitcode == 0 for proc in writers)
+    return violations
+
+
+@pytest.mark.parametrize("mode, journal_max_bytes", [
+    ("json", None), ("journal", None), ("journal", 4096),
+])
+def test_concurrent_writers_lose_no_updates(mode, journal_max_bytes, monkeypatch):
+    if journal_max_bytes:
+        # Force frequent background compactions while writers are appending
+        monkeypatch.setattr(src.storage, "JOURNAL_MAX_BYTES", journal_max_bytes)
+    violations = _run_stress(mode, monkeypatch)
+
+    src.storage._REQUESTS_CACHE.invalidate()
+    requests = get_all_requests()
+    assert len(requests) == WRITERS * REQUESTS_PER_WRITER + 1
+    per_writer = {}
+    for req in requests.values():
+        if "writer" in req:
+            per_writer.setdefault(req["writer"], set()).add(req["seq"])
+    assert all(len(seqs) == REQUESTS_PER_WRITER for seqs in per_writer.values())
+    assert violations == 0
+
+
+def test_readers_never_see_partial_file(monkeypatch):
+    _run_stress("json", monkeypatch)
+    # Atomic replacement leaves no temporary files behind
+    with open(src.storage.DATA_FILE) as f:
+        json.load(f)
+    leftovers = [p for p in src.storage.os.listdir(src.storage.os.path.dirname(src.storage.DATA_FILE))
+                 if p.endswith(".tmp")]
+    assert leftovers == []
+
+
+def _signup(barrier, results, name):
+    barrier.wait(timeout=30)
+    results.put(create_user("same@example.com", "secret123", name, "1990-01-01", "Driver"))
+
+
+@pytest.mark.parametrize("mode", ["json", "journal", "sqlite", "files"])
+def test_concurrent_signups_create_one_account(mode, tmp_path, monkeypatch):
+    monkeypatch.setattr(src.storage, "STORAGE_MODE", mode)
+    monkeypatch.setattr(src.storage, "USERS_FILE", str(tmp_path / "test_users.json"))
+    monkeypatch.setattr(src.storage, "SQLITE_FILE", str(tmp_path / "test.db"))
+    monkeypatch.setattr(src.storage, "FILES_DIR", str(tmp_path / "records"))
+    # A hashing pool started by an earlier test has no worker threads after a fork
+    monkeypatch.setattr(hashing, "_SERVICE", None)
+
+    ctx = multiprocessing.get_context("fork")
+    barrier, results = ctx.Barrier(WRITERS), ctx.Queue()
+    signups = [ctx.Process(target=_signup, args=(barrier, results, f"Member {w}")) for w in range(WRITERS)]
+    for proc in signups:
+        proc.start()
+    for proc in signups:
+        proc.join(timeout=60)
+    assert all(proc.exitcode == 0 for proc in signups)
+
+    outcomes = sorted(results.get(timeout=10) for _ in signups)
+    assert outcomes == [(False, "An account with this email already exists.")] * (WRITERS - 1) + [
+        (True, "Account created successfully."),
+    ]
+    if mode in ("json", "journal"):
+        src.storage._USERS_CACHE.invalidate()
+    users = get_all_users()
+    assert list(users) == ["same@example.com"]
+    assert users["same@example.com"]["version"] == 1
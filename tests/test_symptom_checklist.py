@@ -0,0 +1,100 @@
+from src import symptoms
+
+# The symptoms dict shape stored on requests before the checklist became data-driven
+EXPECTED_FIELDS = {
+    "power": [
+        "loss_of_power", "intermittent_power_loss", "power_surges", "increased_power",
+        "hesitation_lag", "no_change", "other",
+    ],
+    "tactile": [
+        "vibration", "rough_engine", "pulling_to_side", "shaking", "jerking",
+        "hunting", "stiff_controls", "no_change", "other",
+    ],
+    "audible": [
+        "rattling", "knocking", "grinding", "squealing", "humming", "clicking",
+        "no_change", "other",
+    ],
+    "fuel": [
+        "increased_consumption", "fuel_smell", "decreased_mileage", "fuel_leak",
+        "difficulty_starting", "stalling", "no_change", "other",
+    ],
+    "visual": [
+        "white_smoke", "black_smoke", "blue_smoke", "warning_lights", "fluid_leak",
+        "corrosion", "no_change", "other",
+    ],
+    "temperature": [
+        "overheating", "running_hot", "running_cold", "ac_issues", "heater_issues",
+        "no_change", "other",
+    ],
+}
+
+
+def test_collected_symptoms_keep_their_shape(app_module):
+    app, state = app_module
+    state.update({
+        "power_loss_of_power": True,
+        "temp_no_change": True,
+        "audible_other": True,
+        "audible_other_text": "Whistle at idle",
+        "fuel_other": False,
+        "fuel_other_text": "stale text from a hidden input",
+    })
+
+    symptoms = app._collect_symptoms("Started last week")
+
+    assert list(symptoms) == list(EXPECTED_FIELDS) + ["additional_details"]
+    for category, fields in EXPECTED_FIELDS.items():
+        assert list(symptoms[category]) == fields
+    assert symptoms["power"]["loss_of_power"] is True
+    assert symptoms["power"]["power_surges"] is False
+    assert symptoms["temperature"]["no_change"] is True
+    assert symptoms["audible"]["other"] == "Whistle at idle"
+    assert symptoms["fuel"]["other"] == ""
+    assert symptoms["additional_details"] == "Started last week"
+
+
+def test_every_checklist_field_has_a_symptom_code(app_module):
+    app, _ = app_module
+    collected = app._collect_symptoms("")
+    fields = {(category, field) for category in symptoms.CATEGORIES for field in collected[category]}
+    assert fields == set(symptoms.CODES)
+
+
+def test_selected_vehicle_reads_model_for_current_make(app_module):
+    app, state = app_module
+    assert app._selected_vehicle() == ("Select Make", "Select Model", 0)
+
+    state.update({
+        "vehicle_make": "Toyota",
+        "vehicle_model_Honda": "Civic",
+        "vehicle_model_Toyota": "Hilux",
+        "vehicle_year": "2015",
+    })
+    assert app._selected_vehicle() == ("Toyota", "Hilux", 2015)
+
+
+def test_submit_form_values_are_written_back_for_other_pages(app_module):
+    app, state = app_module
+    state.update({
+        "vehicle_make": "Toyota",
+        "vehicle_model_Toyota": "Hilux",
+        "vehicle_match_0": False,
+        "submit_vin": "JT123",
+        "power_loss_of_power": True,
+        "expert_logged_in": False,
+    })
+    written = []
+    real_setitem = dict.__setitem__
+
+    class Recording(dict):
+        def __setitem__(self, key, value):
+            written.append(key)
+            real_setitem(self, key, value)
+
+    app.st.session_state = Recording(state)
+    app._keep_submit_form_state()
+    assert sorted(written) == [
+        "power_loss_of_power", "submit_vin", "vehicle_make", "vehicle_model_Toyota",
+    ]
+    # Every checklist widget is kept
+    assert {f"{section['prefix']}_other_text" for section in app.SYMPTOM_CHECKLIST} <= set(app.SUBMIT_FORM_KEYS)
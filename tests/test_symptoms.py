@@ -0,0 +1,123 @@
+import json
+import sqlite3
+
+import pytest
+import src.storage
+from benchmarks import datagen
+from src import symptoms
+from src.storage import create_request, get_request, get_symptom_stats
+
+SYMPTOM_DATA = {
+    "power": {"loss_of_power": True, "no_change": False, "other": ""},
+    "audible": {"knocking": True, "other": "Whistle at idle"},
+    "temperature": {"no_change": True, "unknown_field": True},
+    "additional_details": "Started last week",
+}
+
+
+@pytest.fixture(autouse=True)
+def mock_storage_path(tmp_path, monkeypatch):
+    """Fixture to use temporary files for storage during tests."""
+    monkeypatch.setattr(src.storage, "DATA_FILE", str(tmp_path / "test_diagnostics.json"))
+    monkeypatch.setattr(src.storage, "SQLITE_FILE", str(tmp_path / "test_diagnostics.db"))
+    monkeypatch.setattr(src.storage, "FILES_DIR", str(tmp_path / "records"))
+    monkeypatch.setattr(src.storage, "STORAGE_MODE", "json")
+
+
+@pytest.fixture(params=["numpy", "python"])
+def counter(request, monkeypatch):
+    if request.param == "numpy" and symptoms.np is None:
+        pytest.skip("numpy is not installed")
+    if request.param == "python":
+        monkeypatch.setattr(symptoms, "np", None)
+    return request.param
+
+
+def test_codes_are_stable_and_contiguous():
+    codes = [code for code, _, _ in symptoms.TAXONOMY]
+    assert codes == list(range(len(symptoms.TAXONOMY))) and len(codes) <= 64
+    assert symptoms.CODES[("power", "loss_of_power")] == 0
+    assert symptoms.CODES[("audible", "knocking")] == 17
+    assert symptoms.CODES[("temperature", "other")] == 46
+
+
+def test_mask_round_trips():
+    mask = symptoms.encode(SYMPTOM_DATA)
+    assert symptoms.decode(mask) == [
+        ("power", "loss_of_power"), ("audible", "knocking"), ("audible", "other"),
+        ("temperature", "no_change"),
+    ]
+    assert symptoms.encode("Rattles over bumps") == 0
+
+
+def test_mask_is_stored_on_create():
+    request_id = create_request({"make": "Toyota", "symptoms": SYMPTOM_DATA})
+    assert get_request(request_id)["symptom_mask"] == symptoms.encode(SYMPTOM_DATA)
+    # Requests stored before masks were get theirs computed
+    assert symptoms.mask_of({"symptoms": SYMPTOM_DATA}) == symptoms.encode(SYMPTOM_DATA)
+
+
+def test_counts_match_the_symptom_dicts(counter):
+    records = list(datagen.generate(500, "hash", "salt", seed=3)["requests"].values())
+    masks = [symptoms.encode(record["symptoms"]) for record in records]
+    groups = [(record["make"],) for record in records]
+
+    table = symptoms.count(masks, groups)
+    assert sum(total for total, _ in table.values()) == len(records)
+    for (make,), (total, counts) in table.items():
+        mine = [record for record in records if record["make"] == make]
+        assert total == len(mine)
+        for code, (category, field) in enumerate(symptoms.SYMPTOMS):
+            assert counts[code] == sum(1 for record in mine if record["symptoms"][category].get(field))
+
+    (overall_total, overall), = symptoms.count(masks).values()
+    assert overall_total == len(records)
+    assert overall == [sum(counts[code] for _, counts in table.values()) for code in range(len(overall))]
+    assert symptoms.count([]) == {}
+
+
+@pytest.mark.parametrize("mode", ["json", "sqlite", "files"])
+def test_symptom_stats_by_vehicle(counter, mode, monkeypatch):
+    monkeypatch.setattr(src.storage, "STORAGE_MODE", mode)
+    create_request({"make": "Toyota", "model": "Corolla", "year": 2015, "symptoms": SYMPTOM_DATA})
+    create_request({"make": "Toyota", "model": "Corolla", "year": 2015, "symptoms": {
+        "power": {"loss_of_power": True},
+    }})
+    create_request({"make": "Honda", "model": "Civic", "year": 2018, "symptoms": "Rattles"})
+
+    stats = get_symptom_stats(("make", "model"))
+    total, counts = stats[("Toyota", "Corolla")]
+    assert total == 2 and counts[symptoms.CODES[("power", "loss_of_power")]] == 2
+    assert counts[symptoms.CODES[("audible", "knocking")]] == 1
+    assert stats[("Honda", "Civic")] == (1, [0] * len(symptoms.SYMPTOMS))
+    assert get_symptom_stats()[()][0] == 3
+
+
+def test_sqlite_backfills_masks_of_existing_requests(monkeypatch):
+    record = {"status": "pending", "make": "Ford", "symptoms": SYMPTOM_DATA}
+    conn = sqlite3.connect(src.storage.SQLITE_FILE)
+    for table in ("requests", "tutorials", "users"):
+        conn.execute(
+            f"CREATE TABLE {table} (id TEXT PRIMARY KEY, status TEXT, user_email TEXT, "
+            "timestamp TEXT, data TEXT NOT NULL)"
+        )
+    conn.execute("INSERT INTO requests VALUES ('legacy', 'pending', '', '', ?)", (json.dumps(record),))
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(src.storage, "STORAGE_MODE", "sqlite")
+    mask = symptoms.encode(SYMPTOM_DATA)
+    assert get_symptom_stats(("make",)) == {
+        ("Ford",): (1, [mask >> code & 1 for code in range(len(symptoms.SYMPTOMS))]),
+    }
+
+
+def test_files_mode_reads_requests_indexed_before_masks(monkeypatch):
+    monkeypatch.setattr(src.storage, "STORAGE_MODE", "files")
+    create_request({"make": "Toyota", "symptoms": SYMPTOM_DATA})
+    # Written as is, like a request migrated from before masks were stored
+    src.storage._file_store().put_many("requests", {"legacy": {"make": "Toyota", "symptoms": SYMPTOM_DATA}})
+
+    total, counts = get_symptom_stats(("make",))[("Toyota",)]
+    assert total == 2
+    assert counts[symptoms.CODES[("audible", "knocking")]] == 2
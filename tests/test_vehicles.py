@@ -0,0 +1,78 @@
+import json
+
+from src.validation import validate_tutorial_request, _validate_vehicle_details
+from src.vehicles import OTHER, SELECT_MAKE, SELECT_MODEL, VehicleCatalog, get_catalog, load_catalog
+
+
+def _vehicle_errors(make, model):
+    return _validate_vehicle_details(make, model, 2015, 50000, "", "4", "Automatic", "Petrol/Unleaded")
+
+
+def test_catalog_is_loaded_once():
+    catalog = get_catalog()
+    assert catalog is get_catalog()
+    assert catalog.version == 1
+    assert "Toyota" in catalog.makes()
+    assert "Camry" in catalog.models("Toyota")
+
+
+def test_dropdown_options():
+    catalog = get_catalog()
+    makes = catalog.make_options()
+    assert makes[0] == SELECT_MAKE and makes[-1] == OTHER
+    models = catalog.model_options("Toyota")
+    assert models[0] == SELECT_MODEL and models[-1] == OTHER
+    assert catalog.model_options(OTHER) == [SELECT_MODEL, OTHER]
+
+
+def test_membership():
+    catalog = get_catalog()
+    assert catalog.is_valid_make("Toyota")
+    assert catalog.is_valid_make(OTHER)
+    assert not catalog.is_valid_make("Trabant")
+    assert catalog.is_valid_model("Toyota", "Hilux")
+    assert catalog.is_valid_model("Toyota", OTHER)
+    assert not catalog.is_valid_model("Toyota", "Civic")
+
+
+def test_search_prefix_and_typos():
+    catalog = get_catalog()
+    assert catalog.search("hilux")[0] == ("Toyota", "Hilux")
+    assert catalog.search("hilx")[0] == ("Toyota", "Hilux")
+    assert catalog.search("lan cruiser")[0] == ("Toyota", "LandCruiser")
+    assert catalog.search("BM")[0] == ("BMW", None)
+    assert catalog.search("toyota")[0] == ("Toyota", None)
+    assert catalog.search("   ") == []
+    assert catalog.search("zzzzqqq") == []
+    assert len(catalog.search("a", limit=3)) == 3
+
+
+def test_load_catalog_from_file(tmp_path):
+    path = tmp_path / "catalog.json"
+    path.write_text(json.dumps({"version": 7, "makes": {"Lada": ["Niva", "Samara"]}}))
+    catalog = load_catalog(str(path))
+    assert isinstance(catalog, VehicleCatalog)
+    assert catalog.version == 7
+    assert catalog.search("niva") == [("Lada", "Niva")]
+
+
+def test_validation_uses_catalog_membership():
+    assert _vehicle_errors("Toyota", "Camry") == []
+    assert _vehicle_errors("Other", "Other") == []
+    assert _vehicle_errors("Toyota", "Other") == []
+    assert "Please select a Car Make from the dropdown." in _vehicle_errors("Trabant", "601")
+    assert any("not a listed model" in e for e in _vehicle_errors("Toyota", "Civic"))
+
+
+def test_length_checked_before_membership():
+    errors = _vehicle_errors("a" * 51, "b" * 51)
+    assert errors == [
+        "Car Make must be less than 50 characters.",
+        "Car Model must be less than 50 characters.",
+    ]
+
+
+def test_tutorial_validation_uses_catalog():
+    assert validate_tutorial_request("Honda", "Civic", 2015, "Cabin filter", "Video") == []
+    errors = validate_tutorial_request("Honda", "Hilux", 2015, "Cabin filter", "Video")
+    assert any("not a listed model" in e for e in errors)
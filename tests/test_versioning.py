@@ -0,0 +1,143 @@
+import threading
+
+import pytest
+import src.storage
+from src import fileio
+from src.storage import (
+    create_request, create_tutorial_request, create_user, delete_user, get_conflict_stats,
+    get_request, get_tutorial_request, get_user, update_request_files, update_request_response,
+    update_tutorial_request_response, update_user_status,
+)
+from src.versions import VersionConflictError
+
+
+@pytest.fixture(autouse=True)
+def mock_storage_path(tmp_path, monkeypatch):
+    """Fixture to use temporary files for storage during tests."""
+    monkeypatch.setattr(src.storage, "DATA_FILE", str(tmp_path / "test_diagnostics.json"))
+    monkeypatch.setattr(src.storage, "USERS_FILE", str(tmp_path / "test_users.json"))
+    monkeypatch.setattr(src.storage, "TUTORIALS_FILE", str(tmp_path / "test_tutorials.json"))
+    monkeypatch.setattr(src.storage, "SQLITE_FILE", str(tmp_path / "test_diagnostics.db"))
+    monkeypatch.setattr(src.storage, "FILES_DIR", str(tmp_path / "records"))
+    monkeypatch.setattr(src.storage, "_hash_password", lambda password, salt=None: ("hash", "salt"))
+    monkeypatch.setattr(src.storage, "_CONFLICTS", {"requests": 0, "tutorials": 0, "users": 0})
+
+
+@pytest.fixture(params=["json", "journal", "sqlite", "files"])
+def storage_mode(request, monkeypatch):
+    monkeypatch.setattr(src.storage, "STORAGE_MODE", request.param)
+    src.storage._REQUESTS_CACHE.bind(None)
+    return request.param
+
+
+def test_every_write_bumps_the_version(storage_mode):
+    request_id = create_request({"make": "Toyota"})
+    assert get_request(request_id)["version"] == 1
+    update_request_files(request_id, ["a.jpg"])
+    update_request_response(request_id, "done")
+    assert get_request(request_id)["version"] == 3
+
+    tutorial_id = create_tutorial_request({"make": "Honda"})
+    update_tutorial_request_response(tutorial_id, "link")
+    assert get_tutorial_request(tutorial_id)["version"] == 2
+
+    create_user("a@example.com", "pw", "A", "1990-01-01", "Driver")
+    update_user_status("a@example.com", "paused")
+    assert get_user("a@example.com")["version"] == 2
+
+
+def test_stale_writes_are_rejected_and_counted(storage_mode):
+    request_id = create_request({"make": "Toyota"})
+    seen = get_request(request_id)["version"]
+    update_request_files(request_id, ["a.jpg"], expected_version=seen)
+
+    with pytest.raises(VersionConflictError) as excinfo:
+        update_request_response(request_id, "stale", expected_version=seen)
+    assert (excinfo.value.expected, excinfo.value.actual) == (1, 2)
+    record = get_request(request_id)
+    assert record["status"] == "pending" and record["files"] == ["a.jpg"]
+
+    create_user("a@example.com", "pw", "A", "1990-01-01", "Driver")
+    update_user_status("a@example.com", "paused")
+    with pytest.raises(VersionConflictError):
+        delete_user("a@example.com", expected_version=1)
+    assert get_user("a@example.com") is not None
+    assert delete_user("a@example.com", expected_version=2)
+
+    assert get_conflict_stats() == {"requests": 1, "tutorials": 0, "users": 1}
+
+
+def test_legacy_records_start_at_version_zero(storage_mode):
+    legacy = {"request_id": "legacy", "make": "Ford", "status": "pending", "response": None}
+    if storage_mode in ("sqlite", "files"):
+        src.storage._document_store().put_many("requests", {"legacy": legacy})
+    else:
+        fileio.atomic_write_json(src.storage.DATA_FILE, {"legacy": legacy})
+
+    assert "version" not in get_request("legacy")
+    with pytest.raises(VersionConflictError):
+        update_request_response("legacy", "done", expected_version=1)
+    assert update_request_response("legacy", "done", expected_version=0)
+    assert get_request("legacy")["version"] == 1
+
+
+def test_concurrent_updates_are_not_lost(storage_mode):
+    request_id = create_request({"make": "Toyota", "hits": 0})
+
+    def bump():
+        for _ in range(10):
+            src.storage._update_record("requests", request_id, lambda r: r.update(hits=r["hits"] + 1))
+
+    threads = [threading.Thread(target=bump) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+    record = get_request(request_id)
+    assert record["hits"] == 40
+    assert record["version"] == 41
+
+
+def test_sqlite_update_retries_after_a_concurrent_write(monkeypatch):
+    monkeypatch.setattr(src.storage, "STORAGE_MODE", "sqlite")
+    request_id = create_request({"make": "Toyota"})
+    calls = []
+
+    def apply(record):
+        calls.append(record["version"])
+        if len(calls) == 1:
+            # Another session writes between our read and our commit
+            other = threading.Thread(target=update_request_files, args=(request_id, ["a.jpg"]))
+            other.start()
+            other.join()
+        record["note"] = "checked"
+
+    record = src.storage._update_record("requests", request_id, apply)
+    assert calls == [1, 2]
+    assert record["version"] == 3
+    stored = get_request(request_id)
+    assert stored["files"] == ["a.jpg"] and stored["note"] == "checked"
+
+
+def test_actions_check_the_version_shown_before_the_click(app_module):
+    create_user("a@example.com", "pw", "A", "1990-01-01", "Driver")
+
+    app, _ = app_module
+
+    def render():
+        return app._seen_version("users", "a@example.com", get_user("a@example.com"))
+
+    render()
+    update_user_status("a@example.com", "paused")  # another session
+    # A click on the stale view conflicts, and the rerun shows the new state
+    with pytest.raises(VersionConflictError):
+        delete_user("a@example.com", expected_version=render())
+
+    # A click on the refreshed view succeeds
+    update_user_status("a@example.com", "active", expected_version=render())
+    assert get_user("a@example.com")["status"] == "active"
+
+    # So does one on a view refreshed by a plain rerun after a change elsewhere
+    update_user_status("a@example.com", "paused")
+    render()
+    assert delete_user("a@example.com", expected_version=render())
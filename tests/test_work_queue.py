@@ -0,0 +1,164 @@
+import threading
+
+import pytest
+import src.storage
+from src import ids
+from src.storage import (
+    claim_next_request, complete_claimed_request, create_request,
+    get_request, release_request, renew_lease, update_request_response,
+)
+from src.workqueue import WorkQueue
+
+
+# src.storage is reloaded by test_env_config, so LeaseLostError is looked up
+# on the module rather than imported.
+
+
+@pytest.fixture(autouse=True)
+def mock_storage_path(tmp_path, monkeypatch):
+    """Fixture to use a temporary file for storage during tests."""
+    monkeypatch.setattr(src.storage, "DATA_FILE", str(tmp_path / "test_diagnostics.json"))
+    monkeypatch.setattr(src.storage, "SQLITE_FILE", str(tmp_path / "test_diagnostics.db"))
+    monkeypatch.setattr(src.storage, "FILES_DIR", str(tmp_path / "records"))
+
+
+@pytest.fixture(params=["json", "journal", "sqlite", "files"])
+def storage_mode(request, monkeypatch):
+    monkeypatch.setattr(src.storage, "STORAGE_MODE", request.param)
+    src.storage._REQUESTS_CACHE.bind(None)
+    return request.param
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controls ids.now_ms() as seen by the storage module."""
+    now = [ids.now_ms()]
+    monkeypatch.setattr(src.storage.ids, "now_ms", lambda: now[0])
+    return now
+
+
+def _create(n, deadlines=None):
+    request_ids = []
+    for i in range(n):
+        request_id = create_request({"make": f"Make{i}"})
+        if deadlines is not None:
+            src.storage._update_record(
+                "requests", request_id, lambda r, d=deadlines[i]: r.update(sla_deadline_ms=d),
+            )
+        request_ids.append(request_id)
+    return request_ids
+
+
+def test_queue_orders_by_deadline_and_releases_expired_leases():
+    queue = WorkQueue({
+        "a": {"status": "pending", "sla_deadline_ms": 300},
+        "b": {"status": "pending", "sla_deadline_ms": 100},
+        "c": {"status": "completed", "sla_deadline_ms": 50},
+        "d": {"status": "pending", "timestamp_ms": 200},
+    })
+    assert len(queue) == 3
+    assert queue.peek(0) == "b"
+
+    queue.update("b", {"status": "pending", "sla_deadline_ms": 100,
+                       "claimed_by": "x", "lease_expires_ms": 1000})
+    assert queue.peek(999) == "d"
+    queue.update("d", {"status": "completed"})
+    assert queue.peek(999) == "a"
+    assert queue.peek(1000) == "b"
+
+    queue.update("a", None)
+    queue.update("b", {"status": "completed"})
+    assert queue.peek(5000) is None
+    assert len(queue) == 0
+
+
+def test_claims_follow_sla_deadline(storage_mode):
+    first, second, third = _create(3, deadlines=[3000, 1000, 2000])
+    claimed = [claim_next_request(f"expert{i}")[0] for i in range(3)]
+    assert claimed == [second, third, first]
+    assert claim_next_request("expert9") is None
+
+    record = get_request(second)
+    assert record["claimed_by"] == "expert0"
+    assert record["lease_expires_ms"] > ids.now_ms()
+
+
+def test_new_requests_get_an_sla_deadline(storage_mode, monkeypatch):
+    monkeypatch.setattr(src.storage, "REQUEST_SLA_HOURS", 2)
+    record = get_request(_create(1)[0])
+    assert record["sla_deadline_ms"] == record["timestamp_ms"] + 2 * 3600 * 1000
+
+
+def test_expired_lease_returns_request_to_queue(storage_mode, clock):
+    (request_id,) = _create(1)
+    assert claim_next_request("alice", lease_seconds=60)[0] == request_id
+    assert claim_next_request("bob") is None
+
+    clock[0] += 61_000
+    assert claim_next_request("bob")[0] == request_id
+    with pytest.raises(src.storage.LeaseLostError):
+        renew_lease(request_id, "alice")
+    with pytest.raises(src.storage.LeaseLostError):
+        complete_claimed_request(request_id, "alice", "Too late")
+
+    record = complete_claimed_request(request_id, "bob", "Replace the coil pack")
+    assert record["status"] == "completed"
+    assert record["answered_by"] == "bob"
+    assert "claimed_by" not in get_request(request_id)
+    with pytest.raises(src.storage.LeaseLostError):
+        complete_claimed_request(request_id, "bob", "Again")
+
+
+def test_claims_belong_to_the_session_not_the_name(storage_mode):
+    (request_id,) = _create(1)
+    # Two experts who both log in as "John" get their own session IDs
+    first, second = "session-1", "session-2"
+    assert claim_next_request(first)[0] == request_id
+    with pytest.raises(src.storage.LeaseLostError):
+        renew_lease(request_id, second)
+    assert not release_request(request_id, second)
+    with pytest.raises(src.storage.LeaseLostError):
+        complete_claimed_request(request_id, second, "Check the plugs", "John")
+
+    record = complete_claimed_request(request_id, first, "Replace the coil pack", "John")
+    assert record["answered_by"] == "John"
+
+
+def test_renew_and_release(storage_mode, clock):
+    (request_id,) = _create(1)
+    claim_next_request("alice", lease_seconds=60)
+    clock[0] += 50_000
+    assert renew_lease(request_id, "alice", lease_seconds=60) == clock[0] + 60_000
+    clock[0] += 50_000
+    assert claim_next_request("bob") is None
+
+    assert not release_request(request_id, "bob")
+    assert release_request(request_id, "alice")
+    assert claim_next_request("bob")[0] == request_id
+
+
+def test_direct_response_removes_request_from_queue(storage_mode):
+    (request_id,) = _create(1)
+    update_request_response(request_id, "done")
+    assert claim_next_request("alice") is None
+
+
+def test_concurrent_claims_are_exclusive(storage_mode):
+    request_ids = _create(8)
+    claims = []
+    lock = threading.Lock()
+
+    def worker(expert_id):
+        while True:
+            claim = claim_next_request(expert_id)
+            if claim is None:
+                return
+            with lock:
+                claims.append(claim[0])
+
+    threads = [threading.Thread(target=worker, args=(f"expert{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+    assert sorted(claims) == sorted(request_ids)